@@ -2,19 +2,42 @@
 from __future__ import annotations
 
 import os
+import re
 import json
 import uuid
+import time
+import asyncio
+import hashlib
+import threading
 import shutil
-import subprocess
+import socket
+import itertools
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 import redis
-from rq import Queue
+import redis.asyncio as aioredis
+from rq import Queue, Worker
+from rq.job import Job, JobStatus
+
+from blobstore import BlobStore
+from capabilities import STAGE_NEEDS, CapabilityRegistry, can_run, execution_plan
+from cpubroker import CpuBroker
+from dispatch import QUEUE_GPU, QUEUE_NAMES, QUEUE_SMALL, estimate_job
+from jobstate import JobStateStore, subscribe_job
+from precompress import build_variants, negotiate, variant_path
+from result_cache import ResultCache
+from recon.features import FeatureCache, extract_with_cache
+from recon.downscale import downscale_images
+from recon.runner import ColmapProgress, StopCheck, run_streamed, with_deadline
+from recon.ply import read_ply_vertices
+from recon.tiles import MANIFEST_NAME, NODES_DIR, build_tiles
+from recon.stages import DENSE_STAGES, SFM_STAGES, STAGES, ColmapPipeline, StageAborted, StageFailed
 
 # ============================================================
 # Paths / Config
@@ -23,14 +46,112 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data" / "jobs"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-RUN_COLMAP_SH = BASE_DIR / "recon" / "run_colmap.sh"
+# 입력 이미지 content-addressed 저장소 (job input/은 여기로의 hardlink)
+# hardlink가 되려면 DATA_DIR과 같은 파일시스템이어야 함
+BLOB_DIR = BASE_DIR / "data" / "blobs"
+blobs = BlobStore(BLOB_DIR)
+
 RUN_3DGS_SH = BASE_DIR / "recon" / "run_3dgs.sh"  # ✅ 추가: 3DGS 파이프라인(선택)
 
+# 결과 캐시: 같은 입력 + 같은 파이프라인이면 재구성을 다시 돌리지 않음
+# 스크립트/파라미터 의미가 바뀌면 PIPELINE_VERSION을 올려서 기존 캐시를 무효화할 것
+PIPELINE_VERSION = "2"
+RESULT_CACHE_DIR = BASE_DIR / "data" / "cache" / "results"
+RESULT_CACHE_BYTES = int(os.environ.get("RESULT_CACHE_BYTES", str(20 * 1024**3)))
+result_cache = ResultCache(RESULT_CACHE_DIR, RESULT_CACHE_BYTES)
+
+# SIFT feature 캐시: 이미지 hash + 추출 설정 -> keypoints/descriptors (job 간 재사용)
+FEATURE_CACHE_DB = BASE_DIR / "data" / "cache" / "features.db"
+USE_FEATURE_CACHE = os.environ.get("USE_FEATURE_CACHE", "1") == "1"
+
+# SfM 전 다운스케일 (긴 변 px, 0이면 끔). 원본 input/은 3DGS/texture 용으로 그대로 둔다.
+SFM_MAX_IMAGE_SIZE = int(os.environ.get("SFM_MAX_IMAGE_SIZE", "0"))
+DOWNSCALE_WORKERS = int(os.environ.get("DOWNSCALE_WORKERS", "0"))  # 0 = cpu 수
+
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
 FRONT_ORIGINS = os.environ.get("FRONT_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000")
 
+# 업로드: 파일 전체를 메모리에 올리지 않고 chunk 단위로 디스크에 흘려 쓴다.
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", "4"))
+# 이 시간(초) 동안 chunk를 못 쓴 PUT writer marker는 끊긴 연결로 보고 finalize를 막지 않음
+UPLOAD_WRITER_STALE = float(os.environ.get("UPLOAD_WRITER_STALE", "300"))
+
+# matching: auto = 이미지가 MATCH_EXHAUSTIVE_MAX 장을 넘으면 촬영 시각/GPS로 pair 선택 (O(n))
+#           exhaustive / sequential / vocab_tree = 강제
+MATCHER = os.environ.get("MATCHER", "auto")
+MATCH_EXHAUSTIVE_MAX = int(os.environ.get("MATCH_EXHAUSTIVE_MAX", "20"))
+MATCH_TIME_WINDOW = int(os.environ.get("MATCH_TIME_WINDOW", "10"))
+MATCH_GPS_RADIUS_M = float(os.environ.get("MATCH_GPS_RADIUS_M", "30"))
+MATCH_GPS_K = int(os.environ.get("MATCH_GPS_K", "10"))
+# 메타데이터가 없으면 썸네일 retrieval로 이미지당 top-k pair (0 = 끄고 sequential)
+MATCH_RETRIEVAL_K = int(os.environ.get("MATCH_RETRIEVAL_K", "20"))
+COLMAP_VOCAB_TREE = os.environ.get("COLMAP_VOCAB_TREE", "")
+
+# sparse PLY export 필터 (recon/ply.py, 0 = 끔)
+# PLY_MAX_ERROR: 평균 reprojection error(px) 상한, PLY_MIN_TRACK: 최소 관측 이미지 수,
+# PLY_BBOX_PERCENTILE: 축별 [p, 100-p] percentile 상자(+10%) 밖의 outlier 제거
+PLY_MAX_ERROR = float(os.environ.get("PLY_MAX_ERROR", "2.0"))
+PLY_MIN_TRACK = int(os.environ.get("PLY_MIN_TRACK", "3"))
+PLY_BBOX_PERCENTILE = float(os.environ.get("PLY_BBOX_PERCENTILE", "1.0"))
+
+# 결과 파일 다운로드 Cache-Control. 같은 URL의 내용이 바뀔 수 있으므로(sparse -> dense) 기본은 매번 재검증
+# (ETag가 같으면 304라서 재방문 비용은 거의 없음)
+ARTIFACT_CACHE_CONTROL = os.environ.get("ARTIFACT_CACHE_CONTROL", "no-cache")
+
+# 완료 후 결과 파일의 br/zstd/gzip variant를 별도 RQ job으로 미리 만들어 둠 (요청 시점 압축 없음)
+# brotli / zstandard 패키지가 없으면 그 encoding은 건너뜀
+PRECOMPRESS = os.environ.get("PRECOMPRESS", "1") == "1"
+PRECOMPRESS_ENCODINGS = [e.strip() for e in os.environ.get("PRECOMPRESS_ENCODINGS", "br,zstd,gzip").split(",") if e.strip()]
+PRECOMPRESS_WORKERS = int(os.environ.get("PRECOMPRESS_WORKERS", "0"))  # 0 = cpu 수
+
+# 완료 후 points.ply -> octree LOD 타일 (recon/tiles.py, 별도 RQ job). 뷰어는 manifest부터 받아 점진적으로 그림
+# 이보다 점이 적으면(보통 sparse) 타일 없이 points.ply 하나로 충분
+TILES = os.environ.get("TILES", "1") == "1"
+TILE_MIN_POINTS = int(os.environ.get("TILE_MIN_POINTS", "200000"))
+TILE_MAX_LEAF_POINTS = int(os.environ.get("TILE_MAX_LEAF_POINTS", "100000"))
+TILE_NODE_POINTS = int(os.environ.get("TILE_NODE_POINTS", "50000"))
+TILE_GRID_DEPTH = int(os.environ.get("TILE_GRID_DEPTH", "7"))
+TILE_CHUNK_POINTS = int(os.environ.get("TILE_CHUNK_POINTS", "2000000"))
+TILE_NODE_RE = re.compile(r"^r[0-7]*$")
+
+# 실행 중 진행률을 meta에 반영하는 최소 간격(초)
+PROGRESS_INTERVAL = float(os.environ.get("PROGRESS_INTERVAL", "1.0"))
+
 r = redis.from_url(REDIS_URL)
-q = Queue("recon", connection=r)
+# 크기별 큐 (dispatch.py). worker: rq worker -w dispatch.WeightedQueueWorker recon-small recon-large
+queues = {name: Queue(name, connection=r) for name in QUEUE_NAMES}
+# 이 호스트가 못 돌리는 단계(dense/3DGS)는 capability 있는 worker가 듣는 recon-gpu 로 넘긴다
+gpu_queue = Queue(QUEUE_GPU, connection=r)
+capabilities = CapabilityRegistry(r)
+# GPU worker가 있으면 제출 시점에 CPU(SfM) job -> GPU(dense/3DGS) job 체인으로 나눠 넣음 (depends_on)
+CHAIN_GPU = os.environ.get("CHAIN_GPU", "1") == "1"
+
+# GET /api/jobs/{id} polling: Redis hash + 프로세스 내 TTL cache (파일 I/O 없음)
+JOB_STATUS_TTL = float(os.environ.get("JOB_STATUS_TTL", "0.5"))
+job_states = JobStateStore(r, ttl=JOB_STATUS_TTL)
+
+# push 채널 (SSE / WebSocket / long-poll): worker가 상태 바꿀 때마다 Redis pub/sub으로 publish
+ar = aioredis.from_url(REDIS_URL)
+EVENTS_HEARTBEAT = float(os.environ.get("EVENTS_HEARTBEAT", "15"))
+LONG_POLL_MAX = float(os.environ.get("LONG_POLL_MAX", "60"))
+# 이 상태가 되면 더 바뀔 게 없으므로 스트림을 닫는다
+TERMINAL_STATUSES = {"done", "done_sparse", "done_3dgs", "failed", "cancelled", "timed_out"}
+
+# 단계별 wall-clock 상한(초, 0 = 무제한): STAGE_TIMEOUT_DENSE=7200, STAGE_TIMEOUT_3DGS=10800 ...
+# 넘으면 프로세스 그룹째 kill 하고 status = "timed_out"
+STAGE_TIMEOUTS = {
+    stage: float(os.environ.get(f"STAGE_TIMEOUT_{stage.upper()}", "0"))
+    for stage in (*STAGES, "3dgs")
+}
+
+# 노드 단위 CPU thread 예산 (worker 여러 개가 COLMAP 명령마다 코어 전부를 잡는 것 방지)
+# CPU_JOB_SLOTS=0 이면 이 호스트에 등록된 RQ worker 수로 나눔
+USE_CPU_BROKER = os.environ.get("USE_CPU_BROKER", "1") == "1"
+CPU_THREADS_TOTAL = int(os.environ.get("CPU_THREADS_TOTAL", "0")) or (os.cpu_count() or 1)
+CPU_JOB_SLOTS = int(os.environ.get("CPU_JOB_SLOTS", "0"))
+CPU_MIN_THREADS = int(os.environ.get("CPU_MIN_THREADS", "2"))
+CPU_LEASE_WAIT = float(os.environ.get("CPU_LEASE_WAIT", "600"))
 
 # ============================================================
 # FastAPI
@@ -56,15 +177,67 @@ def _job_paths(job_id: str):
     return job_dir, input_dir, output_dir, meta_path
 
 
+def _sfm_images_dir(job_dir: Path) -> Path:
+    """다운스케일된 SfM 작업 이미지 세트 위치"""
+    return job_dir / "work" / "images"
+
+
 def _read_meta(meta_path: Path) -> Dict[str, Any]:
     if not meta_path.exists():
         return {}
     return json.loads(meta_path.read_text(encoding="utf-8"))
 
 
+# 이 프로세스가 마지막으로 쓴 meta.json: path -> (inode, mtime_ns, version).
+# meta.json은 rename으로만 바뀌므로 stat이 같으면 그 뒤 아무도 안 쓴 것 -> 다시 파싱할 필요 없음
+_meta_versions: Dict[str, Tuple[int, int, int]] = {}
+_META_VERSIONS_MAX = 10000
+
+
+def _meta_version(meta_path: Path) -> int:
+    try:
+        st = meta_path.stat()
+    except FileNotFoundError:
+        return 0
+    hit = _meta_versions.get(str(meta_path))
+    if hit is not None and hit[:2] == (st.st_ino, st.st_mtime_ns):
+        return hit[2]
+    # 다른 프로세스(API <-> worker)가 그 사이 썼거나 처음 보는 job: 디스크 값
+    try:
+        return int(_read_meta(meta_path).get("version", 0))
+    except (OSError, ValueError):
+        return 0
+
+
 def _write_meta(meta_path: Path, meta: Dict[str, Any]) -> None:
+    """
+    atomic publish: temp 파일에 쓰고 fsync -> rename.
+    읽는 쪽은 항상 이전 또는 새 meta 전체만 보게 됨 (반쯤 쓰인 JSON 없음).
+    version: 쓸 때마다 +1 (API/worker가 번갈아 써도 디스크 값 기준으로 단조 증가).
+    디스크 version은 보통 stat 한 번으로 확인 (_meta_versions), 남이 쓴 경우에만 다시 읽음
+    """
     meta_path.parent.mkdir(parents=True, exist_ok=True)
-    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    meta["version"] = max(int(meta.get("version", 0)), _meta_version(meta_path)) + 1
+
+    tmp = meta_path.with_name(f".{meta_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as fh:
+            fh.write(json.dumps(meta, ensure_ascii=False, indent=2))
+            fh.flush()
+            os.fsync(fh.fileno())
+            # rename은 inode/mtime을 바꾸지 않으므로 rename 전에 잡아둠 (rename 뒤 stat은 남의 쓰기와 경쟁)
+            st = os.fstat(fh.fileno())
+        os.replace(tmp, meta_path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if len(_meta_versions) >= _META_VERSIONS_MAX:
+        _meta_versions.clear()
+    _meta_versions[str(meta_path)] = (st.st_ino, st.st_mtime_ns, meta["version"])
+
+    # polling용 상태도 같이 갱신 (artifact 존재 여부는 여기서 한 번만 stat)
+    job_id = meta.get("job_id") or meta_path.parent.name
+    job_states.put(job_id, _job_view(job_id, meta, meta_path.parent / "output"))
 
 
 def _safe_filename(name: str) -> str:
@@ -75,6 +248,160 @@ def _tail(s: str, n: int = 6000) -> str:
     return (s or "")[-n:]
 
 
+def _unique_input_path(input_dir: Path, name: str, taken: set) -> Path:
+    out_path = input_dir / name
+    if out_path.exists() or out_path.name in taken:
+        out_path = input_dir / f"{out_path.stem}_{uuid.uuid4().hex[:6]}{out_path.suffix}"
+    taken.add(out_path.name)
+    return out_path
+
+
+def _write_chunk(fh, h, chunk: bytes) -> None:
+    h.update(chunk)
+    fh.write(chunk)
+
+
+async def _stream_upload(f: UploadFile, out_path: Path) -> str:
+    """
+    UploadFile -> blob store -> out_path(hardlink) 로 UPLOAD_CHUNK_SIZE 단위 스트리밍 저장.
+    - 파일 전체를 메모리에 올리지 않음
+    - write/hash는 threadpool에서 (event loop 안 막음)
+    - 이미 있는 내용이면 새 blob은 버리고 기존 blob을 link (job 간 중복 제거)
+    반환: sha256 hex
+    """
+    h = hashlib.sha256()
+    tmp_path = blobs.new_temp()
+    fh = await run_in_threadpool(open, tmp_path, "wb")
+    try:
+        while True:
+            chunk = await f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await run_in_threadpool(_write_chunk, fh, h, chunk)
+    except BaseException:
+        await run_in_threadpool(fh.close)
+        tmp_path.unlink(missing_ok=True)
+        raise
+    await run_in_threadpool(fh.close)
+
+    sha = h.hexdigest()
+    await run_in_threadpool(blobs.commit, tmp_path, sha)
+    await run_in_threadpool(blobs.link, sha, out_path)
+    return sha
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        while True:
+            chunk = fh.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    """[[start, end), ...] 정렬 + 겹치거나 붙은 구간 병합"""
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _upload_ranges_path(job_dir: Path, name: str) -> Path:
+    return job_dir / "upload" / f"{name}.ranges"
+
+
+def _read_upload_ranges(job_dir: Path, name: str) -> List[List[int]]:
+    p = _upload_ranges_path(job_dir, name)
+    if not p.exists():
+        return []
+    ranges = []
+    for line in p.read_text(encoding="utf-8").splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            ranges.append([int(parts[0]), int(parts[1])])
+    return _merge_ranges(ranges)
+
+
+def _write_upload_chunk(path: Path, offset: int, chunks: List[bytes]) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        pos = offset
+        for c in chunks:
+            os.pwrite(fd, c, pos)
+            pos += len(c)
+    finally:
+        os.close(fd)
+
+
+def _record_upload_range(job_dir: Path, name: str, start: int, end: int) -> None:
+    # O_APPEND 한 줄 쓰기: 동시 PUT / 여러 uvicorn worker에서도 lock 없이 안전
+    p = _upload_ranges_path(job_dir, name)
+    fd = os.open(p, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, f"{start} {end}\n".encode("ascii"))
+    finally:
+        os.close(fd)
+
+
+def _upload_writers_dir(job_dir: Path) -> Path:
+    return job_dir / "upload" / ".writers"
+
+
+def _active_upload_writers(job_dir: Path) -> List[str]:
+    """UPLOAD_WRITER_STALE 안에 chunk를 쓴 (아직 끝나지 않은) PUT 들"""
+    now = time.time()
+    active = []
+    try:
+        entries = list(_upload_writers_dir(job_dir).iterdir())
+    except FileNotFoundError:
+        return []
+    for p in entries:
+        try:
+            if now - p.stat().st_mtime < UPLOAD_WRITER_STALE:
+                active.append(p.name)
+        except FileNotFoundError:
+            pass
+    return active
+
+
+def _upload_status(job_dir: Path, meta: Dict[str, Any]) -> Dict[str, Any]:
+    finalized = meta.get("status") != "uploading"
+    files = {}
+    for name, info in meta.get("upload", {}).get("files", {}).items():
+        if finalized:
+            received = [[0, info["size"]]]
+        else:
+            received = _read_upload_ranges(job_dir, name)
+        complete = received == [[0, info["size"]]] or info["size"] == 0
+        files[name] = {"size": info["size"], "received": received, "complete": complete}
+    return files
+
+
+def _parse_blob_refs(raw: Optional[str]) -> Dict[str, str]:
+    """
+    form field "blobs": {"파일명": "sha256", ...} (JSON)
+    이미 서버에 있는 사진은 바이트를 다시 보내지 않고 hash로만 참조.
+    """
+    if not raw:
+        return {}
+    try:
+        refs = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="blobs must be a JSON object")
+    if not isinstance(refs, dict):
+        raise HTTPException(status_code=400, detail="blobs must be a JSON object")
+    for name, sha in refs.items():
+        if not isinstance(sha, str) or not blobs.has(sha.lower()):
+            raise HTTPException(status_code=400, detail=f"unknown blob for {name}: {sha}")
+    return {str(name): sha.lower() for name, sha in refs.items()}
+
+
 def _best_ply_path(output_dir: Path) -> Optional[Path]:
     """
     우선순위:
@@ -114,69 +441,464 @@ def _best_splat_path(output_dir: Path) -> Optional[Path]:
     return None
 
 
+def _pipeline_params() -> Dict[str, Any]:
+    """결과에 영향을 주는 파이프라인 설정 (결과 캐시 key에 들어감)"""
+    return {
+        "single_camera": 1,
+        "sfm_max_image_size": SFM_MAX_IMAGE_SIZE,
+        "matcher": MATCHER,
+        "match": _match_options(),
+        "ply_filter": _ply_filter(),
+        "run_3dgs": RUN_3DGS_SH.exists(),
+    }
+
+
+def _feature_settings() -> Dict[str, Any]:
+    """feature_extractor 결과에 영향을 주는 설정 (feature 캐시 key에 들어감)"""
+    return {
+        "extractor": "sift",
+        "single_camera": 1,
+        "sfm_max_image_size": SFM_MAX_IMAGE_SIZE,
+    }
+
+
+def _prepare_sfm_images(meta: Dict[str, Any], input_dir: Path, job_dir: Path) -> Path:
+    """
+    SFM_MAX_IMAGE_SIZE가 켜져 있으면 process pool로 축소한 작업 이미지 세트를 만들고 그 경로를 반환.
+    꺼져 있거나 실패하면 원본 input_dir 그대로.
+    """
+    if SFM_MAX_IMAGE_SIZE <= 0:
+        return input_dir
+    names = meta.get("files") or sorted(p.name for p in input_dir.iterdir() if p.is_file())
+    sfm_dir = _sfm_images_dir(job_dir)
+    try:
+        res = downscale_images(input_dir, sfm_dir, names, SFM_MAX_IMAGE_SIZE, DOWNSCALE_WORKERS)
+    except Exception as e:
+        meta["warning_downscale"] = f"downscale skipped: {repr(e)}"
+        return input_dir
+    meta["sfm_images"] = res
+    return sfm_dir
+
+
+def _prepare_features(
+    meta: Dict[str, Any],
+    input_dir: Path,
+    output_dir: Path,
+    extra_args: List[str],
+    pipeline: ColmapPipeline,
+    stop: StopCheck,
+) -> bool:
+    """
+    feature 캐시로 colmap.db를 미리 채움 (extract 단계 hook).
+    feature_extractor는 pipeline과 같은 로그/진행률/취소·timeout 경로(run_streamed)로 돌린다.
+    반환: True면 extract 단계의 feature_extractor를 건너뛰어도 됨. 취소/timeout이면 StageAborted
+    """
+    hashes = meta.get("sha256")
+    if not USE_FEATURE_CACHE or not hashes:
+        return False
+    try:
+        res = extract_with_cache(
+            FeatureCache(FEATURE_CACHE_DB),
+            output_dir / "colmap.db",
+            input_dir,
+            hashes,
+            _feature_settings(),
+            extra_args,
+            log_dir=pipeline.log_dir,
+            env=pipeline.env,
+            on_line=pipeline.on_line,
+            stop=stop,
+        )
+    except Exception as e:
+        # 캐시 경로가 깨져도 기존 방식(스크립트 내부 추출)으로 진행
+        meta["warning_features"] = f"feature cache skipped: {repr(e)}"
+        return False
+
+    proc = res["proc"]
+    if proc.aborted:
+        raise StageAborted("extract", proc, proc.aborted)
+    if proc.returncode != 0:
+        meta["warning_features"] = f"feature cache extraction failed (code={proc.returncode})"
+        meta["stderr_tail_features"] = _tail(proc.stderr)
+        return False
+
+    meta["features_cached"] = res["cached"]
+    meta["features_extracted"] = res["extracted"]
+    return True
+
+
+def _node_worker_count() -> int:
+    """이 호스트에서 도는 RQ worker 수 (최소 1)"""
+    try:
+        host = socket.gethostname()
+        return max(1, sum(1 for w in Worker.all(connection=r) if w.hostname == host))
+    except redis.RedisError:
+        return 1
+
+
+def _cpu_broker() -> Optional[CpuBroker]:
+    if not USE_CPU_BROKER:
+        return None
+    return CpuBroker(
+        r,
+        total=CPU_THREADS_TOTAL,
+        slots=CPU_JOB_SLOTS or _node_worker_count(),
+        min_threads=CPU_MIN_THREADS,
+        wait_timeout=CPU_LEASE_WAIT,
+    )
+
+
+def _match_options() -> Dict[str, Any]:
+    return {
+        "exhaustive_max": MATCH_EXHAUSTIVE_MAX,
+        "time_window": MATCH_TIME_WINDOW,
+        "gps_radius_m": MATCH_GPS_RADIUS_M,
+        "gps_k": MATCH_GPS_K,
+        "retrieval_k": MATCH_RETRIEVAL_K,
+        "vocab_tree_path": COLMAP_VOCAB_TREE or None,
+    }
+
+
+def _ply_filter() -> Dict[str, Any]:
+    return {
+        "max_error": PLY_MAX_ERROR,
+        "min_track": PLY_MIN_TRACK,
+        "bbox_percentile": PLY_BBOX_PERCENTILE,
+    }
+
+
+def _publish_ply(src: Path, dst: Path, link: bool = False) -> None:
+    """
+    단계 산출물 -> output/points.ply (temp -> rename, 읽는 쪽이 반쯤 쓴 파일을 보지 않게).
+    link=True: hardlink (복사 없음). 원본을 항상 새 파일로 교체하는 산출물(points_sparse.ply)에만 쓸 것
+    """
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        if link:
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _result_key(meta: Dict[str, Any], skipped: Iterable[str] = ()) -> Optional[str]:
+    """
+    skipped: capability 부족으로 건너뛴 단계 (CPU 전용 호스트의 dense/3DGS 등).
+    건너뛴 결과는 전체 결과와 다른 key -> GPU worker가 생겨도 sparse 결과가 전체 결과 자리를 차지하지 않음
+    """
+    hashes = meta.get("sha256")
+    if not hashes:
+        return None
+    params = _pipeline_params()
+    if skipped:
+        params["skipped"] = sorted(skipped)
+    return ResultCache.key(hashes.values(), PIPELINE_VERSION, params)
+
+
+def _gpu_stages() -> List[str]:
+    return [*DENSE_STAGES, *(["3dgs"] if RUN_3DGS_SH.exists() else [])]
+
+
+def _result_keys(meta: Dict[str, Any]) -> List[str]:
+    """
+    복원 시 찾아볼 key (선호 순서): 전체 결과 -> 지금 돌릴 수 있는 worker가 없는 단계를 건너뛴 결과.
+    capability 단위(dense / 3dgs)로 건너뛰므로 후보는 몇 개뿐
+    """
+    full = _result_key(meta)
+    if not full:
+        return []
+    keys = [full]
+    groups: Dict[str, List[str]] = {}
+    for stage in _gpu_stages():
+        groups.setdefault(STAGE_NEEDS[stage], []).append(stage)
+    for n in range(1, len(groups) + 1):
+        for combo in itertools.combinations(groups.values(), n):
+            skipped = [stage for group in combo for stage in group]
+            if _capable_gpu_worker(skipped) is None:
+                keys.append(_result_key(meta, skipped))
+    return keys
+
+
+# 캐시 hit 때 새 job meta로 옮겨오는 필드
+# (entry의 "artifacts"는 캐시가 쓰는 산출물 이름 목록이라 served_artifacts와 별개)
+RESULT_META_KEYS = (
+    "status", "warning", "warning_3dgs", "hint", "skipped_stages",
+    "points_ply_name", "splat_name", "served_artifacts",
+)
+
+
+def _cache_result(meta: Dict[str, Any], output_dir: Path) -> None:
+    key = _result_key(meta, meta.get("skipped_stages") or ())
+    if not key:
+        return
+    try:
+        result_cache.put(key, output_dir, {k: meta[k] for k in RESULT_META_KEYS if k in meta})
+    except OSError:
+        # 캐시는 부가기능: 실패해도 job 결과에는 영향 없음
+        pass
+
+
+def _restore_cached_result(meta: Dict[str, Any], output_dir: Path) -> bool:
+    for key in _result_keys(meta):
+        entry = result_cache.restore(key, output_dir)
+        if entry is not None:
+            break
+    else:
+        return False
+    for k in RESULT_META_KEYS:
+        if k in entry:
+            meta[k] = entry[k]
+    meta["cache_hit"] = key
+    ply = _best_ply_path(output_dir)
+    if ply:
+        meta["points_ply"] = str(ply)
+    splat = _best_splat_path(output_dir)
+    if splat:
+        meta["splat"] = str(splat)
+    # hardlink로 복원됐으면 기록 그대로 재사용, copy로 복원됐으면(mtime 다름) 다시 hash
+    _record_artifacts(meta, output_dir)
+    return True
+
+
+# 다운로드 route 이름 -> 실제 파일 찾는 함수
+ARTIFACTS = {
+    "points.ply": _best_ply_path,
+    "scene.splat": _best_splat_path,
+}
+
+
+def _artifact_stat(path: Path) -> Dict[str, Any]:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _record_artifacts(meta: Dict[str, Any], output_dir: Path) -> None:
+    """
+    다운로드 산출물의 content hash -> meta["served_artifacts"] (strong ETag 용).
+    size/mtime이 기록과 같으면 다시 hash 안 함 (체인 job에서 여러 번 불려도 한 번만 읽음)
+    """
+    recorded = meta.get("served_artifacts") or {}
+    artifacts = {}
+    for name, find in ARTIFACTS.items():
+        path = find(output_dir)
+        if not path or not path.exists():
+            continue
+        stat = _artifact_stat(path)
+        file = str(path.relative_to(output_dir))
+        prev = recorded.get(name)
+        if prev and prev.get("file") == file and all(prev.get(k) == v for k, v in stat.items()):
+            artifacts[name] = prev
+        else:
+            artifacts[name] = dict(stat, file=file, sha256=_hash_file(path))
+    meta["served_artifacts"] = artifacts
+
+
+def _job_view(job_id: str, meta: Dict[str, Any], output_dir: Path) -> Dict[str, Any]:
+    """GET /api/jobs/{id} 응답 (meta + artifact 존재 여부)"""
+    ply = _best_ply_path(output_dir)
+    splat = _best_splat_path(output_dir)
+
+    return {
+        "job_id": job_id,
+        "version": meta.get("version", 0),
+        "status": meta.get("status", "unknown"),
+        "stage": meta.get("stage"),
+        "progress": meta.get("progress"),
+        "input_count": meta.get("input_count", 0),
+        "files": meta.get("files", []),
+        "error": meta.get("error"),
+        "warning": meta.get("warning"),
+        "warning_3dgs": meta.get("warning_3dgs"),
+        "hint": meta.get("hint"),
+        "points_ply_exists": bool(ply and ply.exists()),
+        "points_ply_url": f"/api/jobs/{job_id}/points.ply" if ply and ply.exists() else None,
+        "splat_exists": bool(splat and splat.exists()),
+        "splat_url": f"/api/jobs/{job_id}/scene.splat" if splat and splat.exists() else None,
+        "tiles_url": f"/api/jobs/{job_id}/tiles" if meta.get("tiles") else None,
+    }
+
+
+def _progress_publisher(meta_path: Path, meta: Dict[str, Any]):
+    """
+    진행률 콜백 (runner reader thread에서 호출됨).
+    단계가 바뀔 때는 바로, 같은 단계 안에서는 PROGRESS_INTERVAL 마다 한 번만 meta 갱신.
+    """
+    lock = threading.Lock()
+    last = {"t": 0.0, "stage": None}
+
+    def publish(fraction: float, stage: str) -> None:
+        with lock:
+            now = time.monotonic()
+            if stage == last["stage"] and now - last["t"] < PROGRESS_INTERVAL:
+                return
+            last["t"], last["stage"] = now, stage
+            meta["progress"] = round(fraction, 4)
+            meta["stage"] = stage
+            _write_meta(meta_path, meta)
+
+    return publish
+
+
 # ============================================================
 # Worker Task
 # ============================================================
-def recon_job(job_id: str) -> Dict[str, Any]:
+def _capable_gpu_worker(stages: List[str]) -> Optional[str]:
+    """recon-gpu 를 듣는 살아있는 worker 중 stages를 다 돌릴 수 있는 호스트"""
+    try:
+        workers = Worker.all(connection=r, queue=gpu_queue)
+    except redis.RedisError:
+        return None
+    for w in workers:
+        caps = capabilities.get(w.hostname)
+        if caps and all(can_run(caps, s) for s in stages):
+            return w.hostname
+    return None
+
+
+def recon_job(job_id: str, stages: Optional[List[str]] = None, final: bool = True) -> Dict[str, Any]:
     """
     파이프라인:
-    A) run_colmap.sh -> sparse points 생성 (Mac CPU OK)
+    A) recon.stages (extract/match/map/convert/undistort/dense) -> sparse points 생성 (Mac CPU OK)
+       - 단계 완료 마커가 있으면 재시도/재실행 때 첫 미완료 단계부터 이어서
     B) run_3dgs.sh (있으면) -> scene.splat 생성 (대부분 CUDA 필요)
-       - CUDA 없으면 실패 가능 -> done_sparse로 종료(정상)
+
+    worker capability(capabilities.py)로 실행 계획을 먼저 세운다:
+    이 호스트가 못 돌리는 단계(CUDA 없는데 dense/3DGS)는 시작도 안 하고,
+    recon-gpu 를 듣는 capable worker가 있으면 그 단계만 recon_job(job_id, stages=[...])로 넘긴다.
+    stages: None = 전체, 아니면 그 단계만 (체인의 CPU/GPU job, 넘겨받은 단계)
+    final: False면 체인 중간 (CPU job) -> 끝나도 완료 처리/결과 캐시 없이 queued_gpu 로 두고
+           depends_on 으로 걸린 GPU job이 이어받는다
     """
     job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
     if not job_dir.exists():
         raise RuntimeError(f"job_dir not found: {job_dir}")
 
     meta = _read_meta(meta_path)
+    # 체인 앞 job이 실패/중단(취소 포함)했으면 이어받을 게 없음.
+    # 취소 확인보다 먼저: 이미 기록된 failed/cancelled meta를 덮어쓰지 않도록
+    if stages is not None and "extract" not in stages and meta.get("status") in TERMINAL_STATUSES:
+        return meta
+    # 큐에서 기다리는 동안 취소됐으면 시작하지 않음
+    if job_states.cancel_requested(job_id):
+        return _abort_job(meta_path, meta, "cancelled", "queued")
     meta["status"] = "running"
     _write_meta(meta_path, meta)
 
+    def cancelled() -> Optional[str]:
+        return "cancelled" if job_states.cancel_requested(job_id) else None
+
     input_dir.mkdir(parents=True, exist_ok=True)
     output_dir.mkdir(parents=True, exist_ok=True)
+    # 전체 stdout/stderr (gzip). meta에는 tail만 남김
+    log_dir = job_dir / "logs"
+    meta["log_dir"] = str(log_dir)
 
-    if not RUN_COLMAP_SH.exists():
-        meta["status"] = "failed"
-        meta["error"] = f"run_colmap.sh not found: {RUN_COLMAP_SH}"
-        _write_meta(meta_path, meta)
-        return meta
+    first_phase = stages is None or "extract" in stages
+    requested = list(stages) if stages is not None else [*STAGES, *(["3dgs"] if RUN_3DGS_SH.exists() else [])]
 
     # -------------------------
-    # A) COLMAP (sparse)
+    # A) COLMAP (단계별, 완료된 단계는 건너뛰고 이어서)
     # -------------------------
     try:
-        cmd = ["bash", str(RUN_COLMAP_SH), str(input_dir), str(output_dir)]
-        proc = subprocess.run(cmd, capture_output=True, text=True)
+        plan = execution_plan(capabilities.local(), requested)
+        if first_phase:
+            meta["stages_done"] = []
+            meta["exec_plans"] = []
+            for k in ("failed_stage", "stage_error", "warning", "error", "skipped_stages", "routed"):
+                meta.pop(k, None)
+        meta.setdefault("exec_plans", []).append(plan)
+
+        sfm_missing = [s for s in plan["remote"] if s in ("extract", "match", "map", "convert")]
+        if sfm_missing:
+            meta["status"] = "failed"
+            meta["error"] = f"COLMAP not available on worker {plan['host']} (needed for {', '.join(sfm_missing)})"
+            _write_meta(meta_path, meta)
+            return meta
 
-        meta["last_cmd"] = " ".join(cmd)
-        meta["stdout_tail"] = _tail(proc.stdout)
-        meta["stderr_tail"] = _tail(proc.stderr)
+        # SfM/dense는 (켜져 있으면) 축소된 작업 세트로, 3DGS는 원본 input_dir로
+        if first_phase:
+            sfm_dir = _prepare_sfm_images(meta, input_dir, job_dir)
+        else:
+            sfm_dir = _sfm_images_dir(job_dir) if meta.get("sfm_images") else input_dir
+
+        progress = ColmapProgress(meta.get("input_count", 0), _progress_publisher(meta_path, meta))
+        broker = _cpu_broker()
+        pipeline = ColmapPipeline(
+            sfm_dir, output_dir, log_dir,
+            on_line=progress.feed,
+            matcher=MATCHER,
+            match_options=_match_options(),
+            thread_lease=(lambda stage, stop: broker.lease(stop=stop)) if broker else None,
+            stop=cancelled,
+            stage_timeouts=STAGE_TIMEOUTS,
+            ply_filter=_ply_filter(),
+        )
+
+        def on_stage(stage: str, event: str) -> None:
+            if stage == "match" and event == "start":
+                plan = pipeline.plan_matching()
+                meta["match_plan"] = {"kind": plan.kind, "pairs": len(plan.pairs), "reason": plan.reason}
+            if event in ("done", "skipped"):
+                meta.setdefault("stages_done", []).append(stage)
+                _write_meta(meta_path, meta)
 
-        # run_colmap.sh가 dense에서 CUDA로 죽어도, sparse 산출물이 있으면 "done_sparse"로 살린다.
+        returncode = 0
+        last = None
+        try:
+            res = pipeline.run(
+                stages=[s for s in STAGES if s in plan["local"]],
+                extract_hook=lambda extra, stop: _prepare_features(meta, sfm_dir, output_dir, extra, pipeline, stop),
+                on_stage=on_stage,
+            )
+            last = res["last"]
+        except StageAborted as e:
+            meta["last_cmd"] = " ".join(e.result.cmd) if e.result else None
+            meta["stderr_tail"] = _tail(e.result.stderr if e.result else "")
+            return _abort_job(meta_path, meta, e.reason, e.stage)
+        except StageFailed as e:
+            last = e.result
+            returncode = last.returncode if last and last.returncode != 0 else 1
+            meta["failed_stage"] = e.stage
+            meta["stage_error"] = str(e)
+
+        if last is not None:
+            meta["last_cmd"] = " ".join(last.cmd)
+            meta["stdout_tail"] = _tail(last.stdout)
+            meta["stderr_tail"] = _tail(last.stderr)
+        meta["progress"] = 1.0
+
+        # dense 단계가 CUDA로 죽어도, sparse 산출물이 있으면 "done_sparse"로 살린다.
         ply = _best_ply_path(output_dir)
-        if proc.returncode != 0:
+        if returncode != 0:
             if ply and ply.exists():
                 # ✅ sparse라도 결과 있으면 정상 처리
                 meta["status"] = "done_sparse"
-                meta["warning"] = f"COLMAP pipeline returned code={proc.returncode}, but sparse output exists."
+                meta["warning"] = f"COLMAP stage {meta['failed_stage']} returned code={returncode}, but sparse output exists."
             else:
                 meta["status"] = "failed"
-                meta["error"] = f"COLMAP script failed (code={proc.returncode})"
+                meta["error"] = f"COLMAP stage {meta['failed_stage']} failed (code={returncode})"
                 _write_meta(meta_path, meta)
                 return meta
 
         # 결과 ply가 output/points.ply로 통일되게 맞춰주기
-        ply = _best_ply_path(output_dir)
+        # (재실행으로 dense가 새로 생겼을 수 있으므로 이전 points.ply보다 단계 산출물 우선)
+        ply = next((p for p in (pipeline.dense_ply, pipeline.sparse_ply) if p.exists()), None) or _best_ply_path(output_dir)
         if not ply:
             meta["status"] = "failed"
             meta["error"] = "No PLY produced (sparse/dense not found)"
             _write_meta(meta_path, meta)
             return meta
 
-        # output/points.ply로 복사(뷰어/다운로드 일관성)
+        # output/points.ply로 통일(뷰어/다운로드 일관성)
         unified = output_dir / "points.ply"
         if ply.resolve() != unified.resolve():
-            shutil.copyfile(ply, unified)
+            _publish_ply(ply, unified, link=ply == pipeline.sparse_ply)
             meta["points_ply_name"] = unified.name
         else:
             meta["points_ply_name"] = ply.name
@@ -186,18 +908,20 @@ def recon_job(job_id: str) -> Dict[str, Any]:
         # -------------------------
         # B) 3DGS (optional)
         # -------------------------
-        # CUDA/환경 있으면 여기서 바로 학습 -> scene.splat 산출
-        # 없으면 그냥 done_sparse로 끝나도 OK
-        if RUN_3DGS_SH.exists():
+        # 이 호스트가 돌릴 수 있을 때만 (못 돌리면 아래에서 GPU worker로 넘기거나 건너뜀)
+        if "3dgs" in plan["local"]:
             meta["status"] = "running_3dgs"
             _write_meta(meta_path, meta)
 
             cmd2 = ["bash", str(RUN_3DGS_SH), str(input_dir), str(output_dir)]
-            proc2 = subprocess.run(cmd2, capture_output=True, text=True)
+            proc2 = run_streamed(cmd2, log_dir, "3dgs", stop=with_deadline(cancelled, STAGE_TIMEOUTS["3dgs"]))
 
             meta["last_cmd_3dgs"] = " ".join(cmd2)
             meta["stdout_tail_3dgs"] = _tail(proc2.stdout)
             meta["stderr_tail_3dgs"] = _tail(proc2.stderr)
+            if proc2.aborted:
+                # sparse 결과(points.ply)는 이미 있으므로 그대로 둔다
+                return _abort_job(meta_path, meta, proc2.aborted, "3dgs")
 
             splat = _best_splat_path(output_dir)
 
@@ -206,21 +930,47 @@ def recon_job(job_id: str) -> Dict[str, Any]:
                 meta["status"] = "done_3dgs"
                 meta["splat"] = str(splat)
                 meta["splat_name"] = splat.name
-                _write_meta(meta_path, meta)
-                return meta
-
-            # ✅ 3DGS 실패해도 sparse는 성공이면 끝까지 살린다
+            else:
+                # ✅ 3DGS 실패해도 sparse는 성공이면 끝까지 살린다
+                meta["status"] = "done_sparse"
+                meta["warning_3dgs"] = f"3DGS failed (code={proc2.returncode}). Sparse result is available."
+                if "Dense stereo reconstruction requires CUDA" in (meta.get("stderr_tail_3dgs", "") + meta.get("stderr_tail", "")):
+                    meta["hint"] = "3DGS/Dense는 CUDA GPU 필요. 배포는 GPU 서버에서 학습/생성하도록 분리하는 게 정답."
+        elif meta.get("splat") and _best_splat_path(output_dir):
+            # 앞 단계(다른 호스트)에서 이미 3DGS까지 끝남
+            meta["status"] = "done_3dgs"
+        elif meta.get("status") not in ("done_sparse", "done_3dgs"):
+            # 3DGS 없으면 sparse 완료
             meta["status"] = "done_sparse"
-            meta["warning_3dgs"] = f"3DGS failed (code={proc2.returncode}). Sparse result is available."
-            if "Dense stereo reconstruction requires CUDA" in (meta.get("stderr_tail_3dgs", "") + meta.get("stderr_tail", "")):
-                meta["hint"] = "3DGS/Dense는 CUDA GPU 필요. 배포는 GPU 서버에서 학습/생성하도록 분리하는 게 정답."
+
+        _record_artifacts(meta, output_dir)
+
+        # 체인 중간(CPU job): GPU job이 이어받는다
+        if not final:
+            meta["status"] = "queued_gpu"
             _write_meta(meta_path, meta)
             return meta
 
-        # 3DGS 스크립트 없으면 sparse 완료
-        if meta.get("status") not in ("done_sparse", "done_3dgs"):
-            meta["status"] = "done_sparse"
+        # -------------------------
+        # C) 이 호스트가 못 돌린 단계: capable worker로 넘기거나 건너뜀
+        # -------------------------
+        if plan["remote"]:
+            host = _capable_gpu_worker(plan["remote"]) if first_phase else None
+            if host:
+                meta["status"] = "queued_gpu"
+                meta["routed"] = {"stages": plan["remote"], "queue": QUEUE_GPU, "candidate": host}
+                _write_meta(meta_path, meta)
+                rq_job = gpu_queue.enqueue(recon_job, job_id, stages=plan["remote"])
+                meta["rq_id_gpu"] = rq_job.get_id()
+                _write_meta(meta_path, meta)
+                return meta
+            meta["skipped_stages"] = plan["reasons"]
+            meta["hint"] = "Dense/3DGS는 CUDA GPU 필요. recon-gpu 큐를 듣는 GPU worker가 없어 해당 단계는 건너뜀."
+
         _write_meta(meta_path, meta)
+        # 건너뛴 단계가 있으면 그 단계 목록이 key에 들어감 (GPU worker가 생기면 전체 결과를 새로 만듦)
+        _cache_result(meta, output_dir)
+        _schedule_postprocess(job_id, meta)
         return meta
 
     except Exception as e:
@@ -230,6 +980,159 @@ def recon_job(job_id: str) -> Dict[str, Any]:
         return meta
 
 
+def _abort_job(meta_path: Path, meta: Dict[str, Any], reason: str, stage: str) -> Dict[str, Any]:
+    """취소 / timeout 으로 끝난 job 기록 (reason = "cancelled" | "timed_out")"""
+    meta["status"] = reason
+    meta["aborted_stage"] = stage
+    if reason == "cancelled":
+        meta["error"] = f"Cancelled during {stage}"
+    else:
+        meta["error"] = f"Stage {stage} exceeded its time limit ({STAGE_TIMEOUTS.get(stage, 0):.0f}s)"
+    _write_meta(meta_path, meta)
+    return meta
+
+
+def _valid_artifact(entry: Optional[Dict[str, Any]], output_dir: Path) -> Optional[Path]:
+    """meta["served_artifacts"] 항목이 지금 파일과 맞으면 그 경로 (hash 이후 바뀌었으면 None)"""
+    if not entry:
+        return None
+    path = output_dir / entry["file"]
+    try:
+        stat = _artifact_stat(path)
+    except OSError:
+        return None
+    return path if all(entry.get(k) == v for k, v in stat.items()) else None
+
+
+def _schedule_postprocess(job_id: str, meta: Dict[str, Any]) -> None:
+    """완료된 결과의 서빙용 후처리 (압축 variant, LOD 타일)를 별도 RQ job으로"""
+    if not meta.get("served_artifacts") or meta.get("status") not in ("done", "done_sparse", "done_3dgs"):
+        return
+    tasks = ([precompress_job] if PRECOMPRESS else []) + ([tiles_job] if TILES else [])
+    try:
+        for task in tasks:
+            queues[meta.get("queue") or QUEUE_SMALL].enqueue(task, job_id)
+    except redis.RedisError:
+        # 부가기능: 못 넣으면 원본만 서빙
+        pass
+
+
+def precompress_job(job_id: str) -> Dict[str, Any]:
+    """
+    RQ task: 결과 파일 -> <name>.br / .zst / .gz (thread pool, encoding x 파일 병렬).
+    끝나면 meta["served_artifacts"][name]["variants"] 에 기록 -> 다운로드 route가 Accept-Encoding으로 고름.
+    압축하는 사이 결과가 바뀌었으면(재실행 등) 그 항목은 기록하지 않음.
+    """
+    job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
+    meta = _read_meta(meta_path)
+    sources = {}
+    for name, entry in (meta.get("served_artifacts") or {}).items():
+        path = _valid_artifact(entry, output_dir)
+        if path is not None:
+            sources[name] = (entry["sha256"], path)
+    if not sources:
+        return {}
+
+    built = build_variants([p for _, p in sources.values()], PRECOMPRESS_ENCODINGS, PRECOMPRESS_WORKERS)
+
+    meta = _read_meta(meta_path)
+    artifacts = meta.get("served_artifacts") or {}
+    recorded = {}
+    for name, (sha, path) in sources.items():
+        entry = artifacts.get(name)
+        if not entry or entry.get("sha256") != sha or _valid_artifact(entry, output_dir) is None:
+            continue
+        entry["variants"] = {enc: {"size": size} for enc, size in built.get(path.name, {}).items()}
+        recorded[name] = entry["variants"]
+    if recorded:
+        _write_meta(meta_path, meta)
+    return recorded
+
+
+def tiles_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    RQ task: points.ply(dense가 있으면 dense) -> output/tiles/ (manifest.json + nodes/<name>.ply).
+    원본은 memmap chunk 단위로만 읽으므로 RAM보다 큰 cloud도 됨.
+    끝나면 meta["tiles"] 기록. 그 사이 points.ply가 바뀌었으면 기록하지 않음 (다음 완료 때 다시 만듦)
+    """
+    job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
+    meta = _read_meta(meta_path)
+    entry = (meta.get("served_artifacts") or {}).get("points.ply")
+    path = _valid_artifact(entry, output_dir)
+    if path is None:
+        return None
+    if (meta.get("tiles") or {}).get("source_sha256") == entry["sha256"] and (output_dir / "tiles" / MANIFEST_NAME).exists():
+        return meta["tiles"]
+
+    # 작은 cloud는 타일 안 만듦 (header만 읽어서 판단)
+    points = len(read_ply_vertices(path))
+    if points < TILE_MIN_POINTS:
+        return None
+
+    manifest = build_tiles(
+        path, output_dir / "tiles",
+        max_leaf_points=TILE_MAX_LEAF_POINTS,
+        node_points=TILE_NODE_POINTS,
+        grid_depth=TILE_GRID_DEPTH,
+        chunk_points=TILE_CHUNK_POINTS,
+        source={"file": entry["file"], "sha256": entry["sha256"]},
+    )
+
+    meta = _read_meta(meta_path)
+    current = (meta.get("served_artifacts") or {}).get("points.ply")
+    if not current or current.get("sha256") != entry["sha256"]:
+        return None
+    meta["tiles"] = {
+        "build": manifest["build"],
+        "source_sha256": entry["sha256"],
+        "points": manifest["points"],
+        "nodes": len(manifest["nodes"]),
+        "seconds": manifest["seconds"],
+    }
+    _write_meta(meta_path, meta)
+    return meta["tiles"]
+
+
+def _submit_job(job_id: str, meta: Dict[str, Any]) -> None:
+    """
+    입력이 다 모인 job을 실행 대기열로.
+    같은 입력/설정으로 끝난 결과가 캐시에 있으면 큐에 넣지 않고 바로 완료 처리.
+    아니면 이미지 수/해상도로 비용을 추정해 recon-small / recon-large 중 하나에 넣는다.
+    recon-gpu 를 듣는 capable worker가 있으면 SfM(CPU 큐) -> dense/3DGS(recon-gpu) 체인으로.
+    """
+    job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
+
+    if _restore_cached_result(meta, output_dir):
+        _write_meta(meta_path, meta)
+        _schedule_postprocess(job_id, meta)
+        return
+
+    names = meta.get("files") or sorted(p.name for p in input_dir.iterdir() if p.is_file())
+    gpu_stages = _gpu_stages()
+    chained = bool(CHAIN_GPU and _capable_gpu_worker(gpu_stages))
+    # 크기 큐는 그 큐에서 실제로 도는 단계로 추정 (체인이면 dense/3DGS는 recon-gpu 몫)
+    stages = ["sfm"] if chained else ["sfm", "dense"] + (["3dgs"] if RUN_3DGS_SH.exists() else [])
+    meta["estimate"] = estimate_job(input_dir, names, SFM_MAX_IMAGE_SIZE, stages)
+    meta["queue"] = meta["estimate"]["queue"]
+
+    if chained:
+        # CPU worker: SfM까지 -> sparse 모델이 생기면 GPU worker가 dense/3DGS (RQ depends_on)
+        # GPU 노드는 CPU 바운드 matching에 시간을 안 쓴다
+        meta["chain"] = {"cpu": list(SFM_STAGES), "gpu": gpu_stages}
+        _write_meta(meta_path, meta)
+        cpu_job = queues[meta["queue"]].enqueue(recon_job, job_id, stages=list(SFM_STAGES), final=False)
+        gpu_job = gpu_queue.enqueue(recon_job, job_id, stages=gpu_stages, depends_on=cpu_job)
+        meta["rq_id"] = cpu_job.get_id()
+        meta["rq_id_gpu"] = gpu_job.get_id()
+        _write_meta(meta_path, meta)
+        return
+
+    _write_meta(meta_path, meta)
+    rq_job = queues[meta["queue"]].enqueue(recon_job, job_id)
+    meta["rq_id"] = rq_job.get_id()
+    _write_meta(meta_path, meta)
+
+
 # ============================================================
 # Routes
 # ============================================================
@@ -238,9 +1141,23 @@ def health():
     return {"ok": True}
 
 
+@app.post("/api/blobs/missing")
+def missing_blobs(body: Dict[str, List[str]]):
+    """
+    {"sha256": [...]} -> 서버에 없는 hash 목록.
+    클라이언트는 여기 나온 것만 files로 올리고 나머지는 blobs 필드로 참조하면 된다.
+    """
+    hashes = [h.lower() for h in body.get("sha256", [])]
+    return {"missing": [h for h in hashes if not blobs.has(h)]}
+
+
 @app.post("/api/jobs")
-async def create_job(files: List[UploadFile] = File(...)):
-    if not files or len(files) < 2:
+async def create_job(
+    files: List[UploadFile] = File(default=[]),
+    blobs_json: Optional[str] = Form(default=None, alias="blobs"),
+):
+    refs = _parse_blob_refs(blobs_json)
+    if len(files) + len(refs) < 2:
         raise HTTPException(status_code=400, detail="Need at least 2 images")
 
     job_id = uuid.uuid4().hex[:12]
@@ -249,79 +1166,495 @@ async def create_job(files: List[UploadFile] = File(...)):
     input_dir.mkdir(parents=True, exist_ok=True)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    saved = []
-    for f in files:
-        name = _safe_filename(f.filename or "image.jpg")
-        out_path = input_dir / name
-        if out_path.exists():
-            stem = out_path.stem
-            suf = out_path.suffix
-            out_path = input_dir / f"{stem}_{uuid.uuid4().hex[:6]}{suf}"
+    # 이름 충돌은 먼저 순서대로 정리하고, 실제 쓰기는 동시에 진행
+    taken: set = set()
+    targets = [_unique_input_path(input_dir, _safe_filename(f.filename or "image.jpg"), taken) for f in files]
+
+    sem = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def _save(f: UploadFile, out_path: Path) -> str:
+        async with sem:
+            return await _stream_upload(f, out_path)
 
-        data = await f.read()
-        out_path.write_bytes(data)
+    hashes = await asyncio.gather(*(_save(f, p) for f, p in zip(files, targets)))
+    saved = [p.name for p in targets]
+
+    for name, sha in refs.items():
+        out_path = _unique_input_path(input_dir, _safe_filename(name), taken)
+        blobs.link(sha, out_path)
         saved.append(out_path.name)
+        hashes.append(sha)
 
     meta = {
         "job_id": job_id,
         "status": "queued",
         "input_count": len(saved),
         "files": saved,
+        "sha256": dict(zip(saved, hashes)),
     }
-    _write_meta(meta_path, meta)
+    # 결과 캐시 복원(파일 복사)/Redis/RQ enqueue 모두 blocking -> event loop 밖에서
+    await run_in_threadpool(_submit_job, job_id, meta)
 
-    rq_job = q.enqueue(recon_job, job_id)
-    meta["rq_id"] = rq_job.get_id()
+    return {"job_id": job_id, "status": meta["status"], "input_count": len(saved)}
+
+
+# ------------------------------------------------------------
+# Resumable upload
+#   POST /api/uploads                          세션 생성 (= job 생성, status "uploading")
+#   PUT  /api/uploads/{id}/files/{name}?offset  chunk 저장 (input/에 바로 씀)
+#   GET  /api/uploads/{id}                     받은 byte 구간 조회 (재개 지점 계산용)
+#   POST /api/uploads/{id}/finalize            검증 후 job 제출
+# ------------------------------------------------------------
+@app.post("/api/uploads")
+def create_upload(body: Dict[str, Any]):
+    """
+    body: {"files": [{"name": "a.jpg", "size": 123, "sha256": "..."(선택)}, ...]}
+    반환되는 name(충돌 시 변경됨)으로 chunk를 올린다.
+    """
+    specs = body.get("files") or []
+    if len(specs) < 2:
+        raise HTTPException(status_code=400, detail="Need at least 2 images")
+
+    job_id = uuid.uuid4().hex[:12]
+    job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
+    input_dir.mkdir(parents=True, exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (job_dir / "upload").mkdir(parents=True, exist_ok=True)
+
+    taken: set = set()
+    files: Dict[str, Dict[str, Any]] = {}
+    for spec in specs:
+        try:
+            size = int(spec["size"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="each file needs an integer size")
+        if size < 0:
+            raise HTTPException(status_code=400, detail="size must be >= 0")
+        out_path = _unique_input_path(input_dir, _safe_filename(spec.get("name") or "image.jpg"), taken)
+        out_path.touch()
+        files[out_path.name] = {"size": size, "sha256": (spec.get("sha256") or "").lower() or None}
+
+    meta = {
+        "job_id": job_id,
+        "status": "uploading",
+        "input_count": len(files),
+        "files": list(files),
+        "upload": {"files": files},
+    }
     _write_meta(meta_path, meta)
 
-    return {"job_id": job_id, "status": "queued", "input_count": len(saved)}
+    return {"upload_id": job_id, "files": [{"name": n, "size": f["size"]} for n, f in files.items()]}
 
 
-@app.get("/api/jobs/{job_id}")
-def get_job(job_id: str):
+def _load_upload(upload_id: str):
+    job_dir, input_dir, output_dir, meta_path = _job_paths(upload_id)
+    meta = _read_meta(meta_path)
+    if not meta or "upload" not in meta:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return job_dir, input_dir, meta_path, meta
+
+
+@app.put("/api/uploads/{upload_id}/files/{name}")
+async def put_upload_chunk(upload_id: str, name: str, request: Request, offset: int = 0):
+    job_dir, input_dir, meta_path, meta = _load_upload(upload_id)
+    if meta.get("status") != "uploading":
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+    info = meta["upload"]["files"].get(name)
+    if info is None:
+        raise HTTPException(status_code=404, detail="File not in upload session")
+    if offset < 0 or offset > info["size"]:
+        raise HTTPException(status_code=416, detail="offset out of range")
+
+    # writer marker를 먼저 만들고 finalize claim을 확인 (finalize는 claim 후 marker를 확인)
+    # -> 둘이 겹치면 적어도 한쪽은 상대를 봄. input/<name>은 finalize 후 blob store에
+    #    hardlink 되므로 finalize 뒤에는 한 byte도 쓰면 안 됨
+    writers = _upload_writers_dir(job_dir)
+    writers.mkdir(parents=True, exist_ok=True)
+    writer = writers / uuid.uuid4().hex
+    writer.touch()
+    try:
+        # body는 스트림으로 받아 UPLOAD_CHUNK_SIZE 만큼 모이면 바로 디스크에
+        out_path = input_dir / name
+        pos = offset
+        pending: List[bytes] = []
+        pending_len = 0
+
+        async def flush() -> None:
+            nonlocal pos, pending, pending_len
+            if (job_dir / ".finalize").exists():
+                raise HTTPException(status_code=409, detail="Upload is being finalized")
+            os.utime(writer)
+            await run_in_threadpool(_write_upload_chunk, out_path, pos, pending)
+            pos += pending_len
+            pending, pending_len = [], 0
+
+        if (job_dir / ".finalize").exists():
+            raise HTTPException(status_code=409, detail="Upload is being finalized")
+        async for part in request.stream():
+            if pos + pending_len + len(part) > info["size"]:
+                raise HTTPException(status_code=416, detail="chunk exceeds declared file size")
+            pending.append(part)
+            pending_len += len(part)
+            if pending_len >= UPLOAD_CHUNK_SIZE:
+                await flush()
+        if pending:
+            await flush()
+
+        # 실제로 디스크에 쓴 뒤에만 구간 기록 -> 중간에 끊기면 그 chunk는 다시 받으면 됨
+        if pos > offset:
+            await run_in_threadpool(_record_upload_range, job_dir, name, offset, pos)
+    finally:
+        writer.unlink(missing_ok=True)
+
+    return {"name": name, "received": _read_upload_ranges(job_dir, name)}
+
+
+@app.get("/api/uploads/{upload_id}")
+def get_upload(upload_id: str):
+    job_dir, input_dir, meta_path, meta = _load_upload(upload_id)
+    return {"upload_id": upload_id, "status": meta.get("status"), "files": _upload_status(job_dir, meta)}
+
+
+def _claim_finalize(job_dir: Path) -> Optional[Path]:
+    """
+    finalize 선점: O_EXCL marker 생성 (파일시스템 수준 원자성, 프로세스/worker 여러 개여도 하나만 성공).
+    성공하면 marker 경로, 이미 누가 잡았으면 None.
+    제출까지 끝난 marker는 지우지 않음 -> 늦게 온 중복 호출이 같은 job을 두 번 제출하지 못함
+    """
+    marker = job_dir / ".finalize"
+    try:
+        fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return None
+    os.close(fd)
+    return marker
+
+
+@app.post("/api/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str):
+    job_dir, input_dir, meta_path, meta = _load_upload(upload_id)
+    if meta.get("status") != "uploading":
+        return {"job_id": upload_id, "status": meta.get("status"), "input_count": meta.get("input_count", 0)}
+
+    # 동시에 들어온 finalize 중 하나만 진행 (나머지는 409). 검증 실패로 끝나면 claim을 풀어 재시도 가능
+    claim = _claim_finalize(job_dir)
+    if claim is None:
+        raise HTTPException(status_code=409, detail="finalize already in progress")
+    try:
+        # 아직 chunk를 쓰는 PUT이 있으면 hash/hardlink 하지 않음 (그 PUT은 다음 chunk에서 claim을 보고 멈춤)
+        if _active_upload_writers(job_dir):
+            raise HTTPException(status_code=409, detail="upload still being written")
+        status = _upload_status(job_dir, meta)
+        incomplete = [n for n, st in status.items() if not st["complete"]]
+        if incomplete:
+            raise HTTPException(status_code=409, detail={"incomplete": incomplete})
+
+        hashes: Dict[str, str] = {}
+        for name, info in meta["upload"]["files"].items():
+            path = input_dir / name
+            sha = await run_in_threadpool(_hash_file, path)
+            if info.get("sha256") and info["sha256"] != sha:
+                # 깨진 파일은 다시 받도록 구간 기록 초기화
+                _upload_ranges_path(job_dir, name).unlink(missing_ok=True)
+                raise HTTPException(status_code=422, detail=f"sha256 mismatch for {name}")
+            await run_in_threadpool(blobs.adopt, path, sha)
+            hashes[name] = sha
+
+        submitted = dict(meta, status="queued", sha256=hashes)
+        try:
+            await run_in_threadpool(_submit_job, upload_id, submitted)
+        except BaseException:
+            # 제출 실패 (Redis 오류 등): 반쯤 넣은 RQ job은 빼고 디스크 meta를 업로드 상태로 되돌림
+            # -> claim이 풀리고 upload/ 구간 기록도 남아 있으니 finalize 재시도 가능
+            for rq_id in (submitted.get("rq_id"), submitted.get("rq_id_gpu")):
+                _cancel_pending_rq_job(rq_id)
+            _write_meta(meta_path, meta)
+            raise
+    except BaseException:
+        claim.unlink(missing_ok=True)
+        raise
+
+    # 제출이 끝난 뒤에만 업로드 상태 정리
+    shutil.rmtree(job_dir / "upload", ignore_errors=True)
+    meta = submitted
+
+    return {"job_id": upload_id, "status": meta["status"], "input_count": meta.get("input_count", 0)}
+
+
+def _cancel_pending_rq_job(rq_id: Optional[str]) -> None:
+    """대기 중(queued / deferred / scheduled)인 RQ job만 취소. 실행 중인 건 취소 플래그로 멈춘다"""
+    if not rq_id:
+        return
+    try:
+        job = Job.fetch(rq_id, connection=r)
+        if job.get_status() in (JobStatus.QUEUED, JobStatus.DEFERRED, JobStatus.SCHEDULED):
+            job.cancel()
+    except Exception:
+        pass
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    job 취소.
+    - 대기 중: RQ 큐에서 빼고 바로 cancelled
+    - 실행 중: 취소 플래그 -> worker가 1초 안에 COLMAP/3DGS 프로세스 그룹을 kill 하고 cancelled 기록
+    - 이미 끝난 job은 그대로
+    """
     job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
     if not meta_path.exists():
         raise HTTPException(status_code=404, detail="Job not found")
 
     meta = _read_meta(meta_path)
+    if meta.get("status") in TERMINAL_STATUSES:
+        return {"job_id": job_id, "status": meta.get("status"), "cancel_requested": False}
 
-    ply = _best_ply_path(output_dir)
-    splat = _best_splat_path(output_dir)
+    # 플래그 먼저: 큐에서 빼는 사이 worker가 집어 가도 시작 시점에 확인한다
+    job_states.request_cancel(job_id)
 
-    status = meta.get("status", "unknown")
+    # 아직 시작 안 한 RQ job은 큐에서 뺀다. 체인이면 depends_on 으로 걸린 GPU job(deferred)도 같이
+    # (CPU job이 실행 중이어도 뒤 GPU job은 미리 정리)
+    for rq_id in (meta.get("rq_id"), meta.get("rq_id_gpu")):
+        _cancel_pending_rq_job(rq_id)
 
-    return {
-        "job_id": job_id,
-        "status": status,
-        "input_count": meta.get("input_count", 0),
-        "files": meta.get("files", []),
-        "error": meta.get("error"),
-        "warning": meta.get("warning"),
-        "warning_3dgs": meta.get("warning_3dgs"),
-        "hint": meta.get("hint"),
-        "points_ply_exists": bool(ply and ply.exists()),
-        "points_ply_url": f"/api/jobs/{job_id}/points.ply" if ply and ply.exists() else None,
-        "splat_exists": bool(splat and splat.exists()),
-        "splat_url": f"/api/jobs/{job_id}/scene.splat" if splat and splat.exists() else None,
-    }
+    if meta.get("status") in ("queued", "uploading", "queued_gpu"):
+        _abort_job(meta_path, meta, "cancelled", meta["status"])
+
+    return {"job_id": job_id, "status": meta.get("status"), "cancel_requested": True}
+
+
+def _version_etag(version: int) -> str:
+    return f'W/"v{version}"'
+
+
+def _load_view(job_id: str) -> Dict[str, Any]:
+    view = job_states.get(job_id)
+    if view is not None:
+        return view
+
+    # 캐시 miss (Redis 재시작, 오래된 job 등): 디스크에서 읽고 다시 채움 (구독자에게 publish 안 함)
+    job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
+    if not meta_path.exists():
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    meta = _read_meta(meta_path)
+    view = _job_view(job_id, meta, output_dir)
+    job_states.fill(job_id, view)
+    return view
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str, request: Request, since: Optional[int] = None, wait: float = 0):
+    """
+    since=N 또는 If-None-Match(ETag)로 "N 이후 바뀐 게 있나"만 싸게 확인 가능.
+    안 바뀌었으면 304 (body 없음 -> 클라이언트도 다시 파싱할 필요 없음)
+
+    long-poll: since=N&wait=30 -> 바뀔 때까지 최대 wait초 기다렸다가 응답
+    (SSE/WebSocket을 못 쓰는 클라이언트용 fallback)
+    """
+    view = await run_in_threadpool(_load_view, job_id)
+
+    if since is not None and wait > 0 and view.get("version", 0) <= since and view.get("status") not in TERMINAL_STATUSES:
+        try:
+            async with subscribe_job(ar, job_id) as sub:
+                # 구독 후 다시 확인 (그 사이 바뀌었을 수 있음)
+                view = await run_in_threadpool(_load_view, job_id)
+                deadline = time.monotonic() + min(wait, LONG_POLL_MAX)
+                while view.get("version", 0) <= since:
+                    remaining = deadline - time.monotonic()
+                    nxt = await sub.next(remaining) if remaining > 0 else None
+                    if nxt is None:
+                        break
+                    view = nxt
+        except redis.RedisError:
+            pass
+
+    etag = _version_etag(view.get("version", 0))
+    if (since is not None and view.get("version", 0) <= since) or request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(view, headers={"ETag": etag})
+
+
+def _sse(view: Dict[str, Any]) -> str:
+    return f"id: {view.get('version', 0)}\nevent: status\ndata: {json.dumps(view, ensure_ascii=False)}\n\n"
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events_sse(job_id: str, request: Request):
+    """
+    Server-Sent Events: 현재 상태 1회 + 이후 변경마다 1회. 끝난 job이면 바로 닫힘.
+    EVENTS_HEARTBEAT초마다 comment를 보내 proxy idle timeout 방지.
+    """
+    await run_in_threadpool(_load_view, job_id)  # 404 먼저
+
+    async def stream():
+        async with subscribe_job(ar, job_id) as sub:
+            view = await run_in_threadpool(_load_view, job_id)
+            version = view.get("version", 0)
+            yield _sse(view)
+            while view.get("status") not in TERMINAL_STATUSES:
+                if await request.is_disconnected():
+                    return
+                nxt = await sub.next(EVENTS_HEARTBEAT)
+                if nxt is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if nxt.get("version", 0) <= version:
+                    continue
+                view, version = nxt, nxt.get("version", 0)
+                yield _sse(view)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/api/jobs/{job_id}/events")
+async def job_events_ws(websocket: WebSocket, job_id: str):
+    """WebSocket: SSE와 같은 내용 (JSON 메시지). 끝난 job이면 마지막 상태 보내고 close"""
+    await websocket.accept()
+    try:
+        async with subscribe_job(ar, job_id) as sub:
+            try:
+                view = await run_in_threadpool(_load_view, job_id)
+            except HTTPException:
+                await websocket.close(code=4404)
+                return
+            version = view.get("version", 0)
+            await websocket.send_json(view)
+            while view.get("status") not in TERMINAL_STATUSES:
+                nxt = await sub.next(EVENTS_HEARTBEAT)
+                if nxt is None:
+                    # 끊긴 클라이언트는 send에서 WebSocketDisconnect로 드러난다
+                    await websocket.send_json({"type": "heartbeat"})
+                    continue
+                if nxt.get("version", 0) <= version:
+                    continue
+                view, version = nxt, nxt.get("version", 0)
+                await websocket.send_json(view)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+def _weak_etag(path: Path) -> str:
+    """content hash 기록이 없거나 파일이 그 뒤에 바뀌었을 때: size/mtime 기반 (Range/If-Range에는 안 쓰임)"""
+    stat = _artifact_stat(path)
+    return f'W/"{stat["size"]:x}-{stat["mtime_ns"]:x}"'
+
+
+def _select_variant(request: Request, entry: Dict[str, Any], path: Path):
+    """Accept-Encoding에 맞는 미리 압축된 variant (encoding, 경로). 없으면 (None, 원본)"""
+    variants = {}
+    for enc, info in (entry.get("variants") or {}).items():
+        vpath = variant_path(path, enc)
+        try:
+            if vpath.stat().st_size == info.get("size"):
+                variants[enc] = vpath
+        except OSError:
+            continue
+    enc = negotiate(request.headers.get("accept-encoding"), variants)
+    return (enc, variants[enc]) if enc else (None, path)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 비교 (weak comparison, 목록 / * 지원)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _artifact_response(request: Request, name: str, path: Path, output_dir: Path, meta_path: Path) -> Response:
+    """
+    결과 파일 다운로드 공통:
+    - ETag + If-None-Match -> 304 (재방문 시 body 없음)
+    - Range / If-Range -> 206 부분 응답 (Starlette FileResponse, strong ETag일 때만 If-Range 유효)
+    - Accept-Encoding -> 미리 만든 .br/.zst/.gz 그대로 전송 (Range도 압축된 bytes 기준)
+    """
+    meta = _read_meta(meta_path)
+    entry = (meta.get("served_artifacts") or {}).get(name)
+    headers = {"Cache-Control": ARTIFACT_CACHE_CONTROL}
+    if entry and entry.get("file") == str(path.relative_to(output_dir)) and _valid_artifact(entry, output_dir):
+        # encoding마다 다른 representation -> ETag도 따로
+        encoding, path = _select_variant(request, entry, path)
+        headers["ETag"] = f'"{entry["sha256"]}-{encoding}"' if encoding else f'"{entry["sha256"]}"'
+        if entry.get("variants"):
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+    else:
+        headers["ETag"] = _weak_etag(path)
+
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type="application/octet-stream", filename=name, headers=headers)
 
 
 @app.get("/api/jobs/{job_id}/points.ply")
-def download_points_ply(job_id: str):
+def download_points_ply(job_id: str, request: Request):
     job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
     ply = _best_ply_path(output_dir)
     if not ply or not ply.exists():
         raise HTTPException(status_code=404, detail="PLY not found (job not done?)")
 
     # 통일 파일명으로 내려가게
-    return FileResponse(str(ply), media_type="application/octet-stream", filename="points.ply")
+    return _artifact_response(request, "points.ply", ply, output_dir, meta_path)
 
 
 @app.get("/api/jobs/{job_id}/scene.splat")
-def download_splat(job_id: str):
+def download_splat(job_id: str, request: Request):
     job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
     splat = _best_splat_path(output_dir)
     if not splat or not splat.exists():
         raise HTTPException(status_code=404, detail="SPLAT not found (3DGS not done?)")
 
-    return FileResponse(str(splat), media_type="application/octet-stream", filename="scene.splat")
\ No newline at end of file
+    return _artifact_response(request, "scene.splat", splat, output_dir, meta_path)
+
+
+def _current_tiles(job_id: str):
+    """지금 points.ply로 만든 타일이 있으면 (meta["tiles"], tiles 디렉토리). 없거나 예전 결과 것이면 404"""
+    job_dir, input_dir, output_dir, meta_path = _job_paths(job_id)
+    meta = _read_meta(meta_path)
+    tiles = meta.get("tiles")
+    entry = (meta.get("served_artifacts") or {}).get("points.ply")
+    tiles_dir = output_dir / "tiles"
+    if (not tiles or not entry or tiles.get("source_sha256") != entry.get("sha256")
+            or _valid_artifact(entry, output_dir) is None or not (tiles_dir / MANIFEST_NAME).exists()):
+        raise HTTPException(status_code=404, detail="Tiles not found (not built yet or cloud too small)")
+    return tiles, tiles_dir
+
+
+def _tile_response(request: Request, path: Path, etag: str, media_type: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": ARTIFACT_CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type=media_type, headers=headers)
+
+
+@app.get("/api/jobs/{job_id}/tiles")
+def get_tiles_manifest(job_id: str, request: Request):
+    """
+    octree LOD manifest: bounds, 노드별 bounds / 점 수 / spacing / children.
+    refine = REPLACE: 노드를 자식들로 바꿔 그리면 더 촘촘해짐 (leaf = 원본 점 전부)
+    """
+    tiles, tiles_dir = _current_tiles(job_id)
+    return _tile_response(request, tiles_dir / MANIFEST_NAME, f'"{tiles["build"]}"', "application/json")
+
+
+@app.get("/api/jobs/{job_id}/tiles/{node}")
+def get_tile(job_id: str, node: str, request: Request):
+    """노드 점 (binary PLY, float xyz + uchar rgb). node = r, r0, r07, ..."""
+    name = node.removesuffix(".ply")
+    if not TILE_NODE_RE.match(name):
+        raise HTTPException(status_code=404, detail="Invalid tile node")
+    tiles, tiles_dir = _current_tiles(job_id)
+    path = tiles_dir / NODES_DIR / f"{name}.ply"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Tile node not found")
+    return _tile_response(request, path, f'"{tiles["build"]}-{name}"', "application/octet-stream")
\ No newline at end of file
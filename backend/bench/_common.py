@@ -0,0 +1,119 @@
+# backend/bench/_common.py
+from __future__ import annotations
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# ============================================================
+# benchmark 공통: 시간/percentile/RSS 측정과 결과 출력
+# (bench/*.py 는 backend/ 에서 `python -m bench.<이름>` 으로 실행)
+# ============================================================
+
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    """nearest-rank percentile (samples 비어 있으면 nan)"""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[idx]
+
+
+def latency_summary(samples_s: Sequence[float]) -> Dict[str, float]:
+    """초 단위 sample -> ms 단위 n/p50/p99/max"""
+    ms = [s * 1000.0 for s in samples_s]
+    return {
+        "n": len(ms),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3) if ms else float("nan"),
+    }
+
+
+def rss_mb(pid: Optional[int] = None) -> Dict[str, float]:
+    """/proc/<pid>/status 의 현재 RSS / 최대 RSS (MB). Linux 전용, 못 읽으면 빈 dict"""
+    fields = {"VmRSS": "rss_mb", "VmHWM": "peak_rss_mb"}
+    out: Dict[str, float] = {}
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status", encoding="ascii") as fh:
+            for line in fh:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    out[fields[key]] = round(int(value.split()[0]) / 1024.0, 1)
+    except (OSError, ValueError):
+        pass
+    return out
+
+
+class RssSampler:
+    """다른 프로세스(API 서버 등)의 RSS를 interval마다 기록 (with 블록 동안)"""
+
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rss = rss_mb(self.pid).get("rss_mb")
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {}
+        return {"rss_start_mb": self.samples[0], "rss_max_mb": max(self.samples), "rss_end_mb": self.samples[-1]}
+
+
+class Timer:
+    """with Timer() as t: ...  -> t.seconds"""
+
+    def __enter__(self) -> "Timer":
+        self._start = time.perf_counter()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.seconds = time.perf_counter() - self._start
+
+
+def report(title: str, rows: List[Dict[str, Any]], as_json: bool = False, out: Optional[Path] = None) -> None:
+    """결과 표 출력 (as_json이면 한 줄 JSON). out이 있으면 JSON lines로 덧붙임"""
+    if out is not None:
+        with Path(out).open("a", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps({"bench": title, **row}, ensure_ascii=False) + "\n")
+    if as_json:
+        print(json.dumps({"bench": title, "rows": rows}, ensure_ascii=False))
+        return
+
+    print(f"== {title}")
+    cols: List[str] = []
+    for row in rows:
+        cols.extend(k for k in row if k not in cols)
+    cells = [[_fmt(row.get(c, "")) for c in cols] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(cols)]
+    print("  ".join(c.ljust(w) for c, w in zip(cols, widths)))
+    for r in cells:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
+
+
+def _fmt(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 1000 else f"{value:.0f}"
+    return str(value)
@@ -0,0 +1,204 @@
+# backend/bench/colmap_model.py
+"""
+COLMAP binary model(points3D.bin / images.bin) 읽기 시간과 메모리: memmap reader vs struct reader.
+
+합성 points3D.bin (--points, 기본 200만 점) / images.bin (--images x --obs 관측)을 만들고
+recon.colmap_model reader(memmap + 벡터 gather)와 record마다 struct.unpack 하는
+순수 Python reader(COLMAP scripts/python/read_write_model.py 방식)를 비교한다.
+--model-dir 을 주면 합성 대신 실제 sparse/<n>/ 을 읽는다.
+
+    cd backend
+    python -m bench.colmap_model --points 2000000
+    python -m bench.colmap_model --model-dir data/jobs/<id>/output/sparse/0
+
+출력: 파일 크기, 읽기 시간, 초당 점(관측) 수, 읽은 뒤 늘어난 RSS.
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import struct
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from bench._common import Timer, report, rss_mb
+from recon.colmap_model import (
+    IMAGE_HEAD_DTYPE,
+    POINT2D_DTYPE,
+    POINT3D_HEAD_DTYPE,
+    TRACK_DTYPE,
+    _csr_starts,
+    read_images,
+    read_points3D,
+)
+
+
+# ============================================================
+# 합성 모델 (벡터로 한 번에 씀)
+# ============================================================
+def _scatter(buf: np.ndarray, starts: np.ndarray, records: np.ndarray) -> None:
+    """_gather의 반대: records[i]의 bytes를 buf[starts[i]:] 에"""
+    width = records.dtype.itemsize
+    idx = starts[:, None] + np.arange(width, dtype=np.int64)
+    buf[idx] = records.view(np.uint8).reshape(len(records), width)
+
+
+def write_points3D(path: Path, n: int, n_images: int, rng: np.random.Generator) -> None:
+    lengths = rng.integers(2, 9, n).astype(np.int64)
+    sizes = POINT3D_HEAD_DTYPE.itemsize + lengths * TRACK_DTYPE.itemsize
+    starts = 8 + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    buf = np.empty(8 + int(sizes.sum()), dtype=np.uint8)
+    buf[:8] = np.frombuffer(struct.pack("<Q", n), dtype=np.uint8)
+
+    head = np.zeros(n, dtype=POINT3D_HEAD_DTYPE)
+    head["id"] = np.arange(1, n + 1)
+    head["xyz"] = rng.normal(0, 10, (n, 3))
+    head["rgb"] = rng.integers(0, 255, (n, 3))
+    head["error"] = rng.gamma(2.0, 0.5, n)
+    head["track_length"] = lengths
+    _scatter(buf, starts, head)
+
+    track = np.zeros(int(lengths.sum()), dtype=TRACK_DTYPE)
+    track["image_id"] = rng.integers(1, n_images + 1, len(track))
+    track["point2D_idx"] = rng.integers(0, 10000, len(track))
+    _scatter(buf, _csr_starts(starts + POINT3D_HEAD_DTYPE.itemsize, lengths, TRACK_DTYPE.itemsize), track)
+    buf.tofile(path)
+
+
+def write_images(path: Path, n: int, obs: int, rng: np.random.Generator) -> None:
+    # 이름 폭을 고정하면 record 크기가 관측 수로만 정해짐
+    names = [f"IMG_{i:06d}.jpg".encode("ascii") + b"\0" for i in range(n)]
+    name_len = len(names[0])
+    counts = np.full(n, obs, dtype=np.int64)
+    sizes = IMAGE_HEAD_DTYPE.itemsize + name_len + 8 + counts * POINT2D_DTYPE.itemsize
+    starts = 8 + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    buf = np.empty(8 + int(sizes.sum()), dtype=np.uint8)
+    buf[:8] = np.frombuffer(struct.pack("<Q", n), dtype=np.uint8)
+
+    head = np.zeros(n, dtype=IMAGE_HEAD_DTYPE)
+    head["id"] = np.arange(1, n + 1)
+    head["qvec"][:, 0] = 1.0
+    head["tvec"] = rng.normal(0, 1, (n, 3))
+    head["camera_id"] = 1
+    _scatter(buf, starts, head)
+    tail = np.zeros(n, dtype=[("name", f"S{name_len}"), ("count", "<u8")])
+    tail["name"] = names
+    tail["count"] = counts
+    _scatter(buf, starts + IMAGE_HEAD_DTYPE.itemsize, tail)
+
+    p2d = np.zeros(int(counts.sum()), dtype=POINT2D_DTYPE)
+    p2d["xy"] = rng.random((len(p2d), 2)) * 4000
+    p2d["point3D_id"] = rng.integers(1, 1 << 20, len(p2d))
+    _scatter(buf, _csr_starts(starts + IMAGE_HEAD_DTYPE.itemsize + name_len + 8, counts, POINT2D_DTYPE.itemsize), p2d)
+    buf.tofile(path)
+
+
+# ============================================================
+# 비교 대상: record마다 struct.unpack (read_write_model.py 방식)
+# ============================================================
+def legacy_read_points3D(path: Path) -> dict:
+    points = {}
+    with open(path, "rb") as fh:
+        (n,) = struct.unpack("<Q", fh.read(8))
+        for _ in range(n):
+            props = struct.unpack("<QdddBBBd", fh.read(43))
+            (track_length,) = struct.unpack("<Q", fh.read(8))
+            elems = struct.unpack("<" + "ii" * track_length, fh.read(8 * track_length))
+            points[props[0]] = (
+                np.array(props[1:4]), np.array(props[4:7]), props[7],
+                np.array(elems[0::2]), np.array(elems[1::2]),
+            )
+    return points
+
+
+def legacy_read_images(path: Path) -> dict:
+    images = {}
+    with open(path, "rb") as fh:
+        (n,) = struct.unpack("<Q", fh.read(8))
+        for _ in range(n):
+            props = struct.unpack("<idddddddi", fh.read(64))
+            name = b""
+            c = fh.read(1)
+            while c != b"\0":
+                name += c
+                c = fh.read(1)
+            (count,) = struct.unpack("<Q", fh.read(8))
+            x = struct.unpack("<" + "ddq" * count, fh.read(24 * count))
+            xys = np.column_stack([x[0::3], x[1::3]])
+            ids = np.array(x[2::3])
+            images[props[0]] = (np.array(props[1:5]), np.array(props[5:8]), props[8], name.decode(), xys, ids)
+    return images
+
+
+def _measure(label: str, fn, count: int, unit: str) -> dict:
+    gc.collect()
+    before = rss_mb().get("rss_mb", 0.0)
+    with Timer() as t:
+        result = fn()
+    after = rss_mb().get("rss_mb", 0.0)
+    del result
+    gc.collect()
+    return {
+        "reader": label,
+        unit: count,
+        "seconds": round(t.seconds, 3),
+        f"{unit}_per_s": round(count / t.seconds) if t.seconds > 0 else 0,
+        "rss_delta_mb": round(after - before, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--points", type=int, default=2_000_000)
+    ap.add_argument("--images", type=int, default=500)
+    ap.add_argument("--obs", type=int, default=8000, help="이미지당 points2D 수")
+    ap.add_argument("--model-dir", type=Path, default=None, help="합성 대신 실제 sparse 모델")
+    ap.add_argument("--no-legacy", action="store_true", help="struct reader 비교 생략 (느림)")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-colmap-model-"))
+    try:
+        model = args.model_dir
+        if model is None:
+            model = tmp
+            rng = np.random.default_rng(0)
+            with Timer() as t:
+                write_points3D(model / "points3D.bin", args.points, args.images, rng)
+                write_images(model / "images.bin", args.images, args.obs, rng)
+            print(f"synthetic model written in {t.seconds:.1f}s", file=sys.stderr)
+
+        p3d_path, img_path = model / "points3D.bin", model / "images.bin"
+        n_points = len(read_points3D(p3d_path))
+        images = read_images(img_path)
+        n_obs = int(images.p2d_offsets[-1])
+        del images
+
+        rows = [
+            _measure("memmap", lambda: read_points3D(p3d_path), n_points, "points"),
+            _measure("memmap+track", lambda: read_points3D(p3d_path).track, n_points, "points"),
+        ]
+        if not args.no_legacy:
+            rows.append(_measure("struct", lambda: legacy_read_points3D(p3d_path), n_points, "points"))
+        report(f"points3D.bin: {p3d_path.stat().st_size / 2**20:.0f} MB", rows, args.json, args.out)
+
+        rows = [
+            _measure("memmap", lambda: read_images(img_path), n_obs, "obs"),
+            _measure("memmap+points2D", lambda: read_images(img_path).all_points2D, n_obs, "obs"),
+        ]
+        if not args.no_legacy:
+            rows.append(_measure("struct", lambda: legacy_read_images(img_path), n_obs, "obs"))
+        report(f"images.bin: {img_path.stat().st_size / 2**20:.0f} MB", rows, args.json, args.out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
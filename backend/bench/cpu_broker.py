@@ -0,0 +1,133 @@
+# backend/bench/cpu_broker.py
+"""
+한 노드의 여러 worker가 CPU를 나눠 쓸 때 job 처리량: 코어 전부 vs CpuBroker lease.
+
+RQ worker --workers 개가 한 노드에서 동시에 job을 --rounds 번씩 돌리는 상황을 흉내 낸다.
+  all-cores  job마다 코어 전부 (변경 전: COLMAP 기본값)
+  broker     CpuBroker lease 로 받은 thread 수만 (현재)
+두 모드의 전체 시간 / job 처리량 / job당 시간을 비교한다.
+
+workload 기본값은 BLAS thread 수를 env로 정한 numpy 행렬곱 (OpenMP처럼 thread가 spin 하므로
+oversubscription 비용이 COLMAP과 비슷하게 드러남). --cmd 로 실제 명령을 줄 수도 있다:
+{threads} 는 lease 받은 thread 수, {job} 은 job 번호로 치환.
+
+    cd backend
+    python -m bench.cpu_broker --workers 3 --rounds 4
+    python -m bench.cpu_broker --workers 3 --cmd "colmap feature_extractor --database_path /tmp/db{job}.db \\
+        --image_path imgs --FeatureExtraction.num_threads {threads}"
+
+broker 모드는 REDIS_URL 의 Redis를 쓴다 (bench 전용 host key라 실제 lease와 섞이지 않음).
+"""
+from __future__ import annotations
+
+import os
+import sys
+import uuid
+import shlex
+import argparse
+import threading
+import subprocess
+from typing import List, Optional
+
+import redis
+
+from bench._common import Timer, percentile, report
+from cpubroker import CpuBroker
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+# argv: 행렬 크기, 반복 수
+WORKLOAD = """
+import sys
+import numpy as np
+n, reps = int(sys.argv[1]), int(sys.argv[2])
+a = np.random.default_rng(0).random((n, n))
+b = a.T.copy()
+for _ in range(reps):
+    a @ b
+"""
+
+THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def _run_job(args, job: int, threads: int) -> None:
+    env = dict(os.environ, **{k: str(threads) for k in THREAD_ENV})
+    if args.cmd:
+        cmd = shlex.split(args.cmd.format(threads=threads, job=job))
+    else:
+        cmd = [sys.executable, "-c", WORKLOAD, str(args.size), str(args.reps)]
+    subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def _run_mode(args, broker: Optional[CpuBroker]) -> dict:
+    cores = os.cpu_count() or 1
+    durations: List[float] = []
+    granted: List[int] = []
+    lock = threading.Lock()
+    errors: List[BaseException] = []
+
+    def worker(w: int) -> None:
+        try:
+            for r in range(args.rounds):
+                job = w * args.rounds + r
+                with Timer() as t:
+                    if broker is None:
+                        threads = cores
+                        _run_job(args, job, threads)
+                    else:
+                        with broker.lease() as threads:
+                            _run_job(args, job, threads)
+                with lock:
+                    durations.append(t.seconds)
+                    granted.append(threads)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(args.workers)]
+    with Timer() as total:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    if errors:
+        raise errors[0]
+
+    jobs = len(durations)
+    return {
+        "mode": "broker" if broker else "all-cores",
+        "workers": args.workers,
+        "jobs": jobs,
+        "threads_per_job": round(sum(granted) / jobs, 1),
+        "total_s": round(total.seconds, 2),
+        "jobs_per_min": round(jobs / total.seconds * 60, 2),
+        "mean_job_s": round(sum(durations) / jobs, 2),
+        "p99_job_s": round(percentile(durations, 99), 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--workers", type=int, default=3, help="동시에 도는 RQ worker 수")
+    ap.add_argument("--rounds", type=int, default=3, help="worker당 job 수")
+    ap.add_argument("--size", type=int, default=1024, help="기본 workload 행렬 크기")
+    ap.add_argument("--reps", type=int, default=40, help="기본 workload 행렬곱 반복 수")
+    ap.add_argument("--cmd", default=None, help="workload 명령 ({threads}, {job} 치환)")
+    ap.add_argument("--total", type=int, default=os.cpu_count() or 1, help="broker 예산 (기본: 코어 수)")
+    ap.add_argument("--mode", choices=("both", "all-cores", "broker"), default="both")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    rows = []
+    if args.mode in ("both", "all-cores"):
+        rows.append(_run_mode(args, None))
+    if args.mode in ("both", "broker"):
+        broker = CpuBroker(redis.from_url(REDIS_URL), total=args.total, slots=args.workers,
+                           host=f"bench-{uuid.uuid4().hex[:8]}")
+        rows.append(_run_mode(args, broker))
+    report(f"cpu broker: {os.cpu_count()} cores", rows, args.json, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
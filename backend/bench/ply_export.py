@@ -0,0 +1,99 @@
+# backend/bench/ply_export.py
+"""
+points3D.bin -> sparse PLY export 시간과 크기 (필터별, colmap model_converter 비교).
+
+points3D.bin -> PLY 를 recon.ply.export_sparse_ply (in-process, 필터 포함/미포함)로 재고,
+colmap 이 PATH에 있으면 colmap model_converter --output_type PLY (변경 전 convert 단계)와 비교한다.
+model_converter 는 cameras.bin / images.bin 도 필요하므로 --model-dir 로 실제 모델을 줄 때만 돈다.
+
+    cd backend
+    python -m bench.ply_export --points 2000000
+    python -m bench.ply_export --model-dir data/jobs/<id>/output/sparse/0
+
+출력: 시간, 남은 점 수, PLY 크기.
+"""
+from __future__ import annotations
+
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from bench._common import Timer, report
+from bench.colmap_model import write_points3D
+from recon.ply import export_sparse_ply
+
+# (이름, export_sparse_ply 필터 인자)
+FILTERS = [
+    ("none", {}),
+    ("error<=2,track>=3", {"max_error": 2.0, "min_track": 3}),
+    ("+bbox p1", {"max_error": 2.0, "min_track": 3, "bbox_percentile": 1.0}),
+]
+
+
+def _model_converter(model_dir: Path, out_path: Path) -> dict:
+    with Timer() as t:
+        proc = subprocess.run(
+            ["colmap", "model_converter", "--input_path", str(model_dir),
+             "--output_path", str(out_path), "--output_type", "PLY"],
+            capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        return {"exporter": "model_converter", "error": f"code={proc.returncode}"}
+    return {
+        "exporter": "model_converter",
+        "filter": "none",
+        "seconds": round(t.seconds, 3),
+        "bytes": out_path.stat().st_size,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--points", type=int, default=2_000_000)
+    ap.add_argument("--model-dir", type=Path, default=None, help="합성 대신 실제 sparse 모델")
+    ap.add_argument("--repeat", type=int, default=3, help="exporter별 반복 (최소 시간 보고)")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-ply-export-"))
+    try:
+        model = args.model_dir
+        if model is None:
+            model = tmp / "model"
+            model.mkdir()
+            write_points3D(model / "points3D.bin", args.points, 500, np.random.default_rng(0))
+
+        rows = []
+        out_path = tmp / "points.ply"
+        for name, kw in FILTERS:
+            best = None
+            for _ in range(max(1, args.repeat)):
+                with Timer() as t:
+                    stats = export_sparse_ply(model, out_path, **kw)
+                best = t.seconds if best is None else min(best, t.seconds)
+            rows.append({
+                "exporter": "export_sparse_ply",
+                "filter": name,
+                "seconds": round(best, 3),
+                "points_in": stats["points_in"],
+                "points_out": stats["points_out"],
+                "bytes": stats["bytes"],
+            })
+
+        if args.model_dir is not None and shutil.which("colmap"):
+            rows.append(_model_converter(model, tmp / "converter.ply"))
+        report(f"ply export: {rows[0]['points_in']} points", rows, args.json, args.out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
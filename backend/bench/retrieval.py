@@ -0,0 +1,178 @@
+# backend/bench/retrieval.py
+"""
+retrieval 후보 pair 생성 시간과 pair 수, exhaustive matching 대비 matching/mapper 결과.
+
+기본: 이미지 폴더(또는 --synthetic N 장의 임시 이미지)로 retrieval 단계별 시간과
+pair 수(top-k vs exhaustive n(n-1)/2)를 잰다.
+
+--colmap: feature를 한 번 뽑은 DB를 복사해 exhaustive_matcher / matches_importer(retrieval pair)를
+각각 돌리고 matching 시간과 mapper 등록 이미지 수까지 비교 (colmap 필요, 오래 걸림).
+
+    cd backend
+    python -m bench.retrieval /path/to/images --k 20 --colmap
+    python -m bench.retrieval --synthetic 2000 --k 20
+"""
+from __future__ import annotations
+
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from PIL import Image
+
+from bench._common import Timer, report
+from recon.colmap_model import read_images
+from recon.pairs import Pair, write_pair_list
+from recon.retrieval import THUMB_SIZE, global_descriptors, load_thumbnails, topk_neighbors
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png"}
+
+
+def _synthetic_images(out_dir: Path, n: int, size: int = 640) -> List[str]:
+    """매끈한 random 이미지 n장 (JPEG). retrieval 시간 측정용 (매칭 품질은 의미 없음)"""
+    rng = np.random.default_rng(0)
+    names = []
+    for i in range(n):
+        small = rng.integers(0, 255, (8, 8, 3), dtype=np.uint8)
+        img = Image.fromarray(small).resize((size, size * 3 // 4), Image.BILINEAR)
+        name = f"syn_{i:05d}.jpg"
+        img.save(out_dir / name, quality=85)
+        names.append(name)
+    return names
+
+
+def _retrieval(image_dir: Path, names: List[str], k: int) -> Dict[str, object]:
+    """retrieval_pairs와 같은 계산을 단계별로 시간 재기"""
+    with Timer() as t_load:
+        thumbs, ok = load_thumbnails([image_dir / n for n in names], THUMB_SIZE)
+    keep = np.flatnonzero(ok)
+    with Timer() as t_desc:
+        desc = global_descriptors(thumbs[keep])
+    with Timer() as t_knn:
+        nbrs = topk_neighbors(desc, min(k, len(keep) - 1))
+    pairs: Set[Pair] = set()
+    for i, row in enumerate(nbrs):
+        a = names[keep[i]]
+        for j in row:
+            b = names[keep[j]]
+            pairs.add((a, b) if a < b else (b, a))
+    return {
+        "pairs": pairs,
+        "thumbs_s": t_load.seconds,
+        "descriptors_s": t_desc.seconds,
+        "topk_s": t_knn.seconds,
+    }
+
+
+def _colmap(args: List[str]) -> float:
+    with Timer() as t:
+        proc = subprocess.run(["colmap", *args], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise SystemExit(f"colmap {args[0]} failed (code={proc.returncode}):\n{proc.stderr[-2000:]}")
+    return t.seconds
+
+
+def _registered(sparse_dir: Path) -> int:
+    """mapper 결과 중 가장 큰 모델의 등록 이미지 수"""
+    best = 0
+    for model in sparse_dir.iterdir():
+        if (model / "images.bin").exists():
+            best = max(best, len(read_images(model / "images.bin")))
+    return best
+
+
+def _colmap_compare(image_dir: Path, names: List[str], pairs: Set[Pair], work: Path) -> List[dict]:
+    base_db = work / "features.db"
+    list_path = work / "image_list.txt"
+    list_path.write_text("\n".join(names) + "\n", encoding="utf-8")
+    extract_s = _colmap([
+        "feature_extractor", "--database_path", str(base_db), "--image_path", str(image_dir),
+        "--image_list_path", str(list_path), "--ImageReader.single_camera", "1",
+    ])
+    print(f"feature_extractor: {extract_s:.1f}s (공통, 비교에서 제외)", file=sys.stderr)
+
+    rows = []
+    for kind in ("exhaustive", "retrieval"):
+        db = work / f"{kind}.db"
+        shutil.copyfile(base_db, db)
+        if kind == "exhaustive":
+            match_s = _colmap(["exhaustive_matcher", "--database_path", str(db)])
+            n_pairs = len(names) * (len(names) - 1) // 2
+        else:
+            pair_path = work / "pairs.txt"
+            write_pair_list(sorted(pairs), pair_path)
+            match_s = _colmap(["matches_importer", "--database_path", str(db),
+                               "--match_list_path", str(pair_path), "--match_type", "pairs"])
+            n_pairs = len(pairs)
+        sparse = work / f"sparse_{kind}"
+        sparse.mkdir(exist_ok=True)
+        map_s = _colmap(["mapper", "--database_path", str(db), "--image_path", str(image_dir),
+                         "--output_path", str(sparse)])
+        rows.append({
+            "matching": kind,
+            "pairs": n_pairs,
+            "match_s": round(match_s, 2),
+            "map_s": round(map_s, 2),
+            "registered": _registered(sparse),
+            "images": len(names),
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("image_dir", nargs="?", type=Path)
+    ap.add_argument("--synthetic", type=int, default=0, help="image_dir 대신 임시 이미지 N장")
+    ap.add_argument("--k", type=int, default=20)
+    ap.add_argument("--colmap", action="store_true", help="실제 matching/mapper 비교까지")
+    ap.add_argument("--work-dir", type=Path, default=None, help="colmap 비교 작업 폴더 (기본: 임시)")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    if not args.image_dir and not args.synthetic:
+        ap.error("image_dir or --synthetic N is required")
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-retrieval-"))
+    try:
+        if args.synthetic:
+            image_dir = tmp / "images"
+            image_dir.mkdir()
+            names = _synthetic_images(image_dir, args.synthetic)
+        else:
+            image_dir = args.image_dir
+            names = sorted(p.name for p in image_dir.iterdir() if p.suffix.lower() in IMAGE_EXTS)
+        n = len(names)
+        if n < 2:
+            raise SystemExit("need at least 2 images")
+
+        res = _retrieval(image_dir, names, args.k)
+        exhaustive = n * (n - 1) // 2
+        report("retrieval: candidate pairs", [{
+            "images": n,
+            "k": args.k,
+            "thumbs_s": round(res["thumbs_s"], 3),
+            "descriptors_s": round(res["descriptors_s"], 3),
+            "topk_s": round(res["topk_s"], 3),
+            "pairs": len(res["pairs"]),
+            "exhaustive_pairs": exhaustive,
+            "pair_ratio": round(len(res["pairs"]) / exhaustive, 4),
+        }], args.json, args.out)
+
+        if args.colmap:
+            work = args.work_dir or tmp / "work"
+            work.mkdir(parents=True, exist_ok=True)
+            report("retrieval: matching vs exhaustive",
+                   _colmap_compare(image_dir, names, res["pairs"], work), args.json, args.out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# backend/bench/status_poll.py
+"""
+GET /api/jobs/{id} 상태 조회 처리량: 조회 경로별(in-process) 또는 HTTP keep-alive 동시 연결.
+
+in-process (기본): 한 코어에서 상태 조회 경로별 초당 처리 수
+  disk    meta.json 읽기 + parse + artifact stat (변경 전 get_job 경로)
+  redis   Redis hash 의 view 읽기 (프로세스 내 TTL cache 없이)
+  cached  _load_view: 프로세스 내 TTL cache -> Redis -> 디스크 (현재 경로)
+임시 DATA_DIR에 가짜 job을 만들어 재고 지운다. REDIS_URL 의 Redis가 필요하다.
+
+    cd backend
+    python -m bench.status_poll --seconds 3
+
+HTTP (--url --job-id): 떠 있는 서버에 --concurrency 개 keep-alive 연결로 polling -> 요청/초.
+uvicorn --workers 1 로 띄우면 코어당 수치. 변경 전 커밋 서버와 같은 명령으로 비교.
+
+    python -m bench.status_poll --url http://127.0.0.1:8000 --job-id <id> --concurrency 16
+"""
+from __future__ import annotations
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+from pathlib import Path
+from typing import Callable, List, Optional
+from urllib.parse import urlsplit
+
+from bench._common import latency_summary, report
+
+
+def _rate(fn: Callable[[], object], seconds: float) -> dict:
+    """seconds 동안 fn을 반복 호출 -> 초당 호출 수 / 호출당 µs"""
+    fn()  # warm-up
+    n = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for _ in range(100):
+            fn()
+        n += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+    elapsed = now - start
+    return {"calls": n, "per_s": round(n / elapsed), "us_per_call": round(elapsed / n * 1e6, 2)}
+
+
+def _in_process(seconds: float) -> List[dict]:
+    import app
+    from jobstate import JobStateStore
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-status-"))
+    app.DATA_DIR = tmp
+    job_id = "bench" + time.strftime("%H%M%S")
+    job_dir, input_dir, output_dir, meta_path = app._job_paths(job_id)
+    output_dir.mkdir(parents=True)
+    (output_dir / "points.ply").write_bytes(b"ply\n")
+    meta = {
+        "job_id": job_id,
+        "status": "running",
+        "input_count": 200,
+        "files": [f"IMG_{i:04d}.jpg" for i in range(200)],
+        "progress": 0.42,
+        "stage": "match",
+    }
+    try:
+        app._write_meta(meta_path, meta)
+        uncached = JobStateStore(app.r, ttl=0)
+
+        def disk():
+            m = app._read_meta(meta_path)
+            return app._job_view(job_id, m, output_dir)
+
+        paths = [
+            ("disk", disk),
+            ("redis", lambda: uncached.get(job_id)),
+            ("cached", lambda: app._load_view(job_id)),
+        ]
+        rows = []
+        for name, fn in paths:
+            if fn() is None:
+                raise SystemExit(f"{name}: no view (is Redis at REDIS_URL reachable?)")
+            rows.append({"path": name, **_rate(fn, seconds)})
+        return rows
+    finally:
+        try:
+            app.r.delete(app.job_states._key(job_id))
+        except Exception:
+            pass
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _http(url: str, job_id: str, concurrency: int, seconds: float) -> List[dict]:
+    u = urlsplit(url)
+    samples: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    deadline = time.perf_counter() + seconds
+
+    def poll(i: int) -> None:
+        conn = http.client.HTTPConnection(u.hostname, u.port, timeout=30)
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", f"/api/jobs/{job_id}")
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status != 200:
+                    errors[i] += 1
+                samples[i].append(time.perf_counter() - t0)
+            except (OSError, http.client.HTTPException):
+                errors[i] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(u.hostname, u.port, timeout=30)
+        conn.close()
+
+    threads = [threading.Thread(target=poll, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    flat = [s for per in samples for s in per]
+    return [{
+        "concurrency": concurrency,
+        "requests": len(flat),
+        "req_per_s": round(len(flat) / elapsed),
+        **latency_summary(flat),
+        "errors": sum(errors),
+    }]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--seconds", type=float, default=3.0, help="경로별 측정 시간")
+    ap.add_argument("--url", default=None, help="HTTP 모드: 서버 주소")
+    ap.add_argument("--job-id", default=None, help="HTTP 모드: polling할 job")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    if args.url:
+        if not args.job_id:
+            ap.error("--url needs --job-id")
+        report("status poll: HTTP", _http(args.url, args.job_id, args.concurrency, args.seconds), args.json, args.out)
+    else:
+        report("status poll: in-process, 1 core", _in_process(args.seconds), args.json, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
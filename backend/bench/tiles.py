@@ -0,0 +1,108 @@
+# backend/bench/tiles.py
+"""
+큰 point cloud의 octree LOD 타일 생성 시간, 노드 수, 최대 RSS.
+
+합성 PLY(--points, 기본 2000만 점; chunk 단위로 써서 생성 자체는 메모리를 안 씀) 또는
+--ply 로 준 실제 points.ply / points_dense.ply 에 recon.tiles.build_tiles 를 돌려
+시간, 노드 수, root 노드 크기, 최대 RSS 를 잰다. --chunk-points 를 줄이면 RAM보다 큰
+cloud 상황(최대 RSS가 chunk 크기에 묶이는지)을 확인할 수 있다.
+
+    cd backend
+    python -m bench.tiles --points 20000000
+    python -m bench.tiles --ply data/jobs/<id>/output/points.ply --chunk-points 500000
+
+출력: build 시간, 초당 점 수, 노드 수(leaf), 타일 총 크기, root 크기, 최대 RSS.
+"""
+from __future__ import annotations
+
+import sys
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from bench._common import Timer, report, rss_mb
+from recon.ply import PLY_VERTEX_DTYPE, ply_header
+from recon.tiles import MANIFEST_NAME, NODES_DIR, ROOT, build_tiles
+
+
+def write_synthetic_ply(path: Path, n: int, chunk: int = 1_000_000, seed: int = 0) -> None:
+    """
+    도시 블록 비슷한 cloud: 뭉친 cluster 몇 개 + 바닥면. chunk 단위로 써서 n이 커도 메모리 일정
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-100, 100, (64, 3))
+    centers[:, 2] = rng.uniform(0, 30, 64)
+    with path.open("wb") as fh:
+        fh.write(ply_header(n))
+        for start in range(0, n, chunk):
+            m = min(chunk, n - start)
+            verts = np.empty(m, dtype=PLY_VERTEX_DTYPE)
+            ground = rng.random(m) < 0.3
+            xyz = centers[rng.integers(0, len(centers), m)] + rng.normal(0, 4, (m, 3))
+            xyz[ground] = np.column_stack([
+                rng.uniform(-120, 120, ground.sum()), rng.uniform(-120, 120, ground.sum()), np.zeros(ground.sum()),
+            ])
+            verts["x"], verts["y"], verts["z"] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+            rgb = rng.integers(0, 255, (m, 3))
+            verts["red"], verts["green"], verts["blue"] = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+            verts.tofile(fh)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--points", type=int, default=20_000_000)
+    ap.add_argument("--ply", type=Path, default=None, help="합성 대신 실제 PLY")
+    ap.add_argument("--chunk-points", type=int, default=2_000_000)
+    ap.add_argument("--max-leaf-points", type=int, default=100_000)
+    ap.add_argument("--node-points", type=int, default=50_000)
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench-tiles-"))
+    try:
+        ply = args.ply
+        if ply is None:
+            ply = tmp / "points.ply"
+            with Timer() as t:
+                write_synthetic_ply(ply, args.points)
+            print(f"synthetic PLY written in {t.seconds:.1f}s", file=sys.stderr)
+
+        rss_before = rss_mb()
+        out_dir = tmp / "tiles"
+        with Timer() as t:
+            manifest = build_tiles(
+                ply, out_dir,
+                max_leaf_points=args.max_leaf_points,
+                node_points=args.node_points,
+                chunk_points=args.chunk_points,
+            )
+        rss_after = rss_mb()
+
+        nodes = manifest["nodes"]
+        files = list((out_dir / NODES_DIR).iterdir())
+        root = out_dir / NODES_DIR / f"{ROOT}.ply"
+        report(f"tiles: {ply.stat().st_size / 2**20:.0f} MB PLY", [{
+            "points": manifest["points"],
+            "chunk_points": args.chunk_points,
+            "seconds": round(t.seconds, 2),
+            "points_per_s": round(manifest["points"] / t.seconds),
+            "nodes": len(nodes),
+            "leaves": sum(1 for n in nodes.values() if not n.get("children")),
+            "tiles_mb": round(sum(f.stat().st_size for f in files) / 2**20, 1),
+            "root_kb": round(root.stat().st_size / 1024, 1) if root.exists() else None,
+            "manifest_kb": round((out_dir / MANIFEST_NAME).stat().st_size / 1024, 1),
+            "rss_before_mb": rss_before.get("rss_mb"),
+            "peak_rss_mb": rss_after.get("peak_rss_mb"),
+        }], args.json, args.out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# backend/bench/upload.py
+"""
+POST /api/jobs 대용량 업로드 중 다른 route latency, 업로드 처리량, 서버 RSS.
+
+떠 있는 API 서버에 --size-mb 만큼의 multipart 업로드(--files 장)를 스트림으로 보내면서
+다른 route(--probe, 기본 /health)를 계속 호출해 latency를 잰다.
+--pid 를 주면 서버 프로세스 RSS도 샘플링 -> 업로드 중 RSS가 평평한지 확인.
+
+    cd backend
+    uvicorn app:app --port 8000 &
+    python -m bench.upload --url http://127.0.0.1:8000 --size-mb 1024 --pid $!
+
+출력: idle / 업로드 중 probe p50·p99·max, 업로드 MB/s, 서버 RSS 시작·최대·끝.
+업로드로 만들어진 job은 끝나면 취소한다 (--keep 이면 그대로 둠).
+변경 전 커밋에서 같은 명령을 돌리면 before/after 비교가 된다.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import http.client
+from typing import Iterator, List, Optional
+from urllib.parse import urlsplit
+
+from bench._common import RssSampler, latency_summary, report
+
+BLOCK = 1024 * 1024
+
+
+def _connect(url: str, timeout: float = 600.0) -> http.client.HTTPConnection:
+    u = urlsplit(url)
+    cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+    return cls(u.hostname, u.port, timeout=timeout)
+
+
+def _multipart(boundary: str, files: int, per_file: int) -> Iterator[bytes]:
+    """
+    files 장 x per_file bytes 의 multipart body를 BLOCK 단위로 생성 (메모리에 전체를 두지 않음).
+    chunk마다 앞 16 bytes를 (파일 번호, chunk 번호)로 바꿔서 blob dedupe에 걸리지 않게 한다
+    """
+    block = os.urandom(BLOCK)
+    for i in range(files):
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="files"; filename="bench_{i:05d}.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n"
+        ).encode("ascii")
+        sent = 0
+        chunk_no = 0
+        while sent < per_file:
+            n = min(BLOCK, per_file - sent)
+            yield (i.to_bytes(8, "little") + chunk_no.to_bytes(8, "little") + block[16:n])[:n]
+            sent += n
+            chunk_no += 1
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode("ascii")
+
+
+def _body_length(boundary: str, files: int, per_file: int) -> int:
+    head = len(
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="files"; filename="bench_{0:05d}.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    )
+    return files * (head + per_file + 2) + len(f"--{boundary}--\r\n")
+
+
+class Prober:
+    """다른 route를 keep-alive로 계속 호출하며 latency 기록"""
+
+    def __init__(self, url: str, path: str, interval: float):
+        self.url = url
+        self.path = path
+        self.interval = interval
+        self.samples: List[float] = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        conn = _connect(self.url, timeout=30)
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", self.path)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 500:
+                    self.errors += 1
+                self.samples.append(time.perf_counter() - t0)
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                conn.close()
+                conn = _connect(self.url, timeout=30)
+            self._stop.wait(self.interval)
+        conn.close()
+
+    def start(self) -> "Prober":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _upload(url: str, files: int, per_file: int) -> dict:
+    boundary = uuid.uuid4().hex
+    conn = _connect(url)
+    t0 = time.perf_counter()
+    conn.request(
+        "POST", "/api/jobs",
+        body=_multipart(boundary, files, per_file),
+        headers={
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(_body_length(boundary, files, per_file)),
+        },
+    )
+    resp = conn.getresponse()
+    payload = resp.read()
+    seconds = time.perf_counter() - t0
+    conn.close()
+    if resp.status != 200:
+        raise SystemExit(f"upload failed: HTTP {resp.status} {payload[:200]!r}")
+    return {"seconds": seconds, "job_id": json.loads(payload)["job_id"]}
+
+
+def _cancel(url: str, job_id: str) -> None:
+    conn = _connect(url, timeout=30)
+    try:
+        conn.request("POST", f"/api/jobs/{job_id}/cancel")
+        conn.getresponse().read()
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--size-mb", type=float, default=1024, help="업로드 총 크기")
+    ap.add_argument("--files", type=int, default=200)
+    ap.add_argument("--probe", default="/health", help="업로드 중 latency를 잴 route")
+    ap.add_argument("--probe-interval", type=float, default=0.02)
+    ap.add_argument("--idle", type=float, default=3.0, help="업로드 전 기준 latency 측정 시간(초)")
+    ap.add_argument("--pid", type=int, default=None, help="API 서버 pid (RSS 샘플링)")
+    ap.add_argument("--keep", action="store_true", help="만든 job을 취소하지 않음")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", default=None, help="결과를 JSON lines로 덧붙일 파일")
+    args = ap.parse_args(argv)
+
+    files = max(2, args.files)
+    per_file = max(1, int(args.size_mb * 1024 * 1024) // files)
+    total_mb = files * per_file / (1024 * 1024)
+
+    sampler = RssSampler(args.pid) if args.pid else None
+    if sampler:
+        sampler.__enter__()
+    try:
+        idle = Prober(args.url, args.probe, args.probe_interval).start()
+        time.sleep(args.idle)
+        idle.stop()
+
+        busy = Prober(args.url, args.probe, args.probe_interval).start()
+        try:
+            up = _upload(args.url, files, per_file)
+        finally:
+            busy.stop()
+    finally:
+        if sampler:
+            sampler.__exit__(None, None, None)
+
+    if not args.keep:
+        _cancel(args.url, up["job_id"])
+
+    rows = [
+        {"phase": "idle", "probe": args.probe, **latency_summary(idle.samples), "errors": idle.errors},
+        {"phase": "upload", "probe": args.probe, **latency_summary(busy.samples), "errors": busy.errors},
+    ]
+    upload_row = {
+        "files": files,
+        "total_mb": round(total_mb, 1),
+        "seconds": round(up["seconds"], 2),
+        "mb_per_s": round(total_mb / up["seconds"], 1),
+        **(sampler.summary() if sampler else {}),
+    }
+    report("upload: probe latency", rows, args.json, args.out)
+    report("upload: throughput / server RSS", [upload_row], args.json, args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
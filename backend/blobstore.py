@@ -0,0 +1,105 @@
+# backend/blobstore.py
+from __future__ import annotations
+
+import os
+import re
+import uuid
+import shutil
+from pathlib import Path
+from typing import Iterator
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """
+    SHA-256 content-addressed 저장소.
+
+    레이아웃:
+      <root>/ab/abcdef...   (blob 본체, 파일명 = sha256 hex)
+      <root>/tmp/           (업로드 중인 임시 파일)
+
+    job의 input/ 파일은 blob에 대한 hardlink 이다.
+    refcount = blob inode의 st_nlink - 1 (store 자신이 가진 link 하나 제외)
+    -> 별도 DB 없이 link 수가 곧 참조 수라서, job 디렉토리를 지우면 자연히 감소한다.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.tmp_dir = root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256
+
+    def has(self, sha256: str) -> bool:
+        return bool(_SHA256_RE.match(sha256)) and self.blob_path(sha256).exists()
+
+    def new_temp(self) -> Path:
+        return self.tmp_dir / uuid.uuid4().hex
+
+    def commit(self, tmp_path: Path, sha256: str) -> Path:
+        """
+        임시 파일을 blob으로 등록. 이미 같은 내용이 있으면 임시 파일은 버린다.
+        os.link는 대상이 있으면 실패하므로 동시 업로드에서도 blob은 하나만 남는다.
+        """
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(tmp_path, blob)
+        except FileExistsError:
+            pass
+        tmp_path.unlink(missing_ok=True)
+        return blob
+
+    def link(self, sha256: str, dest: Path) -> None:
+        """blob -> dest hardlink (다른 파일시스템이면 copy로 대체)"""
+        blob = self.blob_path(sha256)
+        if not blob.exists():
+            raise FileNotFoundError(f"blob not found: {sha256}")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob, dest)
+        except OSError:
+            shutil.copyfile(blob, dest)
+
+    def adopt(self, path: Path, sha256: str) -> None:
+        """
+        이미 job 디렉토리에 쓰여진 파일(resumable upload 등)을 store로 편입.
+        - blob이 없으면 path 자체를 blob으로 link
+        - 있으면 path를 기존 blob의 hardlink로 교체 (중복 제거)
+        """
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(path, blob)
+            return
+        except FileExistsError:
+            pass
+        except OSError:
+            # 다른 파일시스템: dedupe는 못 하지만 job 파일은 그대로 유효
+            return
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:6]}")
+        os.link(blob, tmp)
+        os.replace(tmp, path)
+
+    def refcount(self, sha256: str) -> int:
+        blob = self.blob_path(sha256)
+        if not blob.exists():
+            return 0
+        return blob.stat().st_nlink - 1
+
+    def iter_blobs(self) -> Iterator[Path]:
+        for sub in self.root.iterdir():
+            if sub.is_dir() and sub != self.tmp_dir:
+                yield from (p for p in sub.iterdir() if p.is_file())
+
+    def gc(self) -> int:
+        """참조(job hardlink)가 하나도 없는 blob 삭제. 반환: 삭제한 bytes"""
+        freed = 0
+        for blob in self.iter_blobs():
+            st = blob.stat()
+            if st.st_nlink <= 1:
+                blob.unlink(missing_ok=True)
+                freed += st.st_size
+        return freed
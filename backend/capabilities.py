@@ -0,0 +1,139 @@
+# backend/capabilities.py
+from __future__ import annotations
+
+import re
+import json
+import time
+import shutil
+import socket
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+
+# 확인하는 외부 binary
+BINARIES = ("colmap", "nvidia-smi", "ns-process-data", "ns-train", "ns-export")
+
+# 단계 -> 필요한 capability
+#   sfm  : colmap binary
+#   dense: CUDA 빌드 colmap + GPU (patch_match_stereo는 CUDA 전용)
+#   3dgs : GPU
+STAGE_NEEDS = {
+    "extract": "sfm",
+    "match": "sfm",
+    "map": "sfm",
+    "convert": "sfm",
+    "undistort": "dense",  # dense 못 돌리면 undistort도 헛수고
+    "dense": "dense",
+    "3dgs": "3dgs",
+}
+
+
+def _run(cmd: List[str], timeout: float = 30) -> str:
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        return proc.stdout + proc.stderr
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def probe() -> Dict[str, Any]:
+    """
+    이 호스트에서 돌릴 수 있는 것 조사 (수 초 걸릴 수 있음 -> 캐시해서 쓴다).
+    colmap help 헤더: "COLMAP 3.9.1 -- ... (Commit xxxx on 2024-01-19 with CUDA)"
+    """
+    binaries = {name: shutil.which(name) is not None for name in BINARIES}
+
+    colmap_version = None
+    colmap_cuda = False
+    if binaries["colmap"]:
+        text = _run(["colmap", "help"])
+        m = re.search(r"COLMAP\s+(\d[\w.\-]*)", text)
+        colmap_version = m.group(1) if m else None
+        colmap_cuda = "with CUDA" in text
+
+    gpus = 0
+    if binaries["nvidia-smi"]:
+        gpus = sum(1 for line in _run(["nvidia-smi", "-L"]).splitlines() if line.startswith("GPU "))
+
+    caps = {
+        "host": socket.gethostname(),
+        "probed_at": time.time(),
+        "binaries": binaries,
+        "colmap_version": colmap_version,
+        "colmap_cuda": colmap_cuda,
+        "cuda_gpus": gpus,
+    }
+    caps["supports"] = {
+        "sfm": binaries["colmap"],
+        "dense": binaries["colmap"] and colmap_cuda and gpus > 0,
+        "3dgs": gpus > 0,
+    }
+    return caps
+
+
+def can_run(caps: Dict[str, Any], stage: str) -> bool:
+    return bool(caps.get("supports", {}).get(STAGE_NEEDS[stage]))
+
+
+def execution_plan(caps: Dict[str, Any], stages: Iterable[str]) -> Dict[str, Any]:
+    """
+    요청 단계 -> 이 호스트에서 돌릴 것(local) / 못 돌리는 것(remote) + 이유.
+    remote는 호출 측이 capable worker로 넘기거나 건너뛴다.
+    """
+    local: List[str] = []
+    remote: List[str] = []
+    reasons: Dict[str, str] = {}
+    for stage in stages:
+        if can_run(caps, stage):
+            local.append(stage)
+        else:
+            remote.append(stage)
+            reasons[stage] = f"host {caps.get('host')} lacks '{STAGE_NEEDS[stage]}' capability"
+    return {"host": caps.get("host"), "local": local, "remote": remote, "reasons": reasons}
+
+
+class CapabilityRegistry:
+    """
+    worker별 probe 결과를 Redis에 캐시:  csrai:caps:<hostname>  (JSON, TTL)
+    - 같은 호스트의 worker/job은 probe를 다시 안 함 (프로세스 안에서도 memo)
+    - 다른 호스트의 capability 조회 -> 라우팅 판단
+    """
+
+    KEY_PREFIX = "csrai:caps:"
+
+    def __init__(self, conn: "redis.Redis", ttl: int = 24 * 3600):
+        self.conn = conn
+        self.ttl = ttl
+        self._local: Optional[Dict[str, Any]] = None
+
+    def _key(self, host: str) -> str:
+        return f"{self.KEY_PREFIX}{host}"
+
+    def local(self, refresh: bool = False) -> Dict[str, Any]:
+        """이 호스트의 capability (memo -> Redis -> probe 순)"""
+        if self._local is not None and not refresh:
+            return self._local
+        host = socket.gethostname()
+        if not refresh:
+            try:
+                raw = self.conn.get(self._key(host))
+            except redis.RedisError:
+                raw = None
+            if raw is not None:
+                self._local = json.loads(raw)
+                return self._local
+
+        self._local = probe()
+        try:
+            self.conn.set(self._key(host), json.dumps(self._local), ex=self.ttl)
+        except redis.RedisError:
+            pass
+        return self._local
+
+    def get(self, host: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.conn.get(self._key(host))
+        except redis.RedisError:
+            return None
+        return json.loads(raw) if raw is not None else None
@@ -0,0 +1,138 @@
+# backend/cpubroker.py
+from __future__ import annotations
+
+import time
+import uuid
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import redis
+
+# recon.runner.StopCheck 와 같은 모양: 중단 사유 문자열 또는 None
+StopCheck = Callable[[], Optional[str]]
+
+# lease 획득 (원자적): 만료된 lease 정리 -> 남은 thread 계산 -> 공정 몫만큼 부여
+# KEYS[1] = hash  lease_id -> threads
+# KEYS[2] = zset  lease_id -> 만료 시각
+# ARGV = now, total, want, min_threads, slots, lease_id, ttl
+_ACQUIRE_LUA = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, id in ipairs(expired) do
+  redis.call('HDEL', KEYS[1], id)
+  redis.call('ZREM', KEYS[2], id)
+end
+local used = 0
+for _, v in ipairs(redis.call('HVALS', KEYS[1])) do used = used + tonumber(v) end
+local total = tonumber(ARGV[2])
+local want = tonumber(ARGV[3])
+local min_t = tonumber(ARGV[4])
+local active = redis.call('HLEN', KEYS[1]) + 1
+local slots = math.max(tonumber(ARGV[5]), active)
+local share = math.max(min_t, math.floor(total / slots))
+local free = total - used
+if free < min_t then return 0 end
+local grant = math.min(want, free, share)
+if grant < min_t then grant = min_t end
+redis.call('HSET', KEYS[1], ARGV[6], grant)
+redis.call('ZADD', KEYS[2], tonumber(ARGV[1]) + tonumber(ARGV[7]), ARGV[6])
+return grant
+"""
+
+
+class CpuBroker:
+    """
+    노드(호스트) 단위 CPU thread 예산.
+
+    RQ worker 여러 개가 한 머신에서 돌면 COLMAP 명령마다 코어 전부를 잡아서 N배 oversubscribe.
+    -> 단계 실행 전에 lease를 받아 그 수만큼만 --*.num_threads 로 넘긴다.
+
+    - Redis hash/zset  csrai:cpu:<hostname>:{leases,expiry}  (Lua로 원자적 획득)
+    - 몫 = total / max(slots, 활성 lease 수), 남은 thread가 min_threads 미만이면 대기
+    - lease는 TTL + heartbeat: worker가 죽어도 TTL 뒤에 회수
+    - Redis가 죽어 있으면 조정 없이 total / slots 로 진행 (부가기능이 job을 막으면 안 됨)
+    """
+
+    KEY_PREFIX = "csrai:cpu:"
+
+    def __init__(
+        self,
+        conn: "redis.Redis",
+        total: int,
+        slots: int = 1,
+        min_threads: int = 1,
+        ttl: float = 60.0,
+        wait_timeout: float = 600.0,
+        host: Optional[str] = None,
+    ):
+        self.conn = conn
+        self.total = max(1, total)
+        self.slots = max(1, slots)
+        self.min_threads = max(1, min(min_threads, self.total))
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        host = host or socket.gethostname()
+        self._leases_key = f"{self.KEY_PREFIX}{host}:leases"
+        self._expiry_key = f"{self.KEY_PREFIX}{host}:expiry"
+        self._acquire = conn.register_script(_ACQUIRE_LUA)
+
+    def _try_acquire(self, lease_id: str, want: int) -> int:
+        return int(self._acquire(
+            keys=[self._leases_key, self._expiry_key],
+            args=[time.time(), self.total, want, self.min_threads, self.slots, lease_id, self.ttl],
+        ))
+
+    def _release(self, lease_id: str) -> None:
+        try:
+            pipe = self.conn.pipeline()
+            pipe.hdel(self._leases_key, lease_id)
+            pipe.zrem(self._expiry_key, lease_id)
+            pipe.execute()
+        except redis.RedisError:
+            pass
+
+    def _heartbeat(self, lease_id: str, stop: threading.Event) -> None:
+        while not stop.wait(self.ttl / 3):
+            try:
+                self.conn.zadd(self._expiry_key, {lease_id: time.time() + self.ttl}, xx=True)
+            except redis.RedisError:
+                pass
+
+    @contextmanager
+    def lease(self, want: Optional[int] = None, stop: Optional[StopCheck] = None) -> Iterator[int]:
+        """
+        with broker.lease() as threads: ...
+        want 기본 = total. 몫이 날 때까지 대기하되 wait_timeout 지나면 min_threads로 진행.
+        stop(취소/단계 timeout)이 사유를 돌려주면 대기를 그만두고 min_threads로 바로 진입
+        -> 호출한 쪽이 stop을 다시 보고 중단함
+        """
+        want = max(self.min_threads, min(want or self.total, self.total))
+        lease_id = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.2
+        try:
+            while True:
+                granted = self._try_acquire(lease_id, want)
+                if granted > 0 or time.monotonic() >= deadline or (stop and stop()):
+                    break
+                time.sleep(delay)
+                delay = min(2.0, delay * 2)
+        except redis.RedisError:
+            granted = -1
+
+        if granted < 0:
+            yield max(self.min_threads, self.total // self.slots)
+            return
+        if granted == 0:
+            yield self.min_threads
+            return
+
+        stop = threading.Event()
+        hb = threading.Thread(target=self._heartbeat, args=(lease_id, stop), daemon=True)
+        hb.start()
+        try:
+            yield granted
+        finally:
+            stop.set()
+            self._release(lease_id)
@@ -0,0 +1,120 @@
+# backend/dispatch.py
+from __future__ import annotations
+
+import os
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+from PIL import Image
+from rq import Worker
+
+from capabilities import CapabilityRegistry
+
+# 크기별 실행 큐. 작은 job이 큰 scene 뒤에서 기다리지 않도록 분리
+QUEUE_SMALL = "recon-small"
+QUEUE_LARGE = "recon-large"
+QUEUE_NAMES = (QUEUE_SMALL, QUEUE_LARGE)
+# CPU 호스트가 못 돌리는 단계(dense / 3DGS)를 넘겨받는 큐. CUDA 있는 worker만 이 큐를 듣는다
+QUEUE_GPU = "recon-gpu"
+
+# 이 이하면 small (이미지 수, SfM 해상도 기준 총 megapixel)
+SMALL_MAX_IMAGES = int(os.environ.get("SMALL_MAX_IMAGES", "30"))
+SMALL_MAX_MEGAPIXELS = float(os.environ.get("SMALL_MAX_MEGAPIXELS", "150"))
+# 같은 큐에서 도는 무거운 단계의 추가 비용 (SfM 대비 배수). dense/3DGS까지 돌면 그만큼 큰 job
+HEAVY_STAGE_WEIGHTS = os.environ.get("HEAVY_STAGE_WEIGHTS", "dense=1,3dgs=2")
+
+# worker가 큐를 고르는 가중치 "recon-gpu=8,recon-small=4,recon-large=1"
+QUEUE_WEIGHTS = os.environ.get("QUEUE_WEIGHTS", f"{QUEUE_GPU}=8,{QUEUE_SMALL}=4,{QUEUE_LARGE}=1")
+
+
+def _image_size(path: Path):
+    """헤더만 읽음 (decode 없음). 못 읽으면 None"""
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+def estimate_job(input_dir: Path, names: List[str], sfm_max_image_size: int, stages: List[str]) -> Dict[str, Any]:
+    """
+    enqueue 시점 비용 추정 -> meta["estimate"].
+    megapixels = 원본, sfm_megapixels = SfM 작업 해상도(SFM_MAX_IMAGE_SIZE 축소 반영)
+    """
+    mp = 0.0
+    sfm_mp = 0.0
+    for name in names:
+        size = _image_size(input_dir / name)
+        if size is None:
+            continue
+        w, h = size
+        mp += w * h / 1e6
+        scale = min(1.0, sfm_max_image_size / float(max(w, h))) if sfm_max_image_size > 0 else 1.0
+        sfm_mp += w * h * scale * scale / 1e6
+
+    est = {
+        "images": len(names),
+        "megapixels": round(mp, 2),
+        "sfm_megapixels": round(sfm_mp, 2),
+        "stages": list(stages),
+    }
+    est["queue"] = classify(est)
+    return est
+
+
+def classify(est: Dict[str, Any]) -> str:
+    """
+    megapixel 기준 = SfM 작업 해상도 x (1 + 같이 도는 무거운 단계 가중치 합).
+    (체인으로 dense/3DGS를 recon-gpu에 넘기면 est["stages"]에 없으므로 SfM만 계산됨)
+    """
+    heavy = _parse_weights(HEAVY_STAGE_WEIGHTS)
+    cost = est["sfm_megapixels"] * (1.0 + sum(heavy.get(s, 0.0) for s in est.get("stages", ())))
+    if est["images"] <= SMALL_MAX_IMAGES and cost <= SMALL_MAX_MEGAPIXELS:
+        return QUEUE_SMALL
+    return QUEUE_LARGE
+
+
+def _parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for part in spec.split(","):
+        name, _, w = part.strip().partition("=")
+        if name:
+            try:
+                weights[name] = max(0.0, float(w or 1))
+            except ValueError:
+                weights[name] = 1.0
+    return weights
+
+
+class WeightedQueueWorker(Worker):
+    """
+    큐 가중치 기반 dequeue 순서:  rq worker -w dispatch.WeightedQueueWorker recon-small recon-large
+    (GPU 호스트는 recon-gpu 도 같이: ... recon-gpu recon-small recon-large)
+
+    job 하나 끝날 때마다 가중치 비례 랜덤으로 큐 순서를 다시 정함 (기본 small 4 : large 1).
+    - 첫 번째 큐가 비어 있으면 다음 큐에서 바로 가져가므로 worker가 놀지 않음
+    - strict priority와 달리 small이 계속 들어와도 large가 굶지 않음
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._queue_weights = _parse_weights(QUEUE_WEIGHTS)
+        self._weighted_order()
+        # 시작할 때 한 번 capability probe -> Redis (라우팅 판단에 쓰임)
+        CapabilityRegistry(self.connection).local(refresh=True)
+
+    def _weighted_order(self) -> None:
+        remaining = list(self.queues)
+        ordered = []
+        while remaining:
+            weights = [self._queue_weights.get(q.name, 1.0) for q in remaining]
+            if sum(weights) <= 0:
+                ordered.extend(remaining)
+                break
+            pick = random.choices(range(len(remaining)), weights=weights)[0]
+            ordered.append(remaining.pop(pick))
+        self._ordered_queues = ordered
+
+    def reorder_queues(self, reference_queue) -> None:
+        self._weighted_order()
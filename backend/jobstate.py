@@ -0,0 +1,138 @@
+# backend/jobstate.py
+from __future__ import annotations
+
+import json
+import time
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+
+
+class JobStateStore:
+    """
+    GET /api/jobs/{id} 용 job 상태 저장소 (polling 경로에서 파일 I/O 제거).
+
+    - Redis hash  csrai:job:<id>  field "view" = 응답 JSON 그대로
+      worker/API가 meta.json을 쓸 때마다 같이 갱신 (artifact 존재 여부도 그때 계산)
+    - 그 앞에 프로세스 내 TTL cache (초당 polling이 몰려도 Redis 왕복도 줄임)
+
+    Redis가 죽어 있으면 get()은 None -> 호출 측이 디스크에서 읽는다.
+
+    put() 할 때마다 같은 view를 pub/sub 채널 csrai:job:<id>:events 로도 publish
+    -> SSE / WebSocket / long-poll 구독자가 polling 없이 받는다.
+    """
+
+    KEY_PREFIX = "csrai:job:"
+
+    def __init__(self, conn: "redis.Redis", ttl: float = 0.5, expire_s: int = 7 * 24 * 3600, max_local: int = 10000):
+        self.conn = conn
+        self.ttl = ttl
+        self.expire_s = expire_s
+        self.max_local = max_local
+        self._local: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.KEY_PREFIX}{job_id}"
+
+    @classmethod
+    def channel(cls, job_id: str) -> str:
+        return f"{cls.KEY_PREFIX}{job_id}:events"
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        hit = self._local.get(job_id)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+
+        try:
+            raw = self.conn.hget(self._key(job_id), "view")
+        except redis.RedisError:
+            return None
+        if raw is None:
+            return None
+        view = json.loads(raw)
+        self._remember(job_id, view, now)
+        return view
+
+    def put(self, job_id: str, view: Dict[str, Any]) -> None:
+        try:
+            raw = json.dumps(view, ensure_ascii=False)
+            pipe = self.conn.pipeline()
+            pipe.hset(self._key(job_id), mapping={"view": raw, "status": view.get("status", "")})
+            pipe.expire(self._key(job_id), self.expire_s)
+            pipe.publish(self.channel(job_id), raw)
+            pipe.execute()
+        except redis.RedisError:
+            # 상태 캐시는 부가기능: 실패해도 meta.json이 원본
+            pass
+        self._remember(job_id, view, time.monotonic())
+
+    def fill(self, job_id: str, view: Dict[str, Any]) -> None:
+        """
+        캐시 miss 때 디스크에서 읽은 view 채우기. 상태가 바뀐 게 아니므로 publish 안 함.
+        HSETNX: 그 사이 worker가 put()한 더 새 view가 있으면 덮어쓰지 않음
+        """
+        try:
+            pipe = self.conn.pipeline()
+            pipe.hsetnx(self._key(job_id), "view", json.dumps(view, ensure_ascii=False))
+            pipe.hsetnx(self._key(job_id), "status", view.get("status", ""))
+            pipe.expire(self._key(job_id), self.expire_s)
+            pipe.execute()
+        except redis.RedisError:
+            pass
+        self._remember(job_id, view, time.monotonic())
+
+    # ------------------------------------------------------------
+    # 취소 플래그: API가 세우고, worker가 실행 중 주기적으로 확인
+    # ------------------------------------------------------------
+    def request_cancel(self, job_id: str) -> None:
+        self.conn.set(f"{self._key(job_id)}:cancel", "1", ex=self.expire_s)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        try:
+            return bool(self.conn.exists(f"{self._key(job_id)}:cancel"))
+        except redis.RedisError:
+            return False
+
+    def _remember(self, job_id: str, view: Dict[str, Any], now: float) -> None:
+        with self._lock:
+            if len(self._local) >= self.max_local:
+                self._local.clear()
+            self._local[job_id] = (now + self.ttl, view)
+
+
+class JobSubscription:
+    def __init__(self, pubsub):
+        self.pubsub = pubsub
+
+    async def next(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """다음 상태 변경 view. timeout 동안 없으면 None"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            msg = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if msg is not None and msg.get("type") == "message":
+                return json.loads(msg["data"])
+
+
+@asynccontextmanager
+async def subscribe_job(aconn: "aioredis.Redis", job_id: str) -> AsyncIterator[JobSubscription]:
+    """
+    job 상태 변경 구독. 현재 상태를 읽기 *전에* 구독해야 그 사이 변경을 놓치지 않는다.
+    """
+    pubsub = aconn.pubsub()
+    channel = JobStateStore.channel(job_id)
+    await pubsub.subscribe(channel)
+    try:
+        yield JobSubscription(pubsub)
+    finally:
+        try:
+            await pubsub.unsubscribe(channel)
+        finally:
+            await pubsub.aclose()
@@ -0,0 +1,158 @@
+# backend/precompress.py
+from __future__ import annotations
+
+import gzip
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# brotli / zstandard 는 선택 의존성: 없으면 해당 encoding만 건너뜀 (gzip은 표준 라이브러리)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 1024 * 1024
+
+# Content-Encoding -> 파일 접미사. 순서 = 서버 선호도 (같은 q면 앞쪽을 고름)
+SUFFIXES = {
+    "br": ".br",
+    "zstd": ".zst",
+    "gzip": ".gz",
+}
+
+# 미리 압축이라 시간이 좀 걸려도 되지만, 수백 MB에서 brotli 11은 너무 느림
+LEVELS = {
+    "br": int(os.environ.get("PRECOMPRESS_BR_QUALITY", "6")),
+    "zstd": int(os.environ.get("PRECOMPRESS_ZSTD_LEVEL", "10")),
+    "gzip": int(os.environ.get("PRECOMPRESS_GZIP_LEVEL", "6")),
+}
+
+# 원본 대비 이보다 안 줄면 variant를 버림 (float 위주 PLY는 생각보다 덜 줄어듦)
+MIN_SAVING = float(os.environ.get("PRECOMPRESS_MIN_SAVING", "0.05"))
+
+
+def available_encodings() -> List[str]:
+    encodings = []
+    for enc in SUFFIXES:
+        if enc == "br" and brotli is None:
+            continue
+        if enc == "zstd" and zstandard is None:
+            continue
+        encodings.append(enc)
+    return encodings
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + SUFFIXES[encoding])
+
+
+def _compress_stream(src, dst, encoding: str) -> None:
+    level = LEVELS[encoding]
+    if encoding == "gzip":
+        # mtime=0: 같은 입력이면 같은 bytes
+        with gzip.GzipFile(fileobj=dst, mode="wb", compresslevel=level, mtime=0) as gz:
+            shutil.copyfileobj(src, gz, CHUNK_SIZE)
+    elif encoding == "br":
+        comp = brotli.Compressor(quality=level)
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            dst.write(comp.process(chunk))
+        dst.write(comp.finish())
+    elif encoding == "zstd":
+        zstandard.ZstdCompressor(level=level).copy_stream(src, dst, read_size=CHUNK_SIZE, write_size=CHUNK_SIZE)
+    else:
+        raise ValueError(f"unknown encoding: {encoding}")
+
+
+def compress_file(path: Path, encoding: str) -> Optional[int]:
+    """
+    path -> path + 접미사 (temp -> rename). 반환: variant 크기, 충분히 안 줄었으면 None (파일도 안 남김)
+    """
+    dst = variant_path(path, encoding)
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with path.open("rb") as src, tmp.open("wb") as out:
+            _compress_stream(src, out, encoding)
+        size = tmp.stat().st_size
+        if size > path.stat().st_size * (1.0 - MIN_SAVING):
+            tmp.unlink()
+            dst.unlink(missing_ok=True)
+            return None
+        os.replace(tmp, dst)
+        return size
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def build_variants(
+    paths: Iterable[Path],
+    encodings: Optional[Iterable[str]] = None,
+    workers: int = 0,
+) -> Dict[str, Dict[str, int]]:
+    """
+    파일 x encoding 조합을 thread pool로 압축 (zlib/brotli/zstd 모두 GIL을 놓음).
+    반환: {파일 이름: {encoding: 크기}}  (안 줄어서 버린 variant는 빠짐)
+    """
+    usable = set(available_encodings())
+    encodings = [e for e in (encodings or SUFFIXES) if e in usable]
+    tasks: List[Tuple[Path, str]] = [(Path(p), enc) for p in paths for enc in encodings]
+    result: Dict[str, Dict[str, int]] = {}
+    if not tasks:
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1)) as ex:
+        sizes = list(ex.map(lambda t: compress_file(*t), tasks))
+    for (path, enc), size in zip(tasks, sizes):
+        entry = result.setdefault(path.name, {})
+        if size is not None:
+            entry[enc] = size
+    return result
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """ "br;q=1.0, gzip;q=0.8, *;q=0.1" -> {"br": 1.0, "gzip": 0.8, "*": 0.1} """
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def negotiate(header: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """
+    클라이언트가 받는 것 중 q가 가장 높은 variant (같으면 SUFFIXES 순서).
+    받는 게 없으면 None (원본 그대로)
+    """
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for enc in SUFFIXES:
+        if enc not in available:
+            continue
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
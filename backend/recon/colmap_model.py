@@ -0,0 +1,372 @@
+# backend/recon/colmap_model.py
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# ============================================================
+# COLMAP sparse model (*.bin) reader
+#
+# 파일을 np.memmap 으로 열고:
+# - 고정 폭 record는 memmap에서 바로 structured view (복사 없음)
+# - 가변 길이 (points3D track, images points2D)는 record 시작 offset만 한 번 훑고
+#   필드는 offset 배열로 한 번에 gather -> CSR (offsets[n+1] + 평탄한 배열)
+# 모든 정수/실수는 little-endian (COLMAP이 항상 LE로 씀)
+# ============================================================
+
+# model_id -> (이름, 파라미터 수)   colmap/sensor/models.h
+CAMERA_MODELS = {
+    0: ("SIMPLE_PINHOLE", 3),
+    1: ("PINHOLE", 4),
+    2: ("SIMPLE_RADIAL", 4),
+    3: ("RADIAL", 5),
+    4: ("OPENCV", 8),
+    5: ("OPENCV_FISHEYE", 8),
+    6: ("FULL_OPENCV", 12),
+    7: ("FOV", 5),
+    8: ("SIMPLE_RADIAL_FISHEYE", 4),
+    9: ("RADIAL_FISHEYE", 5),
+    10: ("THIN_PRISM_FISHEYE", 12),
+    11: ("RAD_TAN_THIN_PRISM_FISHEYE", 16),
+}
+
+# 관측이 3D 점에 연결 안 됨 (구버전은 int64 -1 -> uint64 최대값)
+INVALID_POINT3D_ID = np.uint64(np.iinfo(np.uint64).max)
+
+# points3D.bin record 머리 (packed, 51 bytes) + track 원소
+POINT3D_HEAD_DTYPE = np.dtype([
+    ("id", "<u8"),
+    ("xyz", "<f8", 3),
+    ("rgb", "u1", 3),
+    ("error", "<f8"),
+    ("track_length", "<u8"),
+])
+TRACK_DTYPE = np.dtype([("image_id", "<u4"), ("point2D_idx", "<u4")])
+
+# images.bin: 이름 앞 고정부 (64 bytes) / points2D 원소 (24 bytes)
+IMAGE_HEAD_DTYPE = np.dtype([
+    ("id", "<u4"),
+    ("qvec", "<f8", 4),  # cam_from_world 회전 (w, x, y, z)
+    ("tvec", "<f8", 3),
+    ("camera_id", "<u4"),
+])
+POINT2D_DTYPE = np.dtype([("xy", "<f8", 2), ("point3D_id", "<u8")])
+
+_U64 = struct.Struct("<Q")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+
+
+def _open(path: Path) -> np.memmap:
+    if path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.uint8)  # mmap은 빈 파일 불가
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def _gather(buf: np.ndarray, starts: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """buf[starts[i] : starts[i]+itemsize] 들을 한 번에 모아 dtype 배열로 (벡터 연산 1회)"""
+    if len(starts) == 0:
+        return np.zeros(0, dtype=dtype)
+    idx = starts.astype(np.int64)[:, None] + np.arange(dtype.itemsize, dtype=np.int64)
+    return np.ascontiguousarray(buf[idx]).view(dtype).reshape(len(starts))
+
+
+def _csr_starts(first: np.ndarray, lengths: np.ndarray, itemsize: int) -> np.ndarray:
+    """각 record의 가변 배열 시작(first)과 길이 -> 평탄화한 모든 원소의 byte offset"""
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+    base = np.repeat(first.astype(np.int64) - offsets * itemsize, lengths.astype(np.int64))
+    return base + np.arange(total, dtype=np.int64) * itemsize
+
+
+def _csr_offsets(lengths: np.ndarray) -> np.ndarray:
+    out = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=out[1:])
+    return out
+
+
+# ============================================================
+# cameras.bin
+# ============================================================
+@dataclass
+class Camera:
+    id: int
+    model: str
+    width: int
+    height: int
+    params: np.ndarray
+
+
+def read_cameras(path: Path) -> Dict[int, Camera]:
+    buf = _open(path)
+    n = _U64.unpack_from(buf, 0)[0] if len(buf) else 0
+    off = 8
+    cams: Dict[int, Camera] = {}
+    for _ in range(n):
+        cam_id, model_id = _U32.unpack_from(buf, off)[0], _I32.unpack_from(buf, off + 4)[0]
+        width, height = struct.unpack_from("<QQ", buf, off + 8)
+        name, nparams = CAMERA_MODELS[model_id]
+        params = np.frombuffer(buf, dtype="<f8", count=nparams, offset=off + 24)
+        cams[cam_id] = Camera(cam_id, name, width, height, params)
+        off += 24 + 8 * nparams
+    return cams
+
+
+# ============================================================
+# images.bin
+# ============================================================
+@dataclass
+class Images:
+    """
+    등록된 이미지 n장. points2D는 CSR:
+      image i의 관측 = points2D[p2d_offsets[i]:p2d_offsets[i+1]]
+    points2D(i)는 memmap에서 바로 보는 view (복사 없음), all_points2D는 전체를 한 번에 모은 배열.
+    """
+
+    ids: np.ndarray
+    qvec: np.ndarray
+    tvec: np.ndarray
+    camera_ids: np.ndarray
+    names: List[str]
+    p2d_offsets: np.ndarray
+    _buf: np.ndarray = field(repr=False)
+    _p2d_starts: np.ndarray = field(repr=False)
+    _all_p2d: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def points2D(self, i: int) -> np.ndarray:
+        start = int(self._p2d_starts[i])
+        count = int(self.p2d_offsets[i + 1] - self.p2d_offsets[i])
+        return self._buf[start:start + count * POINT2D_DTYPE.itemsize].view(POINT2D_DTYPE)
+
+    @property
+    def all_points2D(self) -> np.ndarray:
+        if self._all_p2d is None:
+            lengths = np.diff(self.p2d_offsets)
+            self._all_p2d = _gather(self._buf, _csr_starts(self._p2d_starts, lengths, POINT2D_DTYPE.itemsize),
+                                    POINT2D_DTYPE)
+        return self._all_p2d
+
+    def index_of(self) -> Dict[int, int]:
+        """image_id -> 행 번호"""
+        return {int(v): i for i, v in enumerate(self.ids)}
+
+
+def read_images(path: Path) -> Images:
+    buf = _open(path)
+    n = _U64.unpack_from(buf, 0)[0] if len(buf) else 0
+    heads = np.zeros(n, dtype=np.int64)
+    p2d_starts = np.zeros(n, dtype=np.int64)
+    counts = np.zeros(n, dtype=np.int64)
+    names: List[str] = []
+
+    mv = memoryview(buf)
+    off = 8
+    for i in range(n):
+        heads[i] = off
+        name_start = off + IMAGE_HEAD_DTYPE.itemsize
+        name_end = name_start
+        # 이름: NUL 종료 문자열
+        while mv[name_end] != 0:
+            name_end += 1
+        names.append(bytes(mv[name_start:name_end]).decode("utf-8"))
+        (count,) = _U64.unpack_from(buf, name_end + 1)
+        counts[i] = count
+        p2d_starts[i] = name_end + 9
+        off = name_end + 9 + count * POINT2D_DTYPE.itemsize
+
+    head = _gather(buf, heads, IMAGE_HEAD_DTYPE)
+    return Images(
+        ids=head["id"],
+        qvec=head["qvec"],
+        tvec=head["tvec"],
+        camera_ids=head["camera_id"],
+        names=names,
+        p2d_offsets=_csr_offsets(counts),
+        _buf=buf,
+        _p2d_starts=p2d_starts,
+    )
+
+
+# ============================================================
+# points3D.bin
+# ============================================================
+@dataclass
+class Points3D:
+    """
+    n개 점 (열 단위 배열). track은 CSR:
+      점 i의 관측 = track[track_offsets[i]:track_offsets[i+1]]  (image_id, point2D_idx)
+    """
+
+    ids: np.ndarray
+    xyz: np.ndarray
+    rgb: np.ndarray
+    error: np.ndarray
+    track_offsets: np.ndarray
+    _buf: np.ndarray = field(repr=False)
+    _track_starts: np.ndarray = field(repr=False)
+    _track: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def track_length(self) -> np.ndarray:
+        return np.diff(self.track_offsets)
+
+    @property
+    def track(self) -> np.ndarray:
+        """track 원소 전체 (필요할 때 한 번 gather)"""
+        if self._track is None:
+            self._track = _gather(self._buf, _csr_starts(self._track_starts, self.track_length, TRACK_DTYPE.itemsize),
+                                  TRACK_DTYPE)
+        return self._track
+
+    def track_of(self, i: int) -> np.ndarray:
+        """점 i의 track (memmap view, 복사 없음)"""
+        start = int(self._track_starts[i])
+        count = int(self.track_offsets[i + 1] - self.track_offsets[i])
+        return self._buf[start:start + count * TRACK_DTYPE.itemsize].view(TRACK_DTYPE)
+
+
+def _scan_points3D(buf: np.ndarray, n: int) -> np.ndarray:
+    """
+    각 record 시작 offset. 길이가 앞 record의 track_length에 달려 있어서 순차 스캔뿐
+    (record당 unpack 1번, 나머지 필드는 gather에서 벡터로 읽음).
+    """
+    starts = np.empty(n, dtype=np.int64)
+    unpack = _U64.unpack_from
+    head = POINT3D_HEAD_DTYPE.itemsize
+    len_at = head - 8
+    off = 8
+    for i in range(n):
+        starts[i] = off
+        off += head + unpack(buf, off + len_at)[0] * TRACK_DTYPE.itemsize
+    return starts
+
+
+def read_points3D(path: Path) -> Points3D:
+    buf = _open(path)
+    n = _U64.unpack_from(buf, 0)[0] if len(buf) else 0
+    starts = _scan_points3D(buf, n)
+    head = _gather(buf, starts, POINT3D_HEAD_DTYPE)
+    lengths = head["track_length"].astype(np.int64)
+    return Points3D(
+        ids=head["id"],
+        xyz=head["xyz"],
+        rgb=head["rgb"],
+        error=head["error"],
+        track_offsets=_csr_offsets(lengths),
+        _buf=buf,
+        _track_starts=starts + POINT3D_HEAD_DTYPE.itemsize,
+    )
+
+
+# ============================================================
+# rigs.bin / frames.bin (COLMAP 3.12+)
+# ============================================================
+@dataclass
+class Rig:
+    id: int
+    ref_sensor: tuple  # (sensor_type, sensor_id)
+    # 나머지 sensor: (sensor_type, sensor_id) -> sensor_from_rig (qvec[4], tvec[3]) 또는 None
+    sensors: Dict[tuple, Optional[tuple]]
+
+
+def read_rigs(path: Path) -> Dict[int, Rig]:
+    buf = _open(path)
+    n = _U64.unpack_from(buf, 0)[0] if len(buf) else 0
+    off = 8
+    rigs: Dict[int, Rig] = {}
+    for _ in range(n):
+        rig_id, num_sensors = struct.unpack_from("<II", buf, off)
+        off += 8
+        ref = struct.unpack_from("<iI", buf, off)
+        off += 8
+        sensors: Dict[tuple, Optional[tuple]] = {}
+        for _ in range(max(0, num_sensors - 1)):
+            key = struct.unpack_from("<iI", buf, off)
+            has_pose = buf[off + 8]
+            off += 9
+            pose = None
+            if has_pose:
+                vals = np.frombuffer(buf, dtype="<f8", count=7, offset=off)
+                pose = (vals[:4], vals[4:])
+                off += 56
+            sensors[key] = pose
+        rigs[rig_id] = Rig(rig_id, ref, sensors)
+    return rigs
+
+
+FRAME_HEAD_DTYPE = np.dtype([
+    ("id", "<u4"),
+    ("rig_id", "<u4"),
+    ("qvec", "<f8", 4),  # rig_from_world
+    ("tvec", "<f8", 3),
+])
+FRAME_DATA_DTYPE = np.dtype([("sensor_type", "<i4"), ("sensor_id", "<u4"), ("data_id", "<u8")])
+
+
+@dataclass
+class Frames:
+    """frame의 data(sensor별 image id 등)는 CSR: data[data_offsets[i]:data_offsets[i+1]]"""
+
+    ids: np.ndarray
+    rig_ids: np.ndarray
+    qvec: np.ndarray
+    tvec: np.ndarray
+    data_offsets: np.ndarray
+    data: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def read_frames(path: Path) -> Frames:
+    buf = _open(path)
+    n = _U64.unpack_from(buf, 0)[0] if len(buf) else 0
+    heads = np.empty(n, dtype=np.int64)
+    counts = np.empty(n, dtype=np.int64)
+    off = 8
+    for i in range(n):
+        heads[i] = off
+        (count,) = _U32.unpack_from(buf, off + FRAME_HEAD_DTYPE.itemsize)
+        counts[i] = count
+        off += FRAME_HEAD_DTYPE.itemsize + 4 + count * FRAME_DATA_DTYPE.itemsize
+    head = _gather(buf, heads, FRAME_HEAD_DTYPE)
+    data = _gather(buf, _csr_starts(heads + FRAME_HEAD_DTYPE.itemsize + 4, counts, FRAME_DATA_DTYPE.itemsize),
+                   FRAME_DATA_DTYPE)
+    return Frames(head["id"], head["rig_id"], head["qvec"], head["tvec"], _csr_offsets(counts), data)
+
+
+# ============================================================
+# 모델 전체
+# ============================================================
+@dataclass
+class SparseModel:
+    cameras: Dict[int, Camera]
+    images: Images
+    points3D: Points3D
+    rigs: Optional[Dict[int, Rig]] = None  # 3.12 미만 모델에는 없음
+    frames: Optional[Frames] = None
+
+
+def read_model(model_dir: Path) -> SparseModel:
+    """sparse/<n>/ 디렉토리 -> SparseModel (rigs/frames는 있을 때만)"""
+    model_dir = Path(model_dir)
+    rigs_path, frames_path = model_dir / "rigs.bin", model_dir / "frames.bin"
+    return SparseModel(
+        cameras=read_cameras(model_dir / "cameras.bin"),
+        images=read_images(model_dir / "images.bin"),
+        points3D=read_points3D(model_dir / "points3D.bin"),
+        rigs=read_rigs(rigs_path) if rigs_path.exists() else None,
+        frames=read_frames(frames_path) if frames_path.exists() else None,
+    )
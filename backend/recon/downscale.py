@@ -0,0 +1,110 @@
+# backend/recon/downscale.py
+from __future__ import annotations
+
+import os
+import json
+import shutil
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image
+
+JPEG_QUALITY = 95
+
+# 완료 표시 <dst_dir>.downscale.json: 어떤 입력/설정으로 만든 세트인지. 같으면 다음 실행(재시도, resume)에서 재사용.
+# dst_dir 밖에 둠 (COLMAP image_path에 이미지가 아닌 파일이 섞이지 않게)
+STAMP_SUFFIX = ".downscale.json"
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _downscale_one(args: Tuple[str, str, int]) -> Tuple[str, int, int]:
+    """
+    한 장 처리 (process pool에서 실행).
+    - 이미 작으면 원본을 그대로 link (decode 안 함)
+    - JPEG은 draft()로 DCT 단계에서 1/2, 1/4, 1/8 축소 decode -> 풀사이즈 decode 회피
+    - EXIF는 유지 (COLMAP이 focal length prior로 씀)
+    """
+    src_s, dst_s, max_size = args
+    src, dst = Path(src_s), Path(dst_s)
+    if dst.exists():
+        dst.unlink()
+
+    with Image.open(src) as img:
+        w, h = img.size
+        if max(w, h) <= max_size:
+            _link_or_copy(src, dst)
+            return dst.name, w, h
+
+        scale = max_size / float(max(w, h))
+        target = (max(1, round(w * scale)), max(1, round(h * scale)))
+        exif = img.info.get("exif")
+        fmt = img.format
+
+        img.draft("RGB", target)
+        out = img.convert("RGB") if img.mode not in ("RGB", "L") else img
+        out = out.resize(target, Image.LANCZOS)
+
+        save_kw: Dict[str, Any] = {}
+        if exif:
+            save_kw["exif"] = exif
+        if fmt == "JPEG":
+            save_kw["quality"] = JPEG_QUALITY
+        out.save(dst, format=fmt or "JPEG", **save_kw)
+        return dst.name, target[0], target[1]
+
+
+def _stamp(src_dir: Path, names: List[str], max_size: int) -> Dict[str, Any]:
+    """입력 파일 (size, mtime) + 축소 설정. 원본이 바뀌거나 설정이 바뀌면 달라짐"""
+    files = {}
+    for n in names:
+        st = (src_dir / n).stat()
+        files[n] = [st.st_size, st.st_mtime_ns]
+    return {"max_size": max_size, "jpeg_quality": JPEG_QUALITY, "files": files}
+
+
+def _stamp_matches(path: Path, stamp: Dict[str, Any]) -> bool:
+    try:
+        return json.loads(path.read_text(encoding="utf-8")) == stamp
+    except (OSError, ValueError):
+        return False
+
+
+def downscale_images(
+    src_dir: Path,
+    dst_dir: Path,
+    names: List[str],
+    max_size: int,
+    workers: int = 0,
+) -> Dict[str, Any]:
+    """
+    SfM용 작업 이미지 세트 생성: src_dir/names -> dst_dir (긴 변 max_size 이하, 파일명 동일)
+    원본(src_dir)은 그대로 둔다 (texture / 3DGS 용).
+    같은 입력/설정으로 이미 만든 세트가 있으면 (STAMP_SUFFIX) 다시 만들지 않음.
+    """
+    stamp = _stamp(src_dir, names, max_size)
+    stamp_path = dst_dir.with_name(dst_dir.name + STAMP_SUFFIX)
+    if _stamp_matches(stamp_path, stamp) and all((dst_dir / n).exists() for n in names):
+        return {"count": len(names), "max_size": max_size, "reused": True}
+
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    # 중간에 죽으면 stamp가 없으니 다음에 다시 만듦
+    stamp_path.unlink(missing_ok=True)
+    jobs = [(str(src_dir / n), str(dst_dir / n), max_size) for n in names]
+    workers = workers or (os.cpu_count() or 1)
+
+    if workers <= 1 or len(jobs) <= 1:
+        for j in jobs:
+            _downscale_one(j)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            list(ex.map(_downscale_one, jobs))
+
+    stamp_path.write_text(json.dumps(stamp), encoding="utf-8")
+    return {"count": len(jobs), "max_size": max_size}
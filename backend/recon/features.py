@@ -0,0 +1,219 @@
+# backend/recon/features.py
+from __future__ import annotations
+
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from recon.runner import LineCallback, StopCheck, run_streamed
+
+# COLMAP SensorType::CAMERA (rigs / frame_data 테이블)
+_SENSOR_CAMERA = 0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    key                 TEXT     PRIMARY KEY  NOT NULL,
+    camera_model        INTEGER  NOT NULL,
+    width               INTEGER  NOT NULL,
+    height              INTEGER  NOT NULL,
+    params              BLOB,
+    prior_focal_length  INTEGER  NOT NULL,
+    kp_rows             INTEGER  NOT NULL,
+    kp_cols             INTEGER  NOT NULL,
+    kp_data             BLOB,
+    desc_rows           INTEGER  NOT NULL,
+    desc_cols           INTEGER  NOT NULL,
+    desc_data           BLOB
+)
+"""
+
+
+def settings_hash(settings: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _has_table(con: sqlite3.Connection, name: str) -> bool:
+    row = con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone()
+    return row is not None
+
+
+class FeatureCache:
+    """
+    이미지 content hash + 추출 설정 -> SIFT keypoints/descriptors.
+
+    colmap.db의 keypoints / descriptors 테이블과 같은 (rows, cols, data) 형태로 보관하므로
+    job DB로 옮길 때 디코딩 없이 row를 그대로 INSERT 한다.
+    카메라 row도 같이 저장 (전부 cache hit이라 feature_extractor를 안 돌리는 경우용).
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # 여러 RQ worker가 같이 씀
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    @staticmethod
+    def key(sha256: str, settings: Dict[str, Any]) -> str:
+        return f"{sha256}:{settings_hash(settings)}"
+
+    def lookup(self, keys: List[str]) -> Dict[str, tuple]:
+        found: Dict[str, tuple] = {}
+        with self._connect() as con:
+            for k in keys:
+                row = con.execute("SELECT * FROM features WHERE key=?", (k,)).fetchone()
+                if row is not None:
+                    found[k] = row
+        return found
+
+    def import_into(self, job_db: Path, rows: Dict[str, tuple]) -> int:
+        """
+        캐시 row들을 job colmap.db에 image/keypoints/descriptors로 추가.
+        rows: {image 이름: features row}
+        single_camera 파이프라인이므로 DB에 카메라가 있으면 그걸 공유, 없으면 캐시된 카메라를 만든다.
+        """
+        con = sqlite3.connect(str(job_db))
+        try:
+            with con:
+                has_rigs = _has_table(con, "rigs") and _has_table(con, "frames")
+                cam = con.execute("SELECT camera_id FROM cameras ORDER BY camera_id LIMIT 1").fetchone()
+                camera_id: Optional[int] = cam[0] if cam else None
+
+                n = 0
+                for name, row in rows.items():
+                    (_, model, width, height, params, prior_focal,
+                     kp_rows, kp_cols, kp_data, desc_rows, desc_cols, desc_data) = row
+                    if con.execute("SELECT 1 FROM images WHERE name=?", (name,)).fetchone():
+                        continue
+                    if camera_id is None:
+                        cur = con.execute(
+                            "INSERT INTO cameras(model, width, height, params, prior_focal_length) VALUES (?,?,?,?,?)",
+                            (model, width, height, params, prior_focal),
+                        )
+                        camera_id = cur.lastrowid
+
+                    image_id = con.execute(
+                        "INSERT INTO images(name, camera_id) VALUES (?,?)", (name, camera_id)
+                    ).lastrowid
+                    con.execute(
+                        "INSERT INTO keypoints(image_id, rows, cols, data) VALUES (?,?,?,?)",
+                        (image_id, kp_rows, kp_cols, kp_data),
+                    )
+                    con.execute(
+                        "INSERT INTO descriptors(image_id, rows, cols, data) VALUES (?,?,?,?)",
+                        (image_id, desc_rows, desc_cols, desc_data),
+                    )
+
+                    # COLMAP 3.12+: image마다 rig/frame 등록이 있어야 mapper가 읽는다
+                    if has_rigs:
+                        rig = con.execute(
+                            "SELECT rig_id FROM rigs WHERE ref_sensor_id=? AND ref_sensor_type=?",
+                            (camera_id, _SENSOR_CAMERA),
+                        ).fetchone()
+                        if rig is None:
+                            rig_id = con.execute(
+                                "INSERT INTO rigs(ref_sensor_id, ref_sensor_type) VALUES (?,?)",
+                                (camera_id, _SENSOR_CAMERA),
+                            ).lastrowid
+                        else:
+                            rig_id = rig[0]
+                        frame_id = con.execute("INSERT INTO frames(rig_id) VALUES (?)", (rig_id,)).lastrowid
+                        con.execute(
+                            "INSERT INTO frame_data(frame_id, data_id, sensor_id, sensor_type) VALUES (?,?,?,?)",
+                            (frame_id, image_id, camera_id, _SENSOR_CAMERA),
+                        )
+                    n += 1
+                return n
+        finally:
+            con.close()
+
+    def store_from(self, job_db: Path, keys: Dict[str, str]) -> int:
+        """
+        job colmap.db에서 새로 추출된 feature를 캐시에 저장.
+        keys: {image 이름: 캐시 key}
+        """
+        src = sqlite3.connect(str(job_db))
+        try:
+            rows = []
+            for name, k in keys.items():
+                row = src.execute(
+                    """
+                    SELECT c.model, c.width, c.height, c.params, c.prior_focal_length,
+                           k.rows, k.cols, k.data, d.rows, d.cols, d.data
+                    FROM images i
+                    JOIN cameras c ON c.camera_id = i.camera_id
+                    JOIN keypoints k ON k.image_id = i.image_id
+                    JOIN descriptors d ON d.image_id = i.image_id
+                    WHERE i.name = ?
+                    """,
+                    (name,),
+                ).fetchone()
+                if row is not None:
+                    rows.append((k,) + tuple(row))
+        finally:
+            src.close()
+
+        with self._connect() as con:
+            con.executemany("INSERT OR IGNORE INTO features VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+        return len(rows)
+
+
+def extract_with_cache(
+    cache: FeatureCache,
+    db_path: Path,
+    image_dir: Path,
+    images: Dict[str, str],
+    settings: Dict[str, Any],
+    extra_args: Optional[List[str]] = None,
+    log_dir: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    on_line: Optional[LineCallback] = None,
+    stop: Optional[StopCheck] = None,
+) -> Dict[str, Any]:
+    """
+    feature_extractor 대체:
+    1) 캐시에 없는 이미지만 image list로 colmap feature_extractor
+    2) 캐시된 이미지는 row를 job DB로 bulk import
+    3) 새로 뽑은 feature는 캐시에 저장
+
+    images: {image 이름: sha256}
+    extra_args: feature_extractor에 덧붙일 옵션 (thread 수 등, 캐시 key에는 영향 없음)
+    log_dir/env/on_line/stop: run_streamed로 그대로 (단계 로그, 진행률, 취소/단계 timeout 시 process group kill)
+    반환: {"cached": n, "extracted": n, "proc": StreamedResult}  (proc.aborted면 중단된 것)
+    """
+    log_dir = log_dir or db_path.parent / "logs"
+    keys = {name: FeatureCache.key(sha, settings) for name, sha in images.items()}
+    hits = cache.lookup(list(keys.values()))
+    missing = [name for name, k in keys.items() if k not in hits]
+
+    if db_path.exists():
+        db_path.unlink()
+
+    if missing:
+        list_path = db_path.parent / "image_list.txt"
+        list_path.write_text("\n".join(missing) + "\n", encoding="utf-8")
+        cmd = [
+            "colmap", "feature_extractor",
+            "--database_path", str(db_path),
+            "--image_path", str(image_dir),
+            "--image_list_path", str(list_path),
+            "--ImageReader.single_camera", str(settings.get("single_camera", 1)),
+            *(extra_args or []),
+        ]
+        name = "colmap-extract"
+    else:
+        cmd = ["colmap", "database_creator", "--database_path", str(db_path)]
+        name = "colmap-database_creator"
+    proc = run_streamed(cmd, log_dir, name, env=env, on_line=on_line, stop=stop)
+    if proc.aborted or proc.returncode != 0:
+        return {"cached": 0, "extracted": 0, "proc": proc}
+
+    cached = cache.import_into(db_path, {name: hits[keys[name]] for name in keys if keys[name] in hits})
+    extracted = cache.store_from(db_path, {name: keys[name] for name in missing})
+    return {"cached": cached, "extracted": extracted, "proc": proc}
@@ -0,0 +1,204 @@
+# backend/recon/pairs.py
+from __future__ import annotations
+
+import re
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from PIL import Image
+
+from recon.retrieval import retrieval_pairs
+
+# EXIF tag ids
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+_DATETIME_ORIGINAL = 36867
+_SUBSEC_ORIGINAL = 37521
+
+# 폰 카메라 파일명: 20260210_225851.jpg
+_FILENAME_TS_RE = re.compile(r"(\d{8})[_-](\d{6})")
+
+_EARTH_RADIUS_M = 6371000.0
+
+Pair = Tuple[str, str]
+
+
+class ImageMeta:
+    __slots__ = ("name", "time", "lat", "lon")
+
+    def __init__(self, name: str, time: Optional[float] = None, lat: Optional[float] = None, lon: Optional[float] = None):
+        self.name = name
+        self.time = time
+        self.lat = lat
+        self.lon = lon
+
+    @property
+    def has_gps(self) -> bool:
+        return self.lat is not None and self.lon is not None
+
+
+def _dms_to_deg(dms, ref) -> Optional[float]:
+    try:
+        d, m, s = (float(x) for x in dms)
+    except (TypeError, ValueError):
+        return None
+    deg = d + m / 60.0 + s / 3600.0
+    return -deg if ref in ("S", "W") else deg
+
+
+def _time_from_name(name: str) -> Optional[float]:
+    m = _FILENAME_TS_RE.search(name)
+    if not m:
+        return None
+    try:
+        return datetime.strptime(m.group(1) + m.group(2), "%Y%m%d%H%M%S").timestamp()
+    except ValueError:
+        return None
+
+
+def read_image_meta(path: Path) -> ImageMeta:
+    """
+    EXIF 촬영 시각(+subsec) / GPS 읽기 (헤더만 파싱, 디코딩 없음).
+    EXIF 시각이 없으면 파일명 타임스탬프로 대체.
+    """
+    meta = ImageMeta(path.name)
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            sub = exif.get_ifd(_EXIF_IFD)
+            dt = sub.get(_DATETIME_ORIGINAL)
+            if dt:
+                t = datetime.strptime(str(dt).strip(), "%Y:%m:%d %H:%M:%S").timestamp()
+                subsec = str(sub.get(_SUBSEC_ORIGINAL) or "").strip()
+                if subsec.isdigit():
+                    t += float(f"0.{subsec}")
+                meta.time = t
+            gps = exif.get_ifd(_GPS_IFD)
+            if gps and 2 in gps and 4 in gps:
+                meta.lat = _dms_to_deg(gps[2], gps.get(1))
+                meta.lon = _dms_to_deg(gps[4], gps.get(3))
+    except (OSError, ValueError, SyntaxError):
+        pass
+
+    if meta.time is None:
+        meta.time = _time_from_name(path.name)
+    return meta
+
+
+def _ordered(a: str, b: str) -> Pair:
+    return (a, b) if a < b else (b, a)
+
+
+def time_window_pairs(metas: List[ImageMeta], window: int) -> Set[Pair]:
+    """촬영 순서로 정렬 후 각 이미지를 다음 window장과 pair (시각 없는 이미지는 이름순으로 뒤에)"""
+    order = sorted(metas, key=lambda m: (m.time is None, m.time or 0.0, m.name))
+    pairs: Set[Pair] = set()
+    for i, a in enumerate(order):
+        for b in order[i + 1:i + 1 + window]:
+            pairs.add(_ordered(a.name, b.name))
+    return pairs
+
+
+def gps_pairs(metas: List[ImageMeta], radius_m: float, k: int) -> Set[Pair]:
+    """
+    GPS 반경 radius_m 안의 이미지끼리 pair (이미지당 가까운 k개까지).
+    radius 크기 격자에 bucket -> 주변 9칸만 비교해서 O(n) 근처.
+    """
+    pts = []
+    for m in metas:
+        if not m.has_gps:
+            continue
+        # 작은 영역이므로 equirectangular 근사로 충분
+        x = math.radians(m.lon) * _EARTH_RADIUS_M * math.cos(math.radians(m.lat))
+        y = math.radians(m.lat) * _EARTH_RADIUS_M
+        pts.append((m.name, x, y))
+
+    grid: Dict[Tuple[int, int], List[Tuple[str, float, float]]] = {}
+    for p in pts:
+        grid.setdefault((int(p[1] // radius_m), int(p[2] // radius_m)), []).append(p)
+
+    pairs: Set[Pair] = set()
+    for name, x, y in pts:
+        cx, cy = int(x // radius_m), int(y // radius_m)
+        cands = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other, ox, oy in grid.get((cx + dx, cy + dy), ()):
+                    if other == name:
+                        continue
+                    d = math.hypot(ox - x, oy - y)
+                    if d <= radius_m:
+                        cands.append((d, other))
+        for _, other in sorted(cands)[:k]:
+            pairs.add(_ordered(name, other))
+    return pairs
+
+
+class MatchPlan:
+    """
+    kind:
+      "exhaustive"  - 이미지 수가 적으면 그냥 전부 (가장 robust)
+      "pairs"       - pairs를 matches_importer로
+      "vocab_tree"  - 메타데이터 없음 + vocab tree 있음
+      "sequential"  - 메타데이터도 없고 썸네일 retrieval도 실패: 파일명 순서 기준 sequential_matcher
+    """
+
+    def __init__(self, kind: str, pairs: Optional[List[Pair]] = None, reason: str = ""):
+        self.kind = kind
+        self.pairs = pairs or []
+        self.reason = reason
+
+
+def plan_matching(
+    image_dir: Path,
+    names: List[str],
+    exhaustive_max: int = 20,
+    time_window: int = 10,
+    gps_radius_m: float = 30.0,
+    gps_k: int = 10,
+    min_coverage: float = 0.5,
+    vocab_tree_path: Optional[str] = None,
+    retrieval_k: int = 20,
+) -> MatchPlan:
+    n = len(names)
+    if n <= exhaustive_max:
+        return MatchPlan("exhaustive", reason=f"{n} images <= {exhaustive_max}")
+
+    metas = [read_image_meta(image_dir / name) for name in names]
+    with_time = sum(1 for m in metas if m.time is not None)
+    with_gps = sum(1 for m in metas if m.has_gps)
+
+    pairs: Set[Pair] = set()
+    sources = []
+    if with_time >= min_coverage * n:
+        pairs |= time_window_pairs(metas, time_window)
+        sources.append(f"time(window={time_window}, {with_time}/{n})")
+    if with_gps >= min_coverage * n:
+        pairs |= gps_pairs(metas, gps_radius_m, gps_k)
+        sources.append(f"gps(r={gps_radius_m}m, k={gps_k}, {with_gps}/{n})")
+
+    if pairs:
+        # GPS 없는 이미지 / 반경 안에 이웃이 없는 이미지는 pair가 하나도 없음 -> 등록 자체가 안 됨.
+        # 그런 이미지만 촬영(없으면 이름) 순서 앞뒤 time_window장과 묶어준다
+        paired = {name for pair in pairs for name in pair}
+        unpaired = {m.name for m in metas if m.name not in paired}
+        if unpaired:
+            pairs |= {p for p in time_window_pairs(metas, time_window) if p[0] in unpaired or p[1] in unpaired}
+            sources.append(f"fallback(window={time_window}, {len(unpaired)} unpaired)")
+        return MatchPlan("pairs", sorted(pairs), reason=" + ".join(sources))
+
+    if vocab_tree_path:
+        return MatchPlan("vocab_tree", reason="no capture metadata; vocab tree available")
+    if retrieval_k > 0:
+        # 메타데이터 없는 unordered capture: 썸네일 전역 descriptor로 이미지당 top-k
+        pairs = retrieval_pairs(image_dir, names, retrieval_k)
+        if pairs:
+            return MatchPlan("pairs", sorted(pairs), reason=f"no capture metadata; retrieval(k={retrieval_k})")
+    return MatchPlan("sequential", reason="no capture metadata")
+
+
+def write_pair_list(pairs: List[Pair], path: Path) -> None:
+    """matches_importer --match_type pairs 형식: 한 줄에 "이름1 이름2" """
+    path.write_text("".join(f"{a} {b}\n" for a, b in pairs), encoding="utf-8")
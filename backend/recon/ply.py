@@ -0,0 +1,155 @@
+# backend/recon/ply.py
+from __future__ import annotations
+
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from recon.colmap_model import Points3D, read_points3D
+
+# colmap model_converter --output_type PLY 와 같은 vertex 형식 (뷰어 호환 유지)
+PLY_VERTEX_DTYPE = np.dtype([
+    ("x", "<f4"), ("y", "<f4"), ("z", "<f4"),
+    ("red", "u1"), ("green", "u1"), ("blue", "u1"),
+])
+
+
+# PLY scalar type -> numpy (little endian)
+_PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "<i2", "int16": "<i2", "ushort": "<u2", "uint16": "<u2",
+    "int": "<i4", "int32": "<i4", "uint": "<u4", "uint32": "<u4",
+    "float": "<f4", "float32": "<f4", "double": "<f8", "float64": "<f8",
+}
+
+
+def ply_header(n: int) -> bytes:
+    return (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {n}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        "property uchar red\nproperty uchar green\nproperty uchar blue\n"
+        "end_header\n"
+    ).encode("ascii")
+
+
+def read_ply_vertices(path: Path) -> np.ndarray:
+    """
+    binary little-endian PLY의 vertex element -> np.memmap (structured, 파일을 메모리에 올리지 않음).
+    model_converter / stereo_fusion(x,y,z,nx,ny,nz,red,green,blue) / write_points_ply 출력 모두 읽음.
+    vertex가 첫 element가 아니거나 list property가 있으면 ValueError.
+    """
+    path = Path(path)
+    with path.open("rb") as fh:
+        if fh.readline().strip() != b"ply":
+            raise ValueError(f"{path}: not a PLY file")
+        fmt = None
+        count = None
+        fields = []
+        in_vertex = False
+        while True:
+            line = fh.readline()
+            if not line:
+                raise ValueError(f"{path}: truncated PLY header")
+            parts = line.decode("ascii", "replace").split()
+            if not parts or parts[0] in ("comment", "obj_info"):
+                continue
+            if parts[0] == "end_header":
+                break
+            if parts[0] == "format":
+                fmt = parts[1]
+            elif parts[0] == "element":
+                # vertex 데이터가 header 바로 뒤에 있어야 memmap offset이 맞음 (뒤 element는 무시)
+                if count is None and parts[1] != "vertex":
+                    raise ValueError(f"{path}: vertex must be the first element")
+                in_vertex = count is None
+                if in_vertex:
+                    count = int(parts[2])
+            elif parts[0] == "property" and in_vertex:
+                if parts[1] == "list" or parts[1] not in _PLY_TYPES:
+                    raise ValueError(f"{path}: unsupported vertex property {' '.join(parts[1:])}")
+                fields.append((parts[2], _PLY_TYPES[parts[1]]))
+        offset = fh.tell()
+
+    if fmt != "binary_little_endian" or count is None:
+        raise ValueError(f"{path}: only binary_little_endian PLY with a vertex element is supported")
+    dtype = np.dtype(fields)
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+
+def write_points_ply(path: Path, xyz: np.ndarray, rgb: np.ndarray) -> int:
+    """binary little-endian PLY 한 번에 쓰기 (temp -> rename). 반환: 파일 크기"""
+    n = len(xyz)
+    verts = np.empty(n, dtype=PLY_VERTEX_DTYPE)
+    verts["x"], verts["y"], verts["z"] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    verts["red"], verts["green"], verts["blue"] = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+
+    header = ply_header(n)
+
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with tmp.open("wb") as fh:
+            fh.write(header)
+            verts.tofile(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return len(header) + verts.nbytes
+
+
+def point_filter(
+    points: Points3D,
+    max_error: float = 0.0,
+    min_track: int = 0,
+    bbox: Optional[Sequence[Sequence[float]]] = None,
+    bbox_percentile: float = 0.0,
+    bbox_margin: float = 0.1,
+) -> np.ndarray:
+    """
+    남길 점 mask.
+    - max_error: 평균 reprojection error(px) 상한 (0 = 끔)
+    - min_track: 최소 관측 이미지 수 (0 = 끔)
+    - bbox: [[xmin,ymin,zmin],[xmax,ymax,zmax]] 명시 상자
+    - bbox_percentile: p면 축별 [p, 100-p] percentile 상자를 margin 비율만큼 넓혀서 그 밖은 버림
+      (멀리 튄 outlier 제거 -> 뷰어 카메라 framing도 정상)
+    """
+    keep = np.ones(len(points), dtype=bool)
+    if max_error > 0:
+        keep &= points.error <= max_error
+    if min_track > 0:
+        keep &= points.track_length >= min_track
+
+    xyz = points.xyz
+    if bbox is not None:
+        lo, hi = np.asarray(bbox[0], dtype=np.float64), np.asarray(bbox[1], dtype=np.float64)
+        keep &= np.all((xyz >= lo) & (xyz <= hi), axis=1)
+    if bbox_percentile > 0 and keep.any():
+        lo, hi = np.percentile(xyz[keep], [bbox_percentile, 100.0 - bbox_percentile], axis=0)
+        pad = (hi - lo) * bbox_margin
+        keep &= np.all((xyz >= lo - pad) & (xyz <= hi + pad), axis=1)
+    return keep
+
+
+def export_sparse_ply(
+    model_dir: Path,
+    out_path: Path,
+    max_error: float = 0.0,
+    min_track: int = 0,
+    bbox: Optional[Sequence[Sequence[float]]] = None,
+    bbox_percentile: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    sparse/<n>/points3D.bin -> PLY (colmap model_converter 대체, subprocess 없음).
+    points3D.bin만 읽는다 (images.bin의 points2D는 필요 없음).
+    """
+    points = read_points3D(Path(model_dir) / "points3D.bin")
+    keep = point_filter(points, max_error, min_track, bbox, bbox_percentile)
+    size = write_points_ply(out_path, points.xyz[keep], points.rgb[keep])
+    return {"points_in": len(points), "points_out": int(keep.sum()), "bytes": size}
@@ -0,0 +1,128 @@
+# backend/recon/retrieval.py
+from __future__ import annotations
+
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+from PIL import Image
+
+Pair = Tuple[str, str]
+
+# 썸네일 한 변 (정사각형으로 resize). descriptor는 이 크기에서 계산
+THUMB_SIZE = 64
+# gradient orientation histogram: GRID x GRID 셀 x ORIENT_BINS
+GRID = 4
+ORIENT_BINS = 8
+# 색 layout: COLOR_GRID x COLOR_GRID 평균 색
+COLOR_GRID = 4
+COLOR_WEIGHT = 0.5
+# 유사도 계산 시 한 번에 처리하는 행 수 (n x BLOCK float32 메모리 상한)
+BLOCK = 1024
+
+
+def _load_thumb(path: Path, size: int) -> Optional[np.ndarray]:
+    """JPEG draft로 축소 decode -> size x size RGB uint8. 못 읽으면 None"""
+    try:
+        with Image.open(path) as img:
+            img.draft("RGB", (size * 2, size * 2))
+            img = img.convert("RGB").resize((size, size), Image.BILINEAR)
+            return np.asarray(img, dtype=np.uint8)
+    except (OSError, ValueError, SyntaxError):
+        return None
+
+
+def load_thumbnails(paths: List[Path], size: int = THUMB_SIZE, workers: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (thumbs[n, size, size, 3] uint8, ok[n] bool). 못 읽은 이미지는 0으로 채우고 ok=False.
+    PIL decode는 GIL을 놓으므로 thread pool로 충분.
+    """
+    thumbs = np.zeros((len(paths), size, size, 3), dtype=np.uint8)
+    ok = np.zeros(len(paths), dtype=bool)
+    with ThreadPoolExecutor(max_workers=workers or None) as ex:
+        for i, t in enumerate(ex.map(lambda p: _load_thumb(p, size), paths)):
+            if t is not None:
+                thumbs[i] = t
+                ok[i] = True
+    return thumbs, ok
+
+
+def _l2n(x: np.ndarray) -> np.ndarray:
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def global_descriptors(thumbs: np.ndarray) -> np.ndarray:
+    """
+    썸네일 batch -> 전역 descriptor (n, d) float32, L2 정규화. 전부 한 번에 벡터 연산.
+    - GIST 비슷한 구조: GRID x GRID 셀별 gradient 방향 histogram (magnitude 가중, Hellinger 정규화)
+      -> 노출/화이트밸런스 변화에 덜 민감
+    - 거친 색 layout (COLOR_GRID x COLOR_GRID 평균 색, 평균 빼서 정규화)
+    """
+    n, h, w, _ = thumbs.shape
+    rgb = thumbs.astype(np.float32) / 255.0
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)  # (n, h, w)
+
+    gx = np.zeros_like(gray)
+    gy = np.zeros_like(gray)
+    gx[:, :, 1:-1] = gray[:, :, 2:] - gray[:, :, :-2]
+    gy[:, 1:-1, :] = gray[:, 2:, :] - gray[:, :-2, :]
+    mag = np.hypot(gx, gy)
+    # 방향은 부호 무시 (0..pi)
+    ang = np.mod(np.arctan2(gy, gx), np.pi)
+    obin = np.minimum((ang / np.pi * ORIENT_BINS).astype(np.int64), ORIENT_BINS - 1)
+
+    cy = (np.arange(h) * GRID // h)[:, None]
+    cx = (np.arange(w) * GRID // w)[None, :]
+    cell = (cy * GRID + cx)  # (h, w)
+    idx = (np.arange(n)[:, None, None] * (GRID * GRID) + cell[None]) * ORIENT_BINS + obin
+    hog = np.bincount(idx.ravel(), weights=mag.ravel(), minlength=n * GRID * GRID * ORIENT_BINS)
+    hog = np.sqrt(hog.reshape(n, -1))  # Hellinger
+    hog = _l2n(hog)
+
+    color = rgb.reshape(n, COLOR_GRID, h // COLOR_GRID, COLOR_GRID, w // COLOR_GRID, 3).mean(axis=(2, 4))
+    color = color.reshape(n, -1)
+    color = _l2n(color - color.mean(axis=1, keepdims=True))
+
+    desc = np.concatenate([hog, COLOR_WEIGHT * color], axis=1)
+    return _l2n(desc).astype(np.float32)
+
+
+def topk_neighbors(desc: np.ndarray, k: int, block: int = BLOCK) -> np.ndarray:
+    """
+    cosine 유사도 기준 이미지별 top-k 이웃 index (n, k'), k' = min(k, n-1).
+    brute-force지만 행 block 단위 행렬곱 + argpartition -> 메모리 O(n * block), 수천 장은 수 초 이내.
+    """
+    n = desc.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int64)
+    out = np.empty((n, k), dtype=np.int64)
+    for start in range(0, n, block):
+        stop = min(n, start + block)
+        sim = desc[start:stop] @ desc.T
+        sim[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # 자기 자신 제외
+        part = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(sim, part, axis=1), axis=1)
+        out[start:stop] = np.take_along_axis(part, order, axis=1)
+    return out
+
+
+def retrieval_pairs(image_dir: Path, names: List[str], k: int = 20, size: int = THUMB_SIZE) -> Set[Pair]:
+    """
+    메타데이터 없는 unordered capture용 후보 pair: 이미지당 외형이 가장 비슷한 k장.
+    pair 수 <= n*k (exhaustive n^2/2 대신). 읽을 수 없는 이미지는 제외.
+    """
+    thumbs, ok = load_thumbnails([image_dir / name for name in names], size)
+    keep = np.flatnonzero(ok)
+    if len(keep) < 2:
+        return set()
+    nbrs = topk_neighbors(global_descriptors(thumbs[keep]), k)
+
+    pairs: Set[Pair] = set()
+    for i, row in enumerate(nbrs):
+        a = names[keep[i]]
+        for j in row:
+            b = names[keep[j]]
+            pairs.add((a, b) if a < b else (b, a))
+    return pairs
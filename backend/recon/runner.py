@@ -0,0 +1,188 @@
+# backend/recon/runner.py
+from __future__ import annotations
+
+import os
+import re
+import gzip
+import signal
+import time
+import threading
+import subprocess
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 메모리에 남기는 tail (줄 수). 전체 로그는 gzip 파일로.
+TAIL_LINES = 400
+
+LineCallback = Callable[[str, str], None]  # (stream 이름 "stdout"/"stderr", line)
+# 주기적으로 호출 -> 중단 사유("cancelled" / "timed_out") 또는 None
+StopCheck = Callable[[], Optional[str]]
+
+# stop 확인 주기 / SIGTERM 후 SIGKILL까지 유예 (초)
+STOP_POLL_INTERVAL = 1.0
+KILL_GRACE = float(os.environ.get("KILL_GRACE", "10"))
+
+
+@dataclass
+class StreamedResult:
+    returncode: int
+    stdout: str  # tail만
+    stderr: str  # tail만
+    stdout_log: Path
+    stderr_log: Path
+    cmd: List[str]
+    aborted: Optional[str] = None  # stop()으로 죽였으면 그 사유
+
+
+def _pump(pipe, log_path: Path, ring: deque, stream: str, on_line: Optional[LineCallback]) -> None:
+    with gzip.open(log_path, "wt", encoding="utf-8") as log:
+        for raw in iter(pipe.readline, b""):
+            line = raw.decode("utf-8", errors="replace")
+            log.write(line)
+            ring.append(line)
+            if on_line is not None:
+                try:
+                    on_line(stream, line.rstrip("\n"))
+                except Exception:
+                    # 진행률 파싱/게시 실패로 파이프를 막으면 안 됨 (프로세스가 block됨)
+                    pass
+    pipe.close()
+
+
+def with_deadline(stop: Optional[StopCheck], timeout: float) -> StopCheck:
+    """stop에 wall-clock 상한(초)을 더한 StopCheck. timeout <= 0 이면 상한 없음"""
+    deadline = time.monotonic() + timeout if timeout > 0 else None
+
+    def check() -> Optional[str]:
+        reason = stop() if stop else None
+        if reason:
+            return reason
+        if deadline is not None and time.monotonic() > deadline:
+            return "timed_out"
+        return None
+
+    return check
+
+
+def kill_process_group(proc: subprocess.Popen, grace: float = KILL_GRACE) -> None:
+    """
+    SIGTERM -> grace초 안에 안 죽으면 SIGKILL. 프로세스 그룹 전체
+    (bash 스크립트가 띄운 colmap / ns-train 같은 자식까지).
+    """
+    for sig, wait in ((signal.SIGTERM, grace), (signal.SIGKILL, None)):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=wait)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def run_streamed(
+    cmd: List[str],
+    log_dir: Path,
+    name: str,
+    env: Optional[Dict[str, str]] = None,
+    on_line: Optional[LineCallback] = None,
+    stop: Optional[StopCheck] = None,
+) -> StreamedResult:
+    """
+    subprocess.run(capture_output=True) 대체.
+    - stdout/stderr를 줄 단위로 읽어 <log_dir>/<name>.{stdout,stderr}.log.gz 에 바로 기록
+    - 메모리에는 최근 TAIL_LINES 줄만 (ring buffer)
+    - 줄마다 on_line 호출 -> 진행률 파싱
+    - 별도 프로세스 그룹으로 실행, stop()이 사유를 돌려주면 그룹째 kill (취소 / timeout)
+    """
+    log_dir.mkdir(parents=True, exist_ok=True)
+    out_log = log_dir / f"{name}.stdout.log.gz"
+    err_log = log_dir / f"{name}.stderr.log.gz"
+    out_ring: deque = deque(maxlen=TAIL_LINES)
+    err_ring: deque = deque(maxlen=TAIL_LINES)
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, start_new_session=True)
+    threads = [
+        threading.Thread(target=_pump, args=(proc.stdout, out_log, out_ring, "stdout", on_line), daemon=True),
+        threading.Thread(target=_pump, args=(proc.stderr, err_log, err_ring, "stderr", on_line), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    aborted = None
+    while True:
+        try:
+            returncode = proc.wait(timeout=STOP_POLL_INTERVAL if stop else None)
+            break
+        except subprocess.TimeoutExpired:
+            aborted = stop()
+            if aborted:
+                kill_process_group(proc)
+                returncode = proc.wait()
+                break
+    for t in threads:
+        t.join()
+
+    return StreamedResult(
+        returncode=returncode,
+        stdout="".join(out_ring),
+        stderr="".join(err_ring),
+        stdout_log=out_log,
+        stderr_log=err_log,
+        cmd=list(cmd),
+        aborted=aborted,
+    )
+
+
+# ============================================================
+# COLMAP 진행률
+# ============================================================
+_STAGE_RE = re.compile(r"^\[(\d+)/(\d+)\]\s*(.*)$")
+# feature_extractor: "Processed file [3/120]"
+_PROCESSED_RE = re.compile(r"Processed file \[(\d+)/(\d+)\]")
+# mapper: "Registering image #5 (num_reg_frames=3)" / 구버전 "Registering image #5 (3)"
+_REGISTER_RE = re.compile(r"Registering image #\d+ \((?:num_reg_\w+=)?(\d+)\)")
+
+
+class ColmapProgress:
+    """
+    run_colmap.sh 출력 -> 0..1 진행률.
+    - "[n/N] ..." 단계 마커로 큰 단계 (단계당 1/N)
+    - 단계 안에서는 glog 줄로 세분화: 추출 "Processed file [i/n]", mapper "Registering image #k (m)"
+    """
+
+    def __init__(self, num_images: int, on_change: Callable[[float, str], None]):
+        self.num_images = max(1, num_images)
+        self.on_change = on_change
+        self.stage_idx = 0
+        self.stage_total = 1
+        self.stage_name = ""
+        self.within = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def fraction(self) -> float:
+        if self.stage_idx == 0:
+            return 0.0
+        return min(1.0, (self.stage_idx - 1 + self.within) / self.stage_total)
+
+    def feed(self, stream: str, line: str) -> None:
+        with self._lock:
+            m = _STAGE_RE.match(line.strip())
+            if m:
+                self.stage_idx, self.stage_total = int(m.group(1)), max(1, int(m.group(2)))
+                self.stage_name = m.group(3).strip()
+                self.within = 0.0
+            else:
+                m = _PROCESSED_RE.search(line)
+                if m:
+                    self.within = int(m.group(1)) / max(1, int(m.group(2)))
+                else:
+                    m = _REGISTER_RE.search(line)
+                    if not m:
+                        return
+                    self.within = min(1.0, int(m.group(1)) / self.num_images)
+            fraction, name = self.fraction, self.stage_name
+        self.on_change(fraction, name)
@@ -0,0 +1,454 @@
+# backend/recon/stages.py
+from __future__ import annotations
+
+import sys
+import json
+import time
+import hashlib
+import shutil
+import struct
+import sqlite3
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+from recon.ply import export_sparse_ply
+from recon.pairs import MatchPlan, plan_matching, write_pair_list
+from recon.runner import LineCallback, StopCheck, StreamedResult, run_streamed, with_deadline
+
+# run_colmap.sh 의 [1/6]..[6/6] 와 같은 순서
+STAGES = ("extract", "match", "map", "convert", "undistort", "dense")
+# CPU로 충분한 SfM 단계 / CUDA가 필요한 dense 단계
+SFM_STAGES = STAGES[:4]
+DENSE_STAGES = STAGES[4:]
+
+STAGE_TITLES = {
+    "extract": "feature_extractor",
+    "match": "matcher",
+    "map": "mapper (sparse reconstruction)",
+    "convert": "points3D.bin -> points_sparse.ply (filtered)",
+    "undistort": "image_undistorter (prepare dense)",
+    "dense": "patch_match_stereo + stereo_fusion -> points_dense.ply",
+}
+
+# COLMAP 명령별 thread 수 옵션 (3.12+ 옵션 이름). 없는 명령(patch_match_stereo: GPU 등)은 제한 안 함
+THREAD_OPTIONS = {
+    "feature_extractor": "--FeatureExtraction.num_threads",
+    "exhaustive_matcher": "--FeatureMatching.num_threads",
+    "sequential_matcher": "--FeatureMatching.num_threads",
+    "vocab_tree_matcher": "--FeatureMatching.num_threads",
+    "matches_importer": "--FeatureMatching.num_threads",
+    "mapper": "--Mapper.num_threads",
+    "stereo_fusion": "--StereoFusion.num_threads",
+}
+
+# CPU thread lease를 받는 단계 (THREAD_OPTIONS 명령을 포함하는 단계).
+# dense는 patch_match_stereo(GPU)가 대부분이라 CPU 예산을 잡고 있으면 다른 job만 기다리게 됨 -> 제외
+# (stereo_fusion은 COLMAP 기본 thread 수로 돎)
+THREADED_STAGES = ("extract", "match", "map")
+
+# extract 단계 대체 hook (feature cache 등). 인자 = feature_extractor에 붙일 추가 옵션 (thread 수),
+# 단계 stop (취소 + extract 단계 timeout). True면 DB가 준비된 것으로 보고 feature_extractor 생략.
+# 중단되면 hook이 StageAborted를 올린다
+ExtractHook = Callable[[List[str], StopCheck], bool]
+
+# (단계 이름, 단계 stop) -> context manager (진입 시 thread 수를 돌려줌). cpubroker.CpuBroker.lease 등.
+# lease 대기 중에도 stop을 봐서 취소/timeout이면 바로 빠져나와야 함
+ThreadLease = Callable[[str, StopCheck], ContextManager[int]]
+
+
+def thread_args(subcommand: str, threads: int) -> List[str]:
+    opt = THREAD_OPTIONS.get(subcommand)
+    if not opt or threads <= 0:
+        return []
+    return [opt, str(threads)]
+
+
+class StageFailed(RuntimeError):
+    def __init__(self, stage: str, result: Optional[StreamedResult], message: str):
+        super().__init__(message)
+        self.stage = stage
+        self.result = result
+
+
+class StageAborted(StageFailed):
+    """취소 또는 단계 timeout으로 중단 (reason = "cancelled" | "timed_out")"""
+
+    def __init__(self, stage: str, result: Optional[StreamedResult], reason: str):
+        super().__init__(stage, result, f"stage {stage} {reason}")
+        self.reason = reason
+
+
+class ColmapPipeline:
+    """
+    COLMAP 파이프라인을 단계별로 실행 (run_colmap.sh 대체).
+
+    - 단계가 끝나면 <output>/.stages/<name>.done 마커 기록 (단계 입력 설정의 hash 포함)
+    - 완료 판단 = 마커 + 같은 설정 hash + 산출물 검사
+      (마커만 있고 파일이 지워졌거나, matcher/필터 등 설정이 바뀌었으면 미완료)
+    - run()은 첫 번째 미완료 단계부터 재개, 그 뒤 단계는 모두 다시 실행
+      (앞 단계 산출물이 바뀌었을 수 있으므로 뒤 마커는 지운다)
+    """
+
+    def __init__(
+        self,
+        image_dir: Path,
+        output_dir: Path,
+        log_dir: Path,
+        env: Optional[Dict[str, str]] = None,
+        on_line: Optional[LineCallback] = None,
+        single_camera: int = 1,
+        matcher: str = "auto",
+        match_options: Optional[Dict[str, Any]] = None,
+        thread_lease: Optional[ThreadLease] = None,
+        stop: Optional[StopCheck] = None,
+        stage_timeouts: Optional[Dict[str, float]] = None,
+        ply_filter: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        matcher: "auto"(메타데이터 기반 pair 계획) | "exhaustive" | "sequential" | "vocab_tree"
+        match_options: recon.pairs.plan_matching 인자 (time_window, gps_radius_m, vocab_tree_path, ...)
+        thread_lease: 없으면 COLMAP 기본값(코어 전부)
+        stop: 취소 확인 (사유 or None). stage_timeouts: 단계별 wall-clock 상한(초, 0/없음 = 무제한)
+        ply_filter: recon.ply.export_sparse_ply 인자 (max_error, min_track, bbox, bbox_percentile). 없으면 전부 내보냄
+        """
+        self.image_dir = image_dir
+        self.output_dir = output_dir
+        self.log_dir = log_dir
+        self.env = env
+        self.on_line = on_line
+        self.single_camera = single_camera
+        self.matcher = matcher
+        self.match_options = match_options or {}
+        self.match_plan: Optional[MatchPlan] = None
+        self.thread_lease = thread_lease
+        self.stop = stop
+        self.stage_timeouts = stage_timeouts or {}
+        self.ply_filter = ply_filter or {}
+
+        self.db_path = output_dir / "colmap.db"
+        self.sparse_dir = output_dir / "sparse"
+        self.dense_dir = output_dir / "dense"
+        self.sparse_ply = output_dir / "points_sparse.ply"
+        self.dense_ply = output_dir / "points_dense.ply"
+        self.pairs_path = output_dir / "pairs.txt"
+        self.marker_dir = output_dir / ".stages"
+
+    # ------------------------------------------------------------
+    # markers / artifact checks
+    # ------------------------------------------------------------
+    def _marker(self, stage: str) -> Path:
+        return self.marker_dir / f"{stage}.done"
+
+    def model_dir(self) -> Optional[Path]:
+        """0번 모델 (대부분 0), 없으면 첫 번째 모델"""
+        cand = self.sparse_dir / "0"
+        if cand.is_dir():
+            return cand
+        if self.sparse_dir.is_dir():
+            for d in sorted(self.sparse_dir.iterdir()):
+                if d.is_dir():
+                    return d
+        return None
+
+    def _db_count(self, table: str) -> int:
+        if not self.db_path.exists():
+            return 0
+        con = sqlite3.connect(str(self.db_path))
+        try:
+            return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+        finally:
+            con.close()
+
+    def artifacts_ok(self, stage: str) -> bool:
+        if stage == "extract":
+            n = self._db_count("images")
+            return n > 0 and self._db_count("keypoints") >= n
+        if stage == "match":
+            return self._db_count("two_view_geometries") > 0
+        if stage == "map":
+            m = self.model_dir()
+            return bool(m and all((m / f).exists() for f in ("cameras.bin", "images.bin", "points3D.bin")))
+        if stage == "convert":
+            return self.sparse_ply.exists() and self.sparse_ply.stat().st_size > 0
+        if stage == "undistort":
+            return (self.dense_dir / "sparse").is_dir() and (self.dense_dir / "images").is_dir()
+        if stage == "dense":
+            return self.dense_ply.exists() and self.dense_ply.stat().st_size > 0
+        raise ValueError(f"unknown stage: {stage}")
+
+    def stage_params(self, stage: str) -> Dict[str, Any]:
+        """
+        단계 결과를 바꾸는 설정 (thread 수처럼 결과와 무관한 것은 제외).
+        앞 단계 설정이 바뀌면 그 단계가 다시 돌면서 뒤 마커는 어차피 지워짐
+        """
+        if stage == "extract":
+            # 이미지 세트: SFM_MAX_IMAGE_SIZE 가 바뀌면 같은 work/images 라도 파일 크기가 달라짐
+            images = sorted((p.name, p.stat().st_size) for p in self.image_dir.iterdir() if p.is_file())
+            return {"image_dir": str(self.image_dir), "images": images, "single_camera": self.single_camera}
+        if stage == "match":
+            return {"matcher": self.matcher, "match_options": self.match_options}
+        if stage == "map":
+            return {"image_dir": str(self.image_dir)}
+        if stage == "convert":
+            return {"ply_filter": self.ply_filter}
+        return {}
+
+    def params_hash(self, stage: str) -> str:
+        raw = json.dumps(self.stage_params(stage), sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _marker_info(self, stage: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._marker(stage).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def is_complete(self, stage: str) -> bool:
+        info = self._marker_info(stage)
+        return (info is not None and info.get("params") == self.params_hash(stage)
+                and self.artifacts_ok(stage))
+
+    def completed(self) -> List[str]:
+        """앞에서부터 연속으로 완료된 단계"""
+        done = []
+        for stage in STAGES:
+            if not self.is_complete(stage):
+                break
+            done.append(stage)
+        return done
+
+    def _mark(self, stage: str, info: Dict[str, Any]) -> None:
+        self.marker_dir.mkdir(parents=True, exist_ok=True)
+        info = dict(info, params=self.params_hash(stage), finished=time.time())
+        self._marker(stage).write_text(json.dumps(info), encoding="utf-8")
+
+    def _invalidate_from(self, stage: str) -> None:
+        for s in STAGES[STAGES.index(stage):]:
+            self._marker(s).unlink(missing_ok=True)
+
+    # ------------------------------------------------------------
+    # in-process stages
+    # ------------------------------------------------------------
+    def _export_sparse_ply(self, stage: str, last: Optional[StreamedResult]) -> Dict[str, Any]:
+        """sparse model -> points_sparse.ply (필터 적용). 반환 통계는 마커에 남긴다"""
+        t0 = time.monotonic()
+        try:
+            stats = export_sparse_ply(self.model_dir(), self.sparse_ply, **self.ply_filter)
+        except (OSError, ValueError, struct.error) as e:
+            raise StageFailed(stage, last, f"sparse PLY export failed: {e}")
+        stats["seconds"] = round(time.monotonic() - t0, 3)
+        stats["filter"] = dict(self.ply_filter)
+        if self.on_line:
+            self.on_line("stdout", f"exported {stats['points_out']}/{stats['points_in']} points -> {self.sparse_ply.name}")
+        return stats
+
+    # ------------------------------------------------------------
+    # commands
+    # ------------------------------------------------------------
+    def commands(self, stage: str, threads: int = 0) -> List[List[str]]:
+        return [cmd + thread_args(cmd[1], threads) for cmd in self._commands(stage)]
+
+    def _commands(self, stage: str) -> List[List[str]]:
+        db, img = str(self.db_path), str(self.image_dir)
+        if stage == "extract":
+            return [[
+                "colmap", "feature_extractor",
+                "--database_path", db,
+                "--image_path", img,
+                "--ImageReader.single_camera", str(self.single_camera),
+            ]]
+        if stage == "match":
+            return [self._match_command()]
+        if stage == "map":
+            return [[
+                "colmap", "mapper",
+                "--database_path", db,
+                "--image_path", img,
+                "--output_path", str(self.sparse_dir),
+            ]]
+        model = str(self.model_dir())
+        if stage == "convert":
+            # model_converter 대신 프로세스 안에서 export (_export_sparse_ply)
+            return []
+        if stage == "undistort":
+            return [[
+                "colmap", "image_undistorter",
+                "--image_path", img,
+                "--input_path", model,
+                "--output_path", str(self.dense_dir),
+                "--output_type", "COLMAP",
+            ]]
+        if stage == "dense":
+            return [
+                [
+                    "colmap", "patch_match_stereo",
+                    "--workspace_path", str(self.dense_dir),
+                    "--workspace_format", "COLMAP",
+                    "--PatchMatchStereo.geom_consistency", "true",
+                ],
+                [
+                    "colmap", "stereo_fusion",
+                    "--workspace_path", str(self.dense_dir),
+                    "--workspace_format", "COLMAP",
+                    "--input_type", "geometric",
+                    "--output_path", str(self.dense_ply),
+                ],
+            ]
+        raise ValueError(f"unknown stage: {stage}")
+
+    def plan_matching(self) -> MatchPlan:
+        if self.match_plan is None:
+            if self.matcher == "auto":
+                names = sorted(p.name for p in self.image_dir.iterdir() if p.is_file())
+                self.match_plan = plan_matching(self.image_dir, names, **self.match_options)
+            else:
+                self.match_plan = MatchPlan(self.matcher, reason="forced")
+        return self.match_plan
+
+    def _match_command(self) -> List[str]:
+        """
+        exhaustive_matcher는 O(n^2) -> 이미지가 많으면 촬영 시각/GPS로 고른 pair만 matches_importer로.
+        메타데이터가 없으면 sequential / vocab tree로 fallback.
+        """
+        plan = self.plan_matching()
+        db = str(self.db_path)
+        if plan.kind == "pairs":
+            write_pair_list(plan.pairs, self.pairs_path)
+            return [
+                "colmap", "matches_importer",
+                "--database_path", db,
+                "--match_list_path", str(self.pairs_path),
+                "--match_type", "pairs",
+            ]
+        if plan.kind == "sequential":
+            return ["colmap", "sequential_matcher", "--database_path", db]
+        if plan.kind == "vocab_tree":
+            return [
+                "colmap", "vocab_tree_matcher",
+                "--database_path", db,
+                "--VocabTreeMatching.vocab_tree_path", str(self.match_options.get("vocab_tree_path") or ""),
+            ]
+        return ["colmap", "exhaustive_matcher", "--database_path", db]
+
+    def _prepare(self, stage: str) -> None:
+        """단계 재실행 전 이전 시도의 찌꺼기 정리"""
+        if stage == "extract" and self.db_path.exists():
+            self.db_path.unlink()
+        if stage == "map" and self.sparse_dir.exists():
+            # mapper는 기존 디렉토리에 모델을 추가로 만든다
+            shutil.rmtree(self.sparse_dir)
+        if stage == "undistort" and self.dense_dir.exists():
+            shutil.rmtree(self.dense_dir)
+        if stage == "map":
+            self.sparse_dir.mkdir(parents=True, exist_ok=True)
+        if stage == "undistort":
+            self.dense_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # run
+    # ------------------------------------------------------------
+
+    def run(
+        self,
+        stages=STAGES,
+        extract_hook: Optional[ExtractHook] = None,
+        on_stage: Optional[Callable[[str, str], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        stages 중 미완료 단계부터 순서대로 실행.
+        on_stage(stage, event): event = "start" | "done" | "skipped"
+        실패하면 StageFailed, 취소/timeout이면 StageAborted. 반환: {"ran": [...], "skipped": [...], "last": StreamedResult | None}
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        ran: List[str] = []
+        skipped: List[str] = []
+        last: Optional[StreamedResult] = None
+        resumed = False
+
+        total = len(stages)
+        for i, stage in enumerate(stages, start=1):
+            if not resumed and self.is_complete(stage):
+                skipped.append(stage)
+                if on_stage:
+                    on_stage(stage, "skipped")
+                continue
+            if not resumed:
+                self._invalidate_from(stage)
+                resumed = True
+
+            stop = with_deadline(self.stop, self.stage_timeouts.get(stage) or 0)
+            reason = stop()
+            if reason:
+                raise StageAborted(stage, last, reason)
+
+            if on_stage:
+                on_stage(stage, "start")
+            if self.on_line:
+                self.on_line("stdout", f"[{i}/{total}] {STAGE_TITLES[stage]}")
+
+            if stage in ("convert", "undistort") and self.model_dir() is None:
+                raise StageFailed(stage, last, "No sparse model generated.")
+
+            self._prepare(stage)
+            lease = self.thread_lease(stage, stop) if self.thread_lease and stage in THREADED_STAGES else nullcontext(0)
+            with lease as threads:
+                reason = stop()
+                if reason:
+                    raise StageAborted(stage, last, reason)
+                cmds = self.commands(stage, threads)
+                if (stage == "extract" and extract_hook is not None
+                        and extract_hook(thread_args("feature_extractor", threads), stop)):
+                    cmds = []
+
+                for j, cmd in enumerate(cmds):
+                    last = run_streamed(cmd, self.log_dir,
+                                        f"colmap-{stage}-{j}" if len(cmds) > 1 else f"colmap-{stage}",
+                                        env=self.env, on_line=self.on_line, stop=stop)
+                    if last.aborted:
+                        raise StageAborted(stage, last, last.aborted)
+                    if last.returncode != 0:
+                        raise StageFailed(stage, last, f"{cmd[1]} failed (code={last.returncode})")
+
+            export = self._export_sparse_ply(stage, last) if stage == "convert" else None
+
+            if not self.artifacts_ok(stage):
+                raise StageFailed(stage, last, f"stage {stage} finished without expected artifacts")
+            info: Dict[str, Any] = {"commands": [" ".join(c) for c in cmds]}
+            if stage == "match" and self.match_plan is not None:
+                info["plan"] = {"kind": self.match_plan.kind, "pairs": len(self.match_plan.pairs),
+                                "reason": self.match_plan.reason}
+            if export is not None:
+                info["export"] = export
+            self._mark(stage, info)
+            ran.append(stage)
+            if on_stage:
+                on_stage(stage, "done")
+
+        return {"ran": ran, "skipped": skipped, "last": last}
+
+
+def main(argv: List[str]) -> int:
+    """python -m recon.stages <INPUT_DIR> <OUT_DIR>  (run_colmap.sh 에서 호출)"""
+    if len(argv) != 2:
+        print("Usage: python -m recon.stages <INPUT_DIR> <OUT_DIR>")
+        return 1
+    image_dir, output_dir = Path(argv[0]).resolve(), Path(argv[1]).resolve()
+
+    def echo(stream: str, line: str) -> None:
+        print(line, file=sys.stdout if stream == "stdout" else sys.stderr, flush=True)
+
+    pipeline = ColmapPipeline(image_dir, output_dir, output_dir / "logs", on_line=echo)
+    try:
+        pipeline.run()
+    except StageFailed as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    print(f"DONE: {pipeline.sparse_ply} and {pipeline.dense_ply}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,295 @@
+# backend/recon/tiles.py
+from __future__ import annotations
+
+import os
+import json
+import time
+import uuid
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from recon.ply import PLY_VERTEX_DTYPE, ply_header, read_ply_vertices
+
+# 노드 이름 (Potree 방식): "r" = root, 자식은 뒤에 0-7 한 글자 (bit 2 = x, bit 1 = y, bit 0 = z 위쪽 절반)
+ROOT = "r"
+MANIFEST_NAME = "manifest.json"
+NODES_DIR = "nodes"
+TILES_VERSION = 1
+
+
+@dataclass
+class _Node:
+    name: str
+    level: int
+    cell: Tuple[int, int, int]  # 이 level 격자에서의 좌표
+    count: int  # subtree 전체 점 수
+    children: List["_Node"] = field(default_factory=list)
+
+    @property
+    def is_leaf(self) -> bool:
+        return not self.children
+
+
+def _chunks(verts: np.ndarray, chunk_points: int) -> Iterator[np.ndarray]:
+    """memmap을 chunk 단위로 RAM에 올림 (전체를 한 번에 읽지 않음)"""
+    for start in range(0, len(verts), chunk_points):
+        yield np.asarray(verts[start:start + chunk_points])
+
+
+def _xyz(chunk: np.ndarray) -> np.ndarray:
+    return np.stack([chunk["x"], chunk["y"], chunk["z"]], axis=1).astype(np.float64)
+
+
+def _to_vertices(chunk: np.ndarray) -> np.ndarray:
+    """원본 vertex(법선 등 포함 가능) -> 타일 vertex (float xyz + uchar rgb). 색 없으면 흰색"""
+    out = np.empty(len(chunk), dtype=PLY_VERTEX_DTYPE)
+    for name in ("x", "y", "z"):
+        out[name] = chunk[name]
+    for name in ("red", "green", "blue"):
+        out[name] = chunk[name] if name in chunk.dtype.names else 255
+    return out
+
+
+def _cells(xyz: np.ndarray, origin: np.ndarray, size: float, res: int) -> np.ndarray:
+    """좌표 -> res^3 격자 좌표 (N, 3)"""
+    c = np.floor((xyz - origin) / size * res).astype(np.int64)
+    return np.clip(c, 0, res - 1)
+
+
+def _bounds(verts: np.ndarray, chunk_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for chunk in _chunks(verts, chunk_points):
+        xyz = _xyz(chunk)
+        xyz = xyz[np.isfinite(xyz).all(axis=1)]
+        if len(xyz):
+            lo = np.minimum(lo, xyz.min(axis=0))
+            hi = np.maximum(hi, xyz.max(axis=0))
+    return lo, hi
+
+
+def _count_grid(verts: np.ndarray, origin: np.ndarray, size: float, depth: int, chunk_points: int) -> np.ndarray:
+    """가장 깊은 level 격자(2^depth)^3 의 cell별 점 수"""
+    res = 1 << depth
+    counts = np.zeros(res ** 3, dtype=np.int64)
+    for chunk in _chunks(verts, chunk_points):
+        xyz = _xyz(chunk)
+        xyz = xyz[np.isfinite(xyz).all(axis=1)]
+        c = _cells(xyz, origin, size, res)
+        counts += np.bincount((c[:, 0] * res + c[:, 1]) * res + c[:, 2], minlength=res ** 3)
+    return counts.reshape(res, res, res)
+
+
+def _pyramid(counts: np.ndarray) -> List[np.ndarray]:
+    """level 0(root) .. depth 까지 cell별 점 수 (2x2x2 합산)"""
+    levels = [counts]
+    while levels[0].shape[0] > 1:
+        c = levels[0]
+        n = c.shape[0] // 2
+        levels.insert(0, c.reshape(n, 2, n, 2, n, 2).sum(axis=(1, 3, 5)))
+    return levels
+
+
+def _build_hierarchy(pyramid: List[np.ndarray], max_leaf_points: int) -> _Node:
+    depth = len(pyramid) - 1
+
+    def build(name: str, level: int, cell: Tuple[int, int, int]) -> _Node:
+        node = _Node(name, level, cell, int(pyramid[level][cell]))
+        if node.count > max_leaf_points and level < depth:
+            x, y, z = cell
+            for i in range(8):
+                child = (2 * x + (i >> 2 & 1), 2 * y + (i >> 1 & 1), 2 * z + (i & 1))
+                if pyramid[level + 1][child] > 0:
+                    node.children.append(build(name + str(i), level + 1, child))
+        return node
+
+    return build(ROOT, 0, (0, 0, 0))
+
+
+def _leaves(node: _Node) -> Iterator[_Node]:
+    if node.is_leaf:
+        yield node
+    for child in node.children:
+        yield from _leaves(child)
+
+
+def _leaf_lookup(root: _Node, depth: int) -> Tuple[np.ndarray, List[_Node]]:
+    """가장 깊은 격자 cell -> leaf 번호 (-1 = 빈 cell)"""
+    res = 1 << depth
+    lookup = np.full((res, res, res), -1, dtype=np.int32)
+    leaves = list(_leaves(root))
+    for i, leaf in enumerate(leaves):
+        span = 1 << (depth - leaf.level)
+        x, y, z = (c * span for c in leaf.cell)
+        lookup[x:x + span, y:y + span, z:z + span] = i
+    return lookup.reshape(-1), leaves
+
+
+def _subsample(verts: np.ndarray, origin: np.ndarray, size: float, res: int, limit: int, rng) -> np.ndarray:
+    """
+    노드 격자(res^3)에서 cell당 1점 (균일한 밀도), 그래도 limit보다 많으면 무작위로 limit개.
+    cell 안에서 어느 점이 남을지는 무작위 (순서를 섞은 뒤 첫 점)
+    """
+    if len(verts) == 0:
+        return verts
+    order = rng.permutation(len(verts))
+    verts = verts[order]
+    c = _cells(_xyz(verts), origin, size, res)
+    _, first = np.unique((c[:, 0] * res + c[:, 1]) * res + c[:, 2], return_index=True)
+    picked = verts[np.sort(first)]
+    if len(picked) > limit:
+        picked = picked[np.sort(rng.choice(len(picked), limit, replace=False))]
+    return picked
+
+
+def _write_node(path: Path, verts: np.ndarray) -> None:
+    with path.open("wb") as fh:
+        fh.write(ply_header(len(verts)))
+        verts.tofile(fh)
+
+
+def _node_box(origin: np.ndarray, size: float, node: _Node) -> Tuple[np.ndarray, float]:
+    node_size = size / (1 << node.level)
+    return origin + np.asarray(node.cell, dtype=np.float64) * node_size, node_size
+
+
+def build_tiles(
+    ply_path: Path,
+    out_dir: Path,
+    max_leaf_points: int = 100_000,
+    node_points: int = 50_000,
+    node_resolution: int = 128,
+    grid_depth: int = 7,
+    chunk_points: int = 2_000_000,
+    source: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    points.ply -> octree LOD 타일 (3D Tiles REPLACE 방식):
+      <out_dir>/manifest.json
+      <out_dir>/nodes/<name>.ply   (float xyz + uchar rgb, 뷰어가 이미 읽는 형식)
+
+    - leaf: 그 영역의 점 전부. leaf는 max_leaf_points 이하 (가장 깊은 level이면 예외)
+    - 중간 노드: 자식들 점에서 node_resolution^3 격자로 고르게 뽑은 node_points 이하 요약
+      -> 뷰어는 root부터 받아 그리고, 화면에서 가까운 노드만 자식으로 교체
+    - 원본은 memmap + chunk_points 단위로만 읽음 (RAM보다 큰 dense cloud도 처리).
+      leaf 점은 chunk마다 바로 leaf 파일 뒤에 붙이고, 중간 노드는 자식 요약만 메모리에 둔다.
+
+    out_dir는 temp 디렉토리에 다 만든 뒤 교체 (서빙 중인 이전 타일이 반쯤 바뀌지 않음).
+    반환: manifest
+    """
+    t0 = time.monotonic()
+    verts = read_ply_vertices(ply_path)
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(f".{out_dir.name}.{uuid.uuid4().hex[:8]}.tmp")
+    nodes_dir = tmp_dir / NODES_DIR
+    nodes_dir.mkdir(parents=True)
+    rng = np.random.default_rng(0)
+
+    try:
+        # 1) bounds -> 정육면체 (octree는 모든 축을 같은 크기로 나눔)
+        lo, hi = _bounds(verts, chunk_points)
+        if not np.isfinite(lo).all():
+            lo = hi = np.zeros(3)
+        size = float(max((hi - lo).max(), 1e-6))
+        origin = (lo + hi) / 2.0 - size / 2.0
+
+        # 2) 가장 깊은 격자 cell별 점 수 -> 계층 (max_leaf_points 넘는 노드만 분할)
+        counts = _count_grid(verts, origin, size, grid_depth, chunk_points)
+        root = _build_hierarchy(_pyramid(counts), max_leaf_points)
+        lookup, leaves = _leaf_lookup(root, grid_depth)
+
+        # 3) leaf 파일: 점 수를 이미 아니까 header 먼저, chunk마다 해당 leaf 파일 뒤에 append
+        for leaf in leaves:
+            (nodes_dir / f"{leaf.name}.ply").write_bytes(ply_header(leaf.count))
+        res = 1 << grid_depth
+        for chunk in _chunks(verts, chunk_points):
+            xyz = _xyz(chunk)
+            ok = np.isfinite(xyz).all(axis=1)
+            chunk, xyz = chunk[ok], xyz[ok]
+            c = _cells(xyz, origin, size, res)
+            leaf_ids = lookup[(c[:, 0] * res + c[:, 1]) * res + c[:, 2]]
+            order = np.argsort(leaf_ids, kind="stable")
+            leaf_ids = leaf_ids[order]
+            out = _to_vertices(chunk[order])
+            ids, starts = np.unique(leaf_ids, return_index=True)
+            ends = np.append(starts[1:], len(leaf_ids))
+            for i, s, e in zip(ids, starts, ends):
+                with (nodes_dir / f"{leaves[i].name}.ply").open("ab") as fh:
+                    out[s:e].tofile(fh)
+
+        # 4) 중간 노드: 자식 요약을 아래에서 위로 (post-order, 메모리에는 자식 요약만)
+        manifest_nodes: Dict[str, Dict[str, Any]] = {}
+
+        def summarize(node: _Node) -> np.ndarray:
+            box_min, node_size = _node_box(origin, size, node)
+            path = nodes_dir / f"{node.name}.ply"
+            if node.is_leaf:
+                leaf_verts = read_ply_vertices(path)
+                # 너무 큰 leaf(최대 깊이)는 일부만 읽어서 요약
+                if len(leaf_verts) > 4 * node_points:
+                    idx = np.sort(rng.choice(len(leaf_verts), 4 * node_points, replace=False))
+                    pool = np.asarray(leaf_verts[idx])
+                else:
+                    pool = np.asarray(leaf_verts)
+                count = len(leaf_verts)
+                del leaf_verts
+            else:
+                pool = np.concatenate([summarize(child) for child in node.children])
+                pool = _subsample(pool, box_min, node_size, node_resolution, node_points, rng)
+                _write_node(path, pool)
+                count = len(pool)
+
+            manifest_nodes[node.name] = {
+                "level": node.level,
+                "points": count,
+                "subtree_points": node.count,
+                "bytes": path.stat().st_size,
+                "bounds": [box_min.tolist(), (box_min + node_size).tolist()],
+                # 이 노드 점 간격 (뷰어 LOD 판단용, 3D Tiles geometricError에 해당)
+                "spacing": node_size / node_resolution if node.children else 0.0,
+                "children": [child.name for child in node.children],
+            }
+            if node.is_leaf:
+                return _subsample(pool, box_min, node_size, node_resolution, node_points, rng)
+            return pool
+
+        if root.count:
+            summarize(root)
+
+        manifest = {
+            "version": TILES_VERSION,
+            "build": uuid.uuid4().hex,
+            "format": "ply-xyzrgb",
+            "refine": "REPLACE",
+            "root": ROOT,
+            "points": int(counts.sum()),
+            "bounds": [origin.tolist(), (origin + size).tolist()],
+            "tight_bounds": [lo.tolist(), hi.tolist()],
+            "params": {
+                "max_leaf_points": max_leaf_points,
+                "node_points": node_points,
+                "node_resolution": node_resolution,
+                "grid_depth": grid_depth,
+            },
+            "source": source or {"file": Path(ply_path).name},
+            "seconds": round(time.monotonic() - t0, 3),
+            "nodes": dict(sorted(manifest_nodes.items(), key=lambda kv: (len(kv[0]), kv[0]))),
+        }
+        (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # 이전 타일과 교체: rename 두 번 (사이에 잠깐 404가 날 수 있지만 섞인 상태는 없음)
+    old = None
+    if out_dir.exists():
+        old = out_dir.with_name(f".{out_dir.name}.{uuid.uuid4().hex[:8]}.old")
+        os.replace(out_dir, old)
+    os.replace(tmp_dir, out_dir)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+    return manifest
@@ -0,0 +1,151 @@
+# backend/result_cache.py
+from __future__ import annotations
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+# 캐시에 담는 산출물 (output/ 기준 상대경로). 없으면 건너뜀.
+# colmap.db / dense workspace 같은 중간 산출물은 크기만 크고 서빙에 안 쓰이므로 제외.
+CACHED_ARTIFACTS = [
+    "sparse",
+    "points.ply",
+    "points_sparse.ply",
+    "points_dense.ply",
+    "scene.splat",
+    "gaussians.splat",
+    "3dgs",
+]
+
+
+def _link_tree(src: Path, dst: Path) -> None:
+    """src(파일 or 디렉토리)를 dst로 hardlink 복제 (안 되면 copy)"""
+    if src.is_dir():
+        for p in src.rglob("*"):
+            if p.is_file():
+                _link_tree(p, dst / p.relative_to(src))
+        return
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _tree_size(p: Path) -> int:
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file())
+
+
+class ResultCache:
+    """
+    재구성 결과 캐시.
+
+    key = sha256(정렬된 입력 이미지 hash + 파이프라인 버전 + 파라미터)
+    레이아웃:
+      <root>/<key>/entry.json   (status 등 meta 일부, 크기)
+      <root>/<key>/output/...   (job output의 hardlink)
+
+    eviction: entry 총 크기가 budget_bytes를 넘으면 가장 오래 안 쓰인 것부터 삭제.
+    (LRU 기준 = entry.json mtime, hit 때마다 갱신)
+    """
+
+    def __init__(self, root: Path, budget_bytes: int):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(hashes: Iterable[str], version: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"inputs": sorted(hashes), "version": version, "params": params},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry_path = self._entry_dir(key) / "entry.json"
+        if not entry_path.exists():
+            return None
+        try:
+            entry = json.loads(entry_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        os.utime(entry_path)
+        return entry
+
+    def restore(self, key: str, output_dir: Path) -> Optional[Dict[str, Any]]:
+        """hit이면 캐시된 산출물을 output_dir로 link하고 entry 반환"""
+        entry = self.get(key)
+        if entry is None:
+            return None
+        cached_out = self._entry_dir(key) / "output"
+        for name in entry.get("artifacts", []):
+            src = cached_out / name
+            if src.exists():
+                _link_tree(src, output_dir / name)
+        return entry
+
+    def put(self, key: str, output_dir: Path, meta: Dict[str, Any]) -> None:
+        """job output을 캐시에 등록 (임시 디렉토리에 만든 뒤 rename -> 반쯤 만든 entry는 안 보임)"""
+        entry_dir = self._entry_dir(key)
+        if entry_dir.exists():
+            return
+
+        tmp_dir = self.root / f".tmp-{uuid.uuid4().hex}"
+        artifacts: List[str] = []
+        for name in CACHED_ARTIFACTS:
+            src = output_dir / name
+            if src.exists():
+                _link_tree(src, tmp_dir / "output" / name)
+                artifacts.append(name)
+        if not artifacts:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        entry = dict(meta)
+        entry["artifacts"] = artifacts
+        entry["size"] = _tree_size(tmp_dir / "output")
+        entry["created"] = time.time()
+        (tmp_dir / "entry.json").write_text(json.dumps(entry, ensure_ascii=False, indent=2), encoding="utf-8")
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # 동시에 같은 key가 먼저 등록됨
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """budget 초과분을 LRU 순으로 삭제. 반환: 삭제한 entry 수"""
+        entries = []
+        total = 0
+        for d in self.root.iterdir():
+            entry_path = d / "entry.json"
+            if d.name.startswith(".") or not entry_path.exists():
+                continue
+            try:
+                size = json.loads(entry_path.read_text(encoding="utf-8")).get("size", 0)
+            except (OSError, ValueError):
+                size = _tree_size(d)
+            entries.append((entry_path.stat().st_mtime, size, d))
+            total += size
+
+        removed = 0
+        for _, size, d in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            shutil.rmtree(d, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,40 @@
+# backend/tests/conftest.py
+# Redis 서버 없이 app을 import: redis.from_url -> fakeredis (같은 in-memory 서버 공유)
+import sys
+from pathlib import Path
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import redis  # noqa: E402
+import redis.asyncio  # noqa: E402
+
+_server = fakeredis.FakeServer()
+redis.from_url = lambda *a, **k: fakeredis.FakeRedis(server=_server)
+redis.asyncio.from_url = lambda *a, **k: fakeredis.FakeAsyncRedis(server=_server)
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """job/blob/결과 캐시 디렉토리를 tmp_path로 돌린 app 모듈"""
+    import app
+    from blobstore import BlobStore
+    from result_cache import ResultCache
+
+    jobs = tmp_path / "jobs"
+    jobs.mkdir()
+    monkeypatch.setattr(app, "DATA_DIR", jobs)
+    monkeypatch.setattr(app, "blobs", BlobStore(tmp_path / "blobs"))
+    monkeypatch.setattr(app, "result_cache", ResultCache(tmp_path / "cache", 1024**3))
+    app.r.flushall()
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app_module.app)
@@ -0,0 +1,24 @@
+# backend/tests/test_cancel_chain.py
+from rq.job import Job, JobStatus
+
+IMAGES = [("files", ("a.jpg", b"a" * 64)), ("files", ("b.jpg", b"b" * 64))]
+
+
+def test_cancel_queued_chain_drops_gpu_job(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "_capable_gpu_worker", lambda stages: "gpu-host")
+    job_id = client.post("/api/jobs", files=IMAGES).json()["job_id"]
+    meta_path = app_module._job_paths(job_id)[3]
+    meta = app_module._read_meta(meta_path)
+    assert meta.get("chain") and meta.get("rq_id_gpu")
+
+    assert client.post(f"/api/jobs/{job_id}/cancel").json()["cancel_requested"]
+    for rq_id in (meta["rq_id"], meta["rq_id_gpu"]):
+        assert Job.fetch(rq_id, connection=app_module.r).get_status() == JobStatus.CANCELED
+    assert app_module.gpu_queue.deferred_job_registry.count == 0
+
+    # 그래도 GPU phase가 실행되면 (이미 꺼내간 경우) 기록된 cancelled meta를 덮어쓰지 않음
+    before = app_module._read_meta(meta_path)
+    app_module.recon_job(job_id, stages=meta["chain"]["gpu"])
+    after = app_module._read_meta(meta_path)
+    assert after["status"] == "cancelled"
+    assert after["aborted_stage"] == before["aborted_stage"] == "queued"
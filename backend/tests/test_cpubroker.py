@@ -0,0 +1,17 @@
+# backend/tests/test_cpubroker.py
+import time
+
+import fakeredis
+
+from cpubroker import CpuBroker
+
+
+def test_lease_wait_stops_on_cancel():
+    broker = CpuBroker(fakeredis.FakeRedis(), total=2, slots=1, wait_timeout=600)
+    with broker.lease() as held:
+        assert held == 2
+        # 예산이 다 나간 상태: stop이 사유를 돌려주면 wait_timeout까지 기다리지 않음
+        t0 = time.monotonic()
+        with broker.lease(stop=lambda: "cancelled") as threads:
+            assert threads == broker.min_threads
+        assert time.monotonic() - t0 < 5
@@ -0,0 +1,18 @@
+# backend/tests/test_dispatch.py
+import dispatch
+
+
+def _est(stages, images=20, sfm_mp=60.0):
+    return {"images": images, "sfm_megapixels": sfm_mp, "stages": stages}
+
+
+def test_classify_counts_heavy_stages(monkeypatch):
+    monkeypatch.setattr(dispatch, "HEAVY_STAGE_WEIGHTS", "dense=1,3dgs=2")
+    # SfM만이면 small, 같은 큐에서 dense/3DGS까지 돌면 large
+    assert dispatch.classify(_est(["sfm"])) == dispatch.QUEUE_SMALL
+    assert dispatch.classify(_est(["sfm", "dense"])) == dispatch.QUEUE_SMALL
+    assert dispatch.classify(_est(["sfm", "dense", "3dgs"])) == dispatch.QUEUE_LARGE
+    # 작은 scene은 무거운 단계가 있어도 small
+    assert dispatch.classify(_est(["sfm", "dense", "3dgs"], sfm_mp=20.0)) == dispatch.QUEUE_SMALL
+    # 이미지 수 상한은 그대로
+    assert dispatch.classify(_est(["sfm"], images=dispatch.SMALL_MAX_IMAGES + 1)) == dispatch.QUEUE_LARGE
@@ -0,0 +1,32 @@
+# backend/tests/test_downscale.py
+from PIL import Image
+
+from recon import downscale
+
+
+def test_downscale_reuses_set_for_same_inputs(tmp_path, monkeypatch):
+    src, dst = tmp_path / "input", tmp_path / "work" / "images"
+    src.mkdir()
+    names = ["a.jpg", "b.jpg"]
+    for n in names:
+        Image.new("RGB", (400, 300), "red").save(src / n)
+
+    calls = []
+    real = downscale._downscale_one
+    monkeypatch.setattr(downscale, "_downscale_one", lambda job: calls.append(job) or real(job))
+
+    assert "reused" not in downscale.downscale_images(src, dst, names, 200, workers=1)
+    assert len(calls) == 2
+    with Image.open(dst / "a.jpg") as img:
+        assert max(img.size) == 200
+
+    # 같은 입력/설정: 다시 만들지 않음
+    assert downscale.downscale_images(src, dst, names, 200, workers=1)["reused"]
+    assert len(calls) == 2
+
+    # 설정이 바뀌거나 원본이 바뀌면 다시 만듦
+    downscale.downscale_images(src, dst, names, 100, workers=1)
+    assert len(calls) == 4
+    Image.new("RGB", (640, 480), "blue").save(src / "b.jpg")
+    assert "reused" not in downscale.downscale_images(src, dst, names, 100, workers=1)
+    assert len(calls) == 6
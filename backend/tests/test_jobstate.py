@@ -0,0 +1,22 @@
+# backend/tests/test_jobstate.py
+import fakeredis
+
+from jobstate import JobStateStore
+
+
+def test_fill_does_not_publish_or_clobber():
+    conn = fakeredis.FakeRedis()
+    store = JobStateStore(conn, ttl=0)
+    pubsub = conn.pubsub()
+    pubsub.subscribe(JobStateStore.channel("j1"))
+    pubsub.get_message(timeout=0.1)  # subscribe 확인 메시지
+
+    store.fill("j1", {"status": "queued", "version": 1})
+    assert pubsub.get_message(timeout=0.1) is None
+    assert store.get("j1")["version"] == 1
+
+    # worker가 먼저 쓴 새 view는 늦게 온 fill이 덮어쓰지 않음
+    store.put("j1", {"status": "running", "version": 2})
+    assert pubsub.get_message(timeout=0.1)["type"] == "message"
+    store.fill("j1", {"status": "queued", "version": 1})
+    assert store.get("j1")["version"] == 2
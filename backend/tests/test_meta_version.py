@@ -0,0 +1,25 @@
+# backend/tests/test_meta_version.py
+import json
+
+
+def test_write_meta_version_skips_reparse_but_tracks_other_writers(app_module, monkeypatch, tmp_path):
+    meta_path = tmp_path / "jobs" / "j1" / "meta.json"
+    meta = {"job_id": "j1", "status": "queued"}
+    app_module._write_meta(meta_path, meta)
+    assert meta["version"] == 1
+
+    # 자기가 마지막으로 쓴 파일이면 디스크를 다시 파싱하지 않음
+    reads = []
+    real_read = app_module._read_meta
+    monkeypatch.setattr(app_module, "_read_meta", lambda p: reads.append(p) or real_read(p))
+    app_module._write_meta(meta_path, meta)
+    assert meta["version"] == 2 and reads == []
+
+    # 다른 프로세스가 더 높은 version으로 썼으면 그 값 기준으로 +1
+    tmp = meta_path.with_name("other.tmp")
+    tmp.write_text(json.dumps({"job_id": "j1", "status": "running", "version": 7}), encoding="utf-8")
+    tmp.replace(meta_path)
+    stale = {"job_id": "j1", "status": "queued", "version": 2}
+    app_module._write_meta(meta_path, stale)
+    assert stale["version"] == 8 and reads == [meta_path]
+    assert app_module._read_meta(meta_path)["version"] == 8
@@ -0,0 +1,35 @@
+# backend/tests/test_pairs.py
+from pathlib import Path
+
+from recon import pairs
+from recon.pairs import ImageMeta, plan_matching
+
+
+def _plan(monkeypatch, metas, **kw):
+    by_name = {m.name: m for m in metas}
+    monkeypatch.setattr(pairs, "read_image_meta", lambda path: by_name[path.name])
+    return plan_matching(Path("/nonexistent"), list(by_name), exhaustive_max=2, **kw)
+
+
+def test_gps_only_plan_pairs_every_image(monkeypatch):
+    # 시각 없음, 6장 중 4장만 GPS (2장은 서로 가깝고, 1장은 반경 밖에 혼자)
+    metas = [
+        ImageMeta("a.jpg", lat=37.5, lon=127.0),
+        ImageMeta("b.jpg", lat=37.50001, lon=127.0),
+        ImageMeta("c.jpg", lat=37.50002, lon=127.0),
+        ImageMeta("far.jpg", lat=38.0, lon=127.0),
+        ImageMeta("nogps1.jpg"),
+        ImageMeta("nogps2.jpg"),
+    ]
+    plan = _plan(monkeypatch, metas, time_window=2)
+    assert plan.kind == "pairs"
+    assert "gps" in plan.reason and "fallback" in plan.reason
+    paired = {name for pair in plan.pairs for name in pair}
+    assert paired == {m.name for m in metas}
+
+
+def test_fully_covered_plan_has_no_fallback(monkeypatch):
+    metas = [ImageMeta(f"{i}.jpg", time=float(i)) for i in range(5)]
+    plan = _plan(monkeypatch, metas, time_window=1)
+    assert "fallback" not in plan.reason
+    assert {name for pair in plan.pairs for name in pair} == {m.name for m in metas}
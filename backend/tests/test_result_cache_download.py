@@ -0,0 +1,57 @@
+# backend/tests/test_result_cache_download.py
+from recon.ply import write_points_ply
+
+import numpy as np
+
+IMAGES = [("files", ("a.jpg", b"a" * 64)), ("files", ("b.jpg", b"b" * 64))]
+
+
+def _finish_job(app, job_id, skipped=None):
+    """recon_job 끝난 상태를 흉내: points.ply 쓰고 artifact 기록 + 결과 캐시 등록"""
+    job_dir, input_dir, output_dir, meta_path = app._job_paths(job_id)
+    rng = np.random.default_rng(0)
+    write_points_ply(output_dir / "points.ply", rng.random((500, 3)), rng.integers(0, 255, (500, 3)))
+    meta = app._read_meta(meta_path)
+    meta["status"] = "done_sparse"
+    if skipped:
+        meta["skipped_stages"] = skipped
+    app._record_artifacts(meta, output_dir)
+    app._write_meta(meta_path, meta)
+    app._cache_result(meta, output_dir)
+
+
+def test_download_after_result_cache_hit(app_module, client):
+    first = client.post("/api/jobs", files=IMAGES).json()["job_id"]
+    _finish_job(app_module, first)
+
+    second = client.post("/api/jobs", files=IMAGES).json()["job_id"]
+    meta = app_module._read_meta(app_module._job_paths(second)[3])
+    assert meta.get("cache_hit")
+    assert isinstance(meta["served_artifacts"], dict)
+
+    r = client.get(f"/api/jobs/{second}/points.ply")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert not etag.startswith("W/")
+    assert client.get(f"/api/jobs/{second}/points.ply", headers={"If-None-Match": etag}).status_code == 304
+
+    # 완료 후처리도 cache hit job의 meta로 동작해야 함
+    app_module.precompress_job(second)
+    app_module.tiles_job(second)
+    assert client.get(f"/api/jobs/{second}/points.ply", headers={"Accept-Encoding": "gzip"}).status_code == 200
+
+
+def test_result_with_skipped_stages_is_cached(app_module, client, monkeypatch):
+    # CPU 전용 호스트: dense를 건너뛴 결과도 캐시됨
+    first = client.post("/api/jobs", files=IMAGES).json()["job_id"]
+    _finish_job(app_module, first, skipped={"undistort": "no cuda", "dense": "no cuda"})
+
+    second = client.post("/api/jobs", files=IMAGES).json()["job_id"]
+    meta = app_module._read_meta(app_module._job_paths(second)[3])
+    assert meta.get("cache_hit")
+    assert set(meta["skipped_stages"]) == {"undistort", "dense"}
+
+    # dense를 돌릴 GPU worker가 생기면 건너뛴 결과는 쓰지 않고 새로 실행
+    monkeypatch.setattr(app_module, "_capable_gpu_worker", lambda stages: "gpu-host")
+    third = client.post("/api/jobs", files=IMAGES).json()["job_id"]
+    assert not app_module._read_meta(app_module._job_paths(third)[3]).get("cache_hit")
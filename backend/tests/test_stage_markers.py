@@ -0,0 +1,25 @@
+# backend/tests/test_stage_markers.py
+from recon.stages import ColmapPipeline
+
+
+def _pipeline(tmp_path, **kw):
+    images = tmp_path / "images"
+    images.mkdir(exist_ok=True)
+    return ColmapPipeline(images, tmp_path / "out", tmp_path / "logs", **kw)
+
+
+def test_marker_rerun_when_stage_params_change(tmp_path):
+    p = _pipeline(tmp_path, ply_filter={"max_error": 2.0})
+    p.sparse_ply.parent.mkdir(parents=True)
+    p.sparse_ply.write_bytes(b"ply\n")
+    p._mark("convert", {})
+    assert p.is_complete("convert")
+
+    # 같은 설정으로 다시 만든 pipeline (resume): 완료
+    assert _pipeline(tmp_path, ply_filter={"max_error": 2.0}).is_complete("convert")
+    # 필터가 바뀌면 다시 돌아야 함
+    assert not _pipeline(tmp_path, ply_filter={"max_error": 1.0}).is_complete("convert")
+
+    # params 없는 옛 마커도 미완료로 봄
+    p._marker("convert").write_text('{"finished": 0}', encoding="utf-8")
+    assert not p.is_complete("convert")
@@ -0,0 +1,93 @@
+# backend/tests/test_upload_finalize.py
+import pytest
+
+FILES = {"a.jpg": b"a" * 64, "b.jpg": b"b" * 64}
+
+
+def _upload(client):
+    body = {"files": [{"name": n, "size": len(d)} for n, d in FILES.items()]}
+    return client.post("/api/uploads", json=body).json()["upload_id"]
+
+
+def _put_all(client, upload_id):
+    for name, data in FILES.items():
+        assert client.put(f"/api/uploads/{upload_id}/files/{name}?offset=0", content=data).status_code < 300
+
+
+def test_finalize_claims_session_once(app_module, client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(app_module, "_submit_job", lambda job_id, meta: submitted.append(job_id))
+    upload_id = _upload(client)
+
+    # 미완성 -> 409, claim은 풀려서 다시 시도 가능해야 함
+    r = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert r.status_code == 409 and "incomplete" in r.json()["detail"]
+
+    _put_all(client, upload_id)
+
+    # 다른 finalize가 진행 중(선점됨)이면 409, 제출 안 함
+    job_dir = app_module._job_paths(upload_id)[0]
+    marker = app_module._claim_finalize(job_dir)
+    assert marker is not None
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+    assert submitted == []
+
+    marker.unlink()
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 200
+    # 제출 후에도 marker는 남음 -> 옛 meta("uploading")를 본 늦은 호출도 다시 제출 못 함
+    assert app_module._claim_finalize(job_dir) is None
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+    assert submitted == [upload_id]
+
+
+def test_finalize_submit_failure_can_be_retried(app_module, client, monkeypatch):
+    upload_id = _upload(client)
+    _put_all(client, upload_id)
+
+    submitted = []
+
+    def submit(job_id, meta):
+        if not submitted:
+            submitted.append(None)
+            raise RuntimeError("redis down")
+        submitted.append(job_id)
+
+    monkeypatch.setattr(app_module, "_submit_job", submit)
+    with pytest.raises(RuntimeError):
+        client.post(f"/api/uploads/{upload_id}/finalize")
+    job_dir, _, _, meta_path = app_module._job_paths(upload_id)
+    assert app_module._read_meta(meta_path)["status"] == "uploading"
+    assert (job_dir / "upload").exists()
+
+    # claim이 풀려 있어 재시도하면 제출됨
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 200
+    assert submitted == [None, upload_id]
+
+
+def test_finalize_and_put_exclude_each_other(app_module, client, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(app_module, "_submit_job", lambda job_id, meta: submitted.append(job_id))
+    upload_id = _upload(client)
+    _put_all(client, upload_id)
+    job_dir = app_module._job_paths(upload_id)[0]
+
+    # chunk를 쓰는 중인 PUT이 있으면 finalize는 409 (claim도 풀림)
+    writers = app_module._upload_writers_dir(job_dir)
+    writers.mkdir(parents=True, exist_ok=True)
+    (writers / "w1").touch()
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+    assert not (job_dir / ".finalize").exists()
+
+    # 오래된 marker(끊긴 연결)는 막지 않음
+    monkeypatch.setattr(app_module, "UPLOAD_WRITER_STALE", 0.0)
+    marker = app_module._claim_finalize(job_dir)
+
+    # finalize가 claim한 뒤의 PUT은 input 파일(곧 blob store의 hardlink)을 건드리지 않음
+    name, data = next(iter(FILES.items()))
+    r = client.put(f"/api/uploads/{upload_id}/files/{name}?offset=0", content=b"x" * len(data))
+    assert r.status_code == 409
+    assert (app_module._job_paths(upload_id)[1] / name).read_bytes() == data
+
+    marker.unlink()
+    assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 200
+    assert submitted == [upload_id]
@@ -1,27 +1,84 @@
 from __future__ import annotations
 
-import io
 import os
+import gzip
 import json
 import uuid
+import time
+import hashlib
+import queue
+import signal
 import shutil
 import zipfile
+import threading
 import subprocess
 from pathlib import Path
-from typing import Dict, Any, Optional
-
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+# 선택 의존성: 없으면 해당 encoding만 건너뜀 (gzip은 표준 라이브러리)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 JOBS_DIR = DATA_DIR / "jobs"
 JOBS_DIR.mkdir(parents=True, exist_ok=True)
 
+# 단계별 wall-clock 상한(초, 0 = 무제한): STAGE_TIMEOUT_TRAIN=10800 ...
+# 넘으면 프로세스 그룹째 kill 하고 status = "timed_out"
+STAGE_TIMEOUTS = {
+    stage: float(os.environ.get(f"STAGE_TIMEOUT_{stage.upper()}", "0"))
+    for stage in ("process", "train", "export")
+}
+# SIGTERM 후 SIGKILL까지 유예 (초)
+KILL_GRACE = float(os.environ.get("KILL_GRACE", "10"))
+TERMINAL_STATUSES = {"done", "failed", "cancelled", "timed_out"}
+
 # 결과물 이름(프론트/백엔드가 이걸로 가져감)
 GAUSSIANS_PLY_NAME = "gaussians.ply"
 
+# 완료 후 gaussians.ply의 br/zstd/gzip variant를 background pool에서 미리 만들어 둠 (요청 시점 압축 없음)
+PRECOMPRESS = os.environ.get("PRECOMPRESS", "1") == "1"
+PRECOMPRESS_ENCODINGS = [e.strip() for e in os.environ.get("PRECOMPRESS_ENCODINGS", "br,zstd,gzip").split(",") if e.strip()]
+PRECOMPRESS_WORKERS = int(os.environ.get("PRECOMPRESS_WORKERS", "2"))
+# 원본 대비 이보다 안 줄면 variant를 버림
+PRECOMPRESS_MIN_SAVING = float(os.environ.get("PRECOMPRESS_MIN_SAVING", "0.05"))
+# 압축 강도 (backend precompress.LEVELS 와 같은 env). 수백 MB에서 brotli 11은 너무 느림
+PRECOMPRESS_LEVELS = {
+    "br": int(os.environ.get("PRECOMPRESS_BR_QUALITY", "6")),
+    "zstd": int(os.environ.get("PRECOMPRESS_ZSTD_LEVEL", "10")),
+    "gzip": int(os.environ.get("PRECOMPRESS_GZIP_LEVEL", "6")),
+}
+# Content-Encoding -> 접미사. 순서 = 서버 선호도
+ENCODING_SUFFIXES = {"br": ".br", "zstd": ".zst", "gzip": ".gz"}
+# 다운로드 응답 Cache-Control. 기본 no-cache = 매번 ETag로 재검증 (같으면 304, body 없음)
+ARTIFACT_CACHE_CONTROL = os.environ.get("ARTIFACT_CACHE_CONTROL", "no-cache")
+
+# zip 업로드: 메모리에 통째로 올리지 않고 디스크에 spool 후 member 단위 스트리밍 해제
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", "4"))
+# zip bomb 방지
+MAX_ZIP_BYTES = int(os.environ.get("MAX_ZIP_BYTES", str(8 * 1024**3)))
+MAX_ZIP_ENTRIES = int(os.environ.get("MAX_ZIP_ENTRIES", "5000"))
+MAX_UNCOMPRESSED_BYTES = int(os.environ.get("MAX_UNCOMPRESSED_BYTES", str(16 * 1024**3)))
+MAX_COMPRESSION_RATIO = int(os.environ.get("MAX_COMPRESSION_RATIO", "100"))
+
 # nerfstudio 커맨드 (CUDA 필요)
 # - ns-process-data images
 # - ns-train splatfacto
@@ -29,7 +86,13 @@ GAUSSIANS_PLY_NAME = "gaussians.ply"
 #
 # nerfstudio는 splatfacto/gaussian export 플로우가 있음.   [oai_citation:2‡Scuba Tech](https://www.scuba.tech/tools-and-resources/osiris-gsharc?utm_source=chatgpt.com)
 
-app = FastAPI(title="CSRAI GPU Worker", version="0.1.0")
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    _resume_pending_jobs()
+    yield
+
+
+app = FastAPI(title="CSRAI GPU Worker", version="0.1.0", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -55,74 +118,289 @@ def _read_meta(p: Path) -> Dict[str, Any]:
     return json.loads(p.read_text("utf-8"))
 
 
+# 마지막으로 쓴 meta.json: path -> (inode, mtime_ns, version). stat이 같으면 그 뒤 아무도 안 쓴 것
+_meta_versions: Dict[str, tuple] = {}
+_META_VERSIONS_MAX = 10000
+
+
+def _meta_version(p: Path) -> int:
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return 0
+    hit = _meta_versions.get(str(p))
+    if hit is not None and hit[:2] == (st.st_ino, st.st_mtime_ns):
+        return hit[2]
+    try:
+        return int(_read_meta(p).get("version", 0))
+    except (OSError, ValueError):
+        return 0
+
+
 def _write_meta(p: Path, meta: Dict[str, Any]) -> None:
+    """
+    atomic publish: temp 파일에 쓰고 fsync -> rename (읽는 쪽은 반쯤 쓰인 JSON을 못 봄)
+    version: 쓸 때마다 +1. 메모리의 오래된 meta로 써도 디스크 값 기준으로 단조 증가
+    (worker thread와 cancel 요청이 번갈아 써도 ETag/since가 뒤로 가지 않음)
+    """
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(meta, ensure_ascii=False, indent=2), "utf-8")
+    meta["version"] = max(int(meta.get("version", 0)), _meta_version(p)) + 1
 
-
-def _run(cmd: list[str], cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
-    return subprocess.run(cmd, cwd=str(cwd) if cwd else None, capture_output=True, text=True)
+    tmp = p.with_name(f".{p.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as fh:
+            fh.write(json.dumps(meta, ensure_ascii=False, indent=2))
+            fh.flush()
+            os.fsync(fh.fileno())
+            # rename은 inode/mtime을 바꾸지 않음 -> rename 전에 잡아둠
+            st = os.fstat(fh.fileno())
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    if len(_meta_versions) >= _META_VERSIONS_MAX:
+        _meta_versions.clear()
+    _meta_versions[str(p)] = (st.st_ino, st.st_mtime_ns, meta["version"])
+
+
+# get_job 응답 캐시: meta.json은 rename으로만 바뀌므로 (inode, mtime)이 같으면 다시 파싱할 필요 없음
+# job 수만큼 커지지 않게 LRU로 VIEW_CACHE_SIZE 개까지만 (sync endpoint는 threadpool에서 돎 -> lock)
+VIEW_CACHE_SIZE = int(os.environ.get("VIEW_CACHE_SIZE", "1024"))
+_view_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_view_cache_lock = threading.Lock()
+
+
+def _view_cache_get(job_id: str, stamp: tuple) -> Optional[Dict[str, Any]]:
+    with _view_cache_lock:
+        cached = _view_cache.get(job_id)
+        if cached is None or cached[0] != stamp:
+            return None
+        _view_cache.move_to_end(job_id)
+        return cached[1]
+
+
+def _view_cache_put(job_id: str, stamp: tuple, view: Dict[str, Any]) -> None:
+    with _view_cache_lock:
+        _view_cache[job_id] = (stamp, view)
+        _view_cache.move_to_end(job_id)
+        while len(_view_cache) > VIEW_CACHE_SIZE:
+            _view_cache.popitem(last=False)
+
+
+class JobAborted(Exception):
+    """취소 / 단계 timeout 으로 프로세스를 죽였음 (reason = "cancelled" | "timed_out")"""
+
+    def __init__(self, reason: str, stage: str, proc: subprocess.CompletedProcess):
+        super().__init__(f"{stage} {reason}")
+        self.reason = reason
+        self.stage = stage
+        self.proc = proc
+
+
+def _kill_group(proc: subprocess.Popen) -> None:
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=KILL_GRACE)
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+
+def _run(
+    cmd: list[str],
+    cwd: Optional[Path] = None,
+    cancel: Optional[threading.Event] = None,
+    stage: str = "",
+) -> subprocess.CompletedProcess:
+    """
+    별도 프로세스 그룹으로 실행 (ns-train이 띄우는 자식까지 한 번에 kill 가능).
+    cancel이 set 되거나 STAGE_TIMEOUTS[stage]를 넘으면 그룹째 kill -> JobAborted
+    """
+    timeout = STAGE_TIMEOUTS.get(stage, 0)
+    deadline = time.monotonic() + timeout if timeout > 0 else None
+    proc = subprocess.Popen(
+        cmd, cwd=str(cwd) if cwd else None,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        start_new_session=True,
+    )
+    while True:
+        try:
+            # communicate는 timeout 후 다시 불러도 출력을 잃지 않음
+            out, err = proc.communicate(timeout=1.0)
+            return subprocess.CompletedProcess(cmd, proc.returncode, out, err)
+        except subprocess.TimeoutExpired:
+            if cancel is not None and cancel.is_set():
+                reason = "cancelled"
+            elif deadline is not None and time.monotonic() > deadline:
+                reason = "timed_out"
+            else:
+                continue
+        _kill_group(proc)
+        out, err = proc.communicate()
+        raise JobAborted(reason, stage, subprocess.CompletedProcess(cmd, proc.returncode, out, err))
 
 
 def _tail(s: str, n: int = 8000) -> str:
     return (s or "")[-n:]
 
 
-@app.get("/health")
-def health():
-    return {"ok": True}
+class ZipRejected(ValueError):
+    pass
 
 
-@app.post("/api/train")
-async def train(images_zip: UploadFile = File(...)):
+async def _spool_upload(f: UploadFile, dest: Path) -> int:
+    """UploadFile -> dest 로 chunk 단위 저장 (MAX_ZIP_BYTES 초과 시 중단)"""
+    total = 0
+    fh = await run_in_threadpool(open, dest, "wb")
+    try:
+        while True:
+            chunk = await f.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > MAX_ZIP_BYTES:
+                raise ZipRejected(f"zip larger than {MAX_ZIP_BYTES} bytes")
+            await run_in_threadpool(fh.write, chunk)
+    finally:
+        await run_in_threadpool(fh.close)
+    return total
+
+
+def _plan_zip_members(z: zipfile.ZipFile) -> List[tuple]:
     """
-    images_zip: zip 파일(내부에 jpg/png들이 들어있으면 됨)
-    반환: job_id + status_url + gaussians_url
+    이미지 member만 골라 (member, 평탄화된 파일명) 목록으로.
+    폴더 구조는 버리고 input/ 바로 아래로 (이름 충돌은 suffix).
+    """
+    infos = z.infolist()
+    if len(infos) > MAX_ZIP_ENTRIES:
+        raise ZipRejected(f"too many zip entries ({len(infos)} > {MAX_ZIP_ENTRIES})")
+
+    plan = []
+    taken: set = set()
+    total = 0
+    for info in infos:
+        if info.is_dir():
+            continue
+        name = Path(info.filename).name
+        if not name or name.startswith(".") or "__MACOSX" in info.filename:
+            continue
+        p = Path(name)
+        if p.suffix.lower() not in IMAGE_EXTS:
+            continue
+
+        total += info.file_size
+        if total > MAX_UNCOMPRESSED_BYTES:
+            raise ZipRejected(f"uncompressed images exceed {MAX_UNCOMPRESSED_BYTES} bytes")
+        if info.compress_size and info.file_size / info.compress_size > MAX_COMPRESSION_RATIO:
+            raise ZipRejected(f"suspicious compression ratio: {info.filename}")
+
+        out_name = name
+        i = 1
+        while out_name.lower() in taken:
+            out_name = f"{p.stem}_{i}{p.suffix}"
+            i += 1
+        taken.add(out_name.lower())
+        plan.append((info, out_name))
+    return plan
+
+
+class _ThreadZips:
+    """
+    해제 한 번 동안 thread마다 ZipFile 하나 (member마다 다시 열면 central directory를 매번 다시 읽음).
+    공유 핸들 하나는 read가 직렬화되므로 thread별로 둔다
     """
-    job_id = uuid.uuid4().hex[:12]
-    job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
 
-    input_dir.mkdir(parents=True, exist_ok=True)
-    work_dir.mkdir(parents=True, exist_ok=True)
-    out_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, zip_path: Path):
+        self.zip_path = zip_path
+        self._local = threading.local()
+        self._opened: List[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> zipfile.ZipFile:
+        z = getattr(self._local, "zip", None)
+        if z is None:
+            z = zipfile.ZipFile(self.zip_path)
+            self._local.zip = z
+            with self._lock:
+                self._opened.append(z)
+        return z
+
+    def close(self) -> None:
+        with self._lock:
+            for z in self._opened:
+                z.close()
+            self._opened.clear()
+
+
+def _extract_member(zips: _ThreadZips, info: zipfile.ZipInfo, dest: Path) -> None:
+    written = 0
+    with zips.get().open(info) as src, dest.open("wb") as out:
+        while True:
+            chunk = src.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            # header의 file_size를 속인 member 방어
+            if written > info.file_size:
+                raise ZipRejected(f"member larger than declared size: {info.filename}")
+            out.write(chunk)
 
-    meta = {"job_id": job_id, "status": "queued"}
-    _write_meta(meta_path, meta)
 
-    # zip 저장/해제
-    zip_bytes = await images_zip.read()
+def _extract_images(zip_path: Path, input_dir: Path) -> List[str]:
+    """zip에서 이미지만 input_dir로 평탄하게 해제 (member 단위 병렬). 반환: 파일명 목록"""
+    with zipfile.ZipFile(zip_path) as z:
+        plan = _plan_zip_members(z)
+
+    zips = _ThreadZips(zip_path)
     try:
-        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as z:
-            z.extractall(input_dir)
-    except Exception as e:
-        meta["status"] = "failed"
-        meta["error"] = f"zip extract failed: {repr(e)}"
-        _write_meta(meta_path, meta)
-        raise HTTPException(400, detail="Invalid zip")
+        with ThreadPoolExecutor(max_workers=max(1, EXTRACT_WORKERS)) as ex:
+            futures = [ex.submit(_extract_member, zips, info, input_dir / out_name) for info, out_name in plan]
+            for fut in futures:
+                fut.result()
+    finally:
+        zips.close()
+    return [out_name for _, out_name in plan]
 
-    # 이미지 폴더 찾기(중첩 zip 대비)
-    # input_dir 아래에 이미지가 바로 있거나, 한 단계 폴더로 들어있을 수 있음
-    def has_images(p: Path) -> bool:
-        exts = {".jpg", ".jpeg", ".png", ".webp"}
-        return any((p / f).suffix.lower() in exts for f in os.listdir(p) if (p / f).is_file())
 
-    images_dir = input_dir
-    if not has_images(images_dir):
-        # 1-depth 폴더 탐색
-        for child in input_dir.iterdir():
-            if child.is_dir() and has_images(child):
-                images_dir = child
-                break
+# ============================================================
+# Background training
+#   /api/train은 입력만 받고 바로 job_id 반환.
+#   실제 학습은 worker thread가 큐에서 꺼내 순서대로 실행 (GPU 하나 = 동시 1개가 기본)
+# ============================================================
+TRAIN_WORKERS = int(os.environ.get("TRAIN_WORKERS", "1"))
 
-    if not has_images(images_dir):
-        meta["status"] = "failed"
-        meta["error"] = "no images found in zip"
-        _write_meta(meta_path, meta)
-        raise HTTPException(400, detail="No images found")
+_train_queue: "queue.Queue[str]" = queue.Queue()
+_workers_started = False
+_workers_lock = threading.Lock()
 
-    # 실제 학습 (동기 실행 MVP)
-    meta["status"] = "running"
-    _write_meta(meta_path, meta)
+# job_id -> 취소 이벤트 (queued/running 동안만). 상태 전이(queued -> running / cancelled)는 _cancel_lock 안에서
+_cancel_events: Dict[str, threading.Event] = {}
+_cancel_lock = threading.Lock()
+
+
+def _train_job(job_id: str) -> Dict[str, Any]:
+    """
+    학습 파이프라인 (background worker thread에서 실행):
+    1) ns-process-data images  2) ns-train splatfacto  3) ns-export gaussian-splat
+    단계마다 meta.json 갱신 -> /api/jobs/{id}로 진행 상황 조회
+    """
+    job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
+    with _cancel_lock:
+        meta = _read_meta(meta_path)
+        cancel = _cancel_events.setdefault(job_id, threading.Event())
+        if meta.get("status") == "cancelled" or cancel.is_set():
+            if meta.get("status") != "cancelled":
+                meta["status"] = "cancelled"
+                meta["error"] = "Cancelled while queued"
+                _write_meta(meta_path, meta)
+            return meta
+        meta["status"] = "running"
+        _write_meta(meta_path, meta)
+    images_dir = input_dir
 
     # 1) ns-process-data images
     # work_dir/nerf 에 dataset 생성
@@ -134,7 +412,9 @@ async def train(images_zip: UploadFile = File(...)):
         "--data", str(images_dir),
         "--output-dir", str(dataset_dir),
     ]
-    p1 = _run(cmd1)
+    meta["stage"] = "process"
+    _write_meta(meta_path, meta)
+    p1 = _run(cmd1, cancel=cancel, stage="process")
     meta["cmd_process"] = " ".join(cmd1)
     meta["stdout_process"] = _tail(p1.stdout)
     meta["stderr_process"] = _tail(p1.stderr)
@@ -142,7 +422,7 @@ async def train(images_zip: UploadFile = File(...)):
         meta["status"] = "failed"
         meta["error"] = f"ns-process-data failed (code={p1.returncode})"
         _write_meta(meta_path, meta)
-        return JSONResponse(meta, status_code=500)
+        return meta
 
     # 2) ns-train splatfacto
     # 모델 출력은 work_dir/outputs 아래 생김
@@ -152,7 +432,9 @@ async def train(images_zip: UploadFile = File(...)):
         "--output-dir", str(work_dir / "outputs"),
         "--max-num-iterations", os.environ.get("NS_ITERS", "7000"),
     ]
-    p2 = _run(cmd2)
+    meta["stage"] = "train"
+    _write_meta(meta_path, meta)
+    p2 = _run(cmd2, cancel=cancel, stage="train")
     meta["cmd_train"] = " ".join(cmd2)
     meta["stdout_train"] = _tail(p2.stdout)
     meta["stderr_train"] = _tail(p2.stderr)
@@ -160,7 +442,7 @@ async def train(images_zip: UploadFile = File(...)):
         meta["status"] = "failed"
         meta["error"] = f"ns-train failed (code={p2.returncode})"
         _write_meta(meta_path, meta)
-        return JSONResponse(meta, status_code=500)
+        return meta
 
     # outputs 폴더에서 최신 config / checkpoint 찾기(간단히 가장 최근 run 사용)
     outputs_root = work_dir / "outputs"
@@ -168,7 +450,7 @@ async def train(images_zip: UploadFile = File(...)):
         meta["status"] = "failed"
         meta["error"] = "outputs dir not found"
         _write_meta(meta_path, meta)
-        return JSONResponse(meta, status_code=500)
+        return meta
 
     # 가장 최근 수정된 run 디렉토리 찾기
     runs = [p for p in outputs_root.rglob("*") if p.is_dir()]
@@ -178,7 +460,7 @@ async def train(images_zip: UploadFile = File(...)):
         meta["status"] = "failed"
         meta["error"] = "no run directory found"
         _write_meta(meta_path, meta)
-        return JSONResponse(meta, status_code=500)
+        return meta
 
     # 3) ns-export gaussian-splat (gaussians.ply)
     # export 폴더를 out_dir로 고정
@@ -188,7 +470,9 @@ async def train(images_zip: UploadFile = File(...)):
         "--output-dir", str(out_dir),
         "--export-gaussian-ply",
     ]
-    p3 = _run(cmd3)
+    meta["stage"] = "export"
+    _write_meta(meta_path, meta)
+    p3 = _run(cmd3, cancel=cancel, stage="export")
     meta["cmd_export"] = " ".join(cmd3)
     meta["stdout_export"] = _tail(p3.stdout)
     meta["stderr_export"] = _tail(p3.stderr)
@@ -196,7 +480,7 @@ async def train(images_zip: UploadFile = File(...)):
         meta["status"] = "failed"
         meta["error"] = f"ns-export failed (code={p3.returncode})"
         _write_meta(meta_path, meta)
-        return JSONResponse(meta, status_code=500)
+        return meta
 
     # out_dir 안에서 ply 찾기
     ply = None
@@ -208,7 +492,7 @@ async def train(images_zip: UploadFile = File(...)):
         meta["status"] = "failed"
         meta["error"] = "gaussian ply not found after export"
         _write_meta(meta_path, meta)
-        return JSONResponse(meta, status_code=500)
+        return meta
 
     # 통일 파일명으로 복사
     final_ply = out_dir / GAUSSIANS_PLY_NAME
@@ -217,8 +501,247 @@ async def train(images_zip: UploadFile = File(...)):
 
     meta["status"] = "done"
     meta["gaussians_ply"] = str(final_ply)
+    # content hash = 다운로드 strong ETag (size/mtime 은 파일이 그 뒤 바뀌었는지 확인용)
+    st = final_ply.stat()
+    meta["gaussians_ply_stat"] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _hash_file(final_ply)}
+    _write_meta(meta_path, meta)
+    _schedule_precompress(job_id)
+    return meta
+
+
+def _train_worker() -> None:
+    while True:
+        job_id = _train_queue.get()
+        try:
+            _train_job(job_id)
+        except JobAborted as e:
+            job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
+            meta = _read_meta(meta_path)
+            meta["status"] = e.reason
+            meta["aborted_stage"] = e.stage
+            meta[f"stderr_{e.stage}"] = _tail(e.proc.stderr)
+            if e.reason == "cancelled":
+                meta["error"] = f"Cancelled during {e.stage}"
+            else:
+                meta["error"] = f"Stage {e.stage} exceeded its time limit ({STAGE_TIMEOUTS[e.stage]:.0f}s)"
+            _write_meta(meta_path, meta)
+        except Exception as e:
+            job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
+            meta = _read_meta(meta_path)
+            meta["status"] = "failed"
+            meta["error"] = f"Exception: {repr(e)}"
+            _write_meta(meta_path, meta)
+        finally:
+            with _cancel_lock:
+                _cancel_events.pop(job_id, None)
+            _train_queue.task_done()
+
+
+def _start_workers() -> None:
+    global _workers_started
+    with _workers_lock:
+        if _workers_started:
+            return
+        for i in range(max(1, TRAIN_WORKERS)):
+            threading.Thread(target=_train_worker, name=f"train-worker-{i}", daemon=True).start()
+        _workers_started = True
+
+
+def _enqueue_train(job_id: str) -> None:
+    _start_workers()
+    _train_queue.put(job_id)
+
+
+# ============================================================
+# Precompressed variants
+#   gaussians.ply -> gaussians.ply.br / .zst / .gz (학습 worker와 별개 pool)
+#   다운로드 때는 Accept-Encoding에 맞는 파일을 그대로 보냄
+# ============================================================
+_precompress_pool = ThreadPoolExecutor(max_workers=max(1, PRECOMPRESS_WORKERS), thread_name_prefix="precompress")
+
+
+def _compress_variant(path: Path, encoding: str) -> Optional[int]:
+    """path -> path + 접미사 (temp -> rename). 반환: 크기, 충분히 안 줄었으면 None"""
+    dst = path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with path.open("rb") as src, tmp.open("wb") as out:
+            if encoding == "gzip":
+                with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=PRECOMPRESS_LEVELS["gzip"], mtime=0) as gz:
+                    shutil.copyfileobj(src, gz, UPLOAD_CHUNK_SIZE)
+            elif encoding == "br":
+                comp = brotli.Compressor(quality=PRECOMPRESS_LEVELS["br"])
+                while True:
+                    chunk = src.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    out.write(comp.process(chunk))
+                out.write(comp.finish())
+            else:
+                zstandard.ZstdCompressor(level=PRECOMPRESS_LEVELS["zstd"]).copy_stream(src, out)
+        size = tmp.stat().st_size
+        if size > path.stat().st_size * (1.0 - PRECOMPRESS_MIN_SAVING):
+            tmp.unlink()
+            dst.unlink(missing_ok=True)
+            return None
+        os.replace(tmp, dst)
+        return size
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _hash_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fh:
+        while True:
+            chunk = fh.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _gaussians_entry(meta: Dict[str, Any], ply: Path) -> Optional[Dict[str, Any]]:
+    """meta["gaussians_ply_stat"] 가 지금 파일과 맞으면 그 기록 (기록 이후 바뀌었으면 None)"""
+    entry = meta.get("gaussians_ply_stat")
+    try:
+        st = ply.stat()
+    except OSError:
+        return None
+    if not entry or (entry.get("size"), entry.get("mtime_ns")) != (st.st_size, st.st_mtime_ns):
+        return None
+    return entry
+
+
+def _precompress_job(job_id: str) -> None:
+    job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
+    ply = out_dir / GAUSSIANS_PLY_NAME
+    meta = _read_meta(meta_path)
+    source = meta.get("gaussians_ply_stat")
+    if not source or not ply.exists():
+        return
+
+    encodings = [
+        e for e in PRECOMPRESS_ENCODINGS
+        if e in ENCODING_SUFFIXES and not (e == "br" and brotli is None) and not (e == "zstd" and zstandard is None)
+    ]
+    variants = {}
+    for enc in encodings:
+        try:
+            size = _compress_variant(ply, enc)
+        except OSError:
+            continue
+        if size is not None:
+            variants[enc] = {"size": size}
+
+    # 압축하는 사이 결과가 바뀌었으면 기록 안 함
+    meta = _read_meta(meta_path)
+    if meta.get("gaussians_ply_stat") == source and _gaussians_entry(meta, ply) is not None:
+        meta["gaussians_variants"] = variants
+        _write_meta(meta_path, meta)
+
+
+def _schedule_precompress(job_id: str) -> None:
+    if PRECOMPRESS:
+        _precompress_pool.submit(_precompress_job, job_id)
+
+
+def _accepted_encodings(header: Optional[str]) -> Dict[str, float]:
+    """ "br;q=1.0, gzip;q=0.8" -> {"br": 1.0, "gzip": 0.8} """
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name.strip():
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def _select_variant(request: Request, meta: Dict[str, Any], ply: Path):
+    """Accept-Encoding에 맞는 미리 압축된 variant (encoding, 경로). 없으면 (None, 원본)"""
+    if _gaussians_entry(meta, ply) is None:
+        return None, ply
+    accepted = _accepted_encodings(request.headers.get("accept-encoding"))
+    best, best_q = None, 0.0
+    variants = meta.get("gaussians_variants") or {}
+    for enc in ENCODING_SUFFIXES:
+        info = variants.get(enc)
+        if not info:
+            continue
+        vpath = ply.with_name(ply.name + ENCODING_SUFFIXES[enc])
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > best_q and vpath.exists() and vpath.stat().st_size == info.get("size"):
+            best, best_q = (enc, vpath), q
+    return best or (None, ply)
+
+
+def _resume_pending_jobs() -> None:
+    """
+    재시작 전에 queued/running 이던 job은 다시 큐에 넣는다 (running은 처음부터 다시).
+    앱 시작 시 lifespan에서 호출
+    """
+    for meta_path in sorted(JOBS_DIR.glob("*/meta.json"), key=lambda p: p.stat().st_mtime):
+        meta = _read_meta(meta_path)
+        if meta.get("status") in ("queued", "running"):
+            meta["status"] = "queued"
+            _write_meta(meta_path, meta)
+            _enqueue_train(meta_path.parent.name)
+
+
+@app.get("/health")
+def health():
+    return {"ok": True}
+
+
+@app.post("/api/train")
+async def train(images_zip: UploadFile = File(...)):
+    """
+    images_zip: zip 파일(내부에 jpg/png들이 들어있으면 됨)
+    반환: job_id + status_url + gaussians_url (학습은 background에서 진행, status_url로 확인)
+    """
+    job_id = uuid.uuid4().hex[:12]
+    job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
+
+    input_dir.mkdir(parents=True, exist_ok=True)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    meta = {"job_id": job_id, "status": "queued"}
     _write_meta(meta_path, meta)
 
+    # zip 저장/해제: 디스크로 spool -> 이미지 member만 input/에 평탄하게 스트리밍 해제
+    zip_path = job_dir / "upload.zip"
+    try:
+        await _spool_upload(images_zip, zip_path)
+        images = await run_in_threadpool(_extract_images, zip_path, input_dir)
+    except Exception as e:
+        meta["status"] = "failed"
+        meta["error"] = f"zip extract failed: {repr(e)}"
+        _write_meta(meta_path, meta)
+        raise HTTPException(400, detail=f"Invalid zip: {e}")
+    finally:
+        zip_path.unlink(missing_ok=True)
+
+    if not images:
+        meta["status"] = "failed"
+        meta["error"] = "no images found in zip"
+        _write_meta(meta_path, meta)
+        raise HTTPException(400, detail="No images found")
+
+    meta["input_count"] = len(images)
+
+    _write_meta(meta_path, meta)
+    _enqueue_train(job_id)
+
     base = os.environ.get("PUBLIC_BASE_URL", "").rstrip("/")
     # 배포 시 PUBLIC_BASE_URL을 "https://xxxx.runpod.net" 같이 넣어라
     status_url = f"{base}/api/jobs/{job_id}" if base else f"/api/jobs/{job_id}"
@@ -226,33 +749,103 @@ async def train(images_zip: UploadFile = File(...)):
 
     return {
         "job_id": job_id,
-        "status": "done",
+        "status": meta["status"],
         "status_url": status_url,
         "gaussians_ply_url": gaussians_url,
     }
 
 
-@app.get("/api/jobs/{job_id}")
-def get_job(job_id: str):
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    대기 중이면 바로 cancelled, 학습 중이면 프로세스 그룹을 kill (1초 안에) -> worker가 cancelled 기록.
+    이미 끝난 job은 그대로.
+    """
     job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
     if not meta_path.exists():
         raise HTTPException(404, detail="job not found")
 
-    meta = _read_meta(meta_path)
-    ply = out_dir / GAUSSIANS_PLY_NAME
-    meta_out = {
-        "job_id": job_id,
-        "status": meta.get("status", "unknown"),
-        "error": meta.get("error"),
-        "gaussians_ply_exists": ply.exists(),
-    }
-    return meta_out
+    with _cancel_lock:
+        meta = _read_meta(meta_path)
+        status = meta.get("status")
+        if status in TERMINAL_STATUSES:
+            return {"job_id": job_id, "status": status, "cancel_requested": False}
+        _cancel_events.setdefault(job_id, threading.Event()).set()
+        if status == "queued":
+            # 큐에 남은 항목은 worker가 꺼낼 때 status를 보고 건너뜀
+            meta["status"] = "cancelled"
+            meta["error"] = "Cancelled while queued"
+            _write_meta(meta_path, meta)
+
+    return {"job_id": job_id, "status": meta.get("status"), "cancel_requested": True}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str, request: Request, since: Optional[int] = None):
+    """
+    since=N 또는 If-None-Match(ETag)로 변경 여부만 확인 가능 -> 안 바뀌었으면 304
+    """
+    job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
+    try:
+        st = meta_path.stat()
+    except FileNotFoundError:
+        raise HTTPException(404, detail="job not found")
+
+    stamp = (st.st_ino, st.st_mtime_ns)
+    meta_out = _view_cache_get(job_id, stamp)
+    if meta_out is None:
+        meta = _read_meta(meta_path)
+        ply = out_dir / GAUSSIANS_PLY_NAME
+        meta_out = {
+            "job_id": job_id,
+            "version": meta.get("version", 0),
+            "status": meta.get("status", "unknown"),
+            "stage": meta.get("stage"),
+            "error": meta.get("error"),
+            "gaussians_ply_exists": ply.exists(),
+        }
+        _view_cache_put(job_id, stamp, meta_out)
+
+    etag = f'W/"v{meta_out["version"]}"'
+    if (since is not None and meta_out["version"] <= since) or request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(meta_out, headers={"ETag": etag})
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 비교 (weak comparison, 목록 / * 지원)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
 
 
 @app.get("/api/jobs/{job_id}/gaussians.ply")
-def download_gaussians(job_id: str):
+def download_gaussians(job_id: str, request: Request):
     job_dir, input_dir, work_dir, out_dir, meta_path = _job_paths(job_id)
     ply = out_dir / GAUSSIANS_PLY_NAME
     if not ply.exists():
         raise HTTPException(404, detail="gaussians.ply not found")
-    return FileResponse(str(ply), media_type="application/octet-stream", filename="gaussians.ply")
\ No newline at end of file
+    meta = _read_meta(meta_path)
+    headers = {"Cache-Control": ARTIFACT_CACHE_CONTROL}
+    entry = _gaussians_entry(meta, ply)
+    if entry and entry.get("sha256"):
+        # encoding마다 다른 representation -> ETag도 따로 (backend _artifact_response 와 같은 규칙)
+        encoding, path = _select_variant(request, meta, ply)
+        headers["ETag"] = f'"{entry["sha256"]}-{encoding}"' if encoding else f'"{entry["sha256"]}"'
+        if meta.get("gaussians_variants"):
+            headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            headers["Content-Encoding"] = encoding
+    else:
+        # hash 기록 전(옛 job) / 기록 후 바뀐 파일: 원본 그대로 + size/mtime weak ETag
+        st = ply.stat()
+        path = ply
+        headers["ETag"] = f'W/"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type="application/octet-stream", filename="gaussians.ply", headers=headers)
\ No newline at end of file